@@ -139,12 +139,8 @@ async def test_event_hubs_send_timeout_async(live_eventhub_config):
         # pylint: disable=protected-access
         await asyncio.sleep(6)
         await cls.message_handler.work_async()
-        cls._waiting_messages = 0
-        cls._pending_messages = cls._filter_pending()
-        if cls._backoff and not cls._waiting_messages:
-            log.info("Client told to backoff - sleeping for %r seconds", cls._backoff)
-            await cls._connection.sleep_async(cls._backoff)
-            cls._backoff = 0
+        if not cls._get_backoff():
+            cls._send_pending()
         await cls._connection.work_async()
         return True
 
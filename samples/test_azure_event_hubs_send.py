@@ -168,12 +168,8 @@ def test_event_hubs_send_timeout_sync(live_eventhub_config):
         # pylint: disable=protected-access
         time.sleep(6)
         cls.message_handler.work()
-        cls._waiting_messages = 0
-        cls._pending_messages = cls._filter_pending()
-        if cls._backoff and not cls._waiting_messages:
-            log.info("Client told to backoff - sleeping for %r seconds", cls._backoff)
-            cls._connection.sleep(cls._backoff)
-            cls._backoff = 0
+        if not cls._get_backoff():
+            cls._send_pending()
         cls._connection.work()
         return True
 
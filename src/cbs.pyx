@@ -115,6 +115,11 @@ cdef class CBSTokenAuth(object):
         self._update_status()
         return self.state
 
+    @property
+    def refresh_at(self):
+        """The time in seconds since epoch at which the token will need to be refreshed."""
+        return self.expires_at - self._refresh_window
+
     cpdef get_failure_info(self):
         return self.token_status_code, self.token_status_description
 
@@ -99,6 +99,23 @@ cdef class Connection(StructBase):
     cpdef do_work(self):
         c_connection.connection_dowork(self._c_value)
 
+    cpdef handle_deadlines(self):
+        cdef stdint.uint64_t deadline
+        deadline = c_connection.connection_handle_deadlines(self._c_value)
+        if deadline == <stdint.uint64_t>-1:
+            return None
+        return deadline
+
+    cpdef get_socket_fd(self):
+        if self._sasl_client is None:
+            return None
+        return self._sasl_client.get_socket_fd()
+
+    cpdef has_pending_io(self):
+        if self._sasl_client is None:
+            return None
+        return self._sasl_client.has_pending_io()
+
     cpdef subscribe_to_close_event(self, on_close_received):
         self._close_event = c_connection.connection_subscribe_on_connection_close_received(
             self._c_value,
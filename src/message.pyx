@@ -10,6 +10,9 @@ import logging
 
 # C imports
 from libc cimport stdint
+from libc.string cimport memcpy
+from cpython.bytearray cimport PyByteArray_AS_STRING, PyByteArray_GET_SIZE, PyByteArray_Resize
+from cpython.buffer cimport PyBuffer_FillInfo
 
 cimport c_message
 cimport c_amqp_definitions
@@ -38,12 +41,37 @@ cpdef create_message():
     return new_message
 
 
+cdef unsigned char _empty_body_data = 0
+
+
+cdef class cMessageBodyData(object):
+    """Exposes a single body data section of a C message through the buffer
+    protocol without copying it. The message is kept alive for as long as the
+    buffer is in use.
+    """
+
+    cdef cMessage _message
+    cdef const unsigned char* _bytes
+    cdef Py_ssize_t _length
+
+    def __getbuffer__(self, Py_buffer *buffer, int flags):
+        cdef void* data = <void*>self._bytes
+        if data == NULL:
+            data = <void*>&_empty_body_data
+        PyBuffer_FillInfo(buffer, self, data, self._length, 1, flags)
+        self._message._exported_buffers += 1
+
+    def __releasebuffer__(self, Py_buffer *buffer):
+        self._message._exported_buffers -= 1
+
+
 cdef class cMessage(StructBase):
 
     cdef c_message.MESSAGE_HANDLE _c_value
+    cdef Py_ssize_t _exported_buffers
 
     def __cinit__(self):
-        pass
+        self._exported_buffers = 0
 
     def __dealloc__(self):
         _logger.debug("Deallocating cMessage")
@@ -54,6 +82,8 @@ cdef class cMessage(StructBase):
             self._memory_error()
 
     cpdef destroy(self):
+        if self._exported_buffers > 0:
+            raise BufferError("Cannot destroy cMessage while views of its body data exist.")
         try:
             if <void*>self._c_value is not NULL:
                 _logger.debug("Destroying cMessage")
@@ -243,15 +273,41 @@ cdef class cMessage(StructBase):
         else:
             self._value_error()
 
-    cpdef add_body_data(self, bytes value):
+    cpdef set_encoded_payload(self, const unsigned char[::1] value):
+        cdef size_t length = value.shape[0]
+        cdef const unsigned char* data = &value[0] if length else &_empty_body_data
+        if c_message.message_set_encoded_payload(self._c_value, data, length) != 0:
+            self._value_error()
+
+    cpdef get_encoded_payload(self):
+        cdef const unsigned char* data
+        cdef size_t length
+        if c_message.message_get_encoded_payload(self._c_value, &data, &length) != 0:
+            self._value_error()
+        if data == NULL:
+            return None
+        return data[:length]
+
+    cpdef add_body_data(self, const unsigned char[::1] value):
         cdef c_message.BINARY_DATA _binary
-        length = len(value)
-        bytes = value[:length]
-        _binary.length = length
-        _binary.bytes = bytes
+        _binary.length = value.shape[0]
+        _binary.bytes = &value[0] if _binary.length else <const unsigned char*>NULL
         if c_message.message_add_body_amqp_data(self._c_value, _binary) != 0:
             self._value_error()
 
+    cpdef add_body_data_sections(self, const unsigned char[::1] data, sizes):
+        cdef c_message.BINARY_DATA _binary
+        cdef size_t offset = 0
+        cdef size_t length
+        for length in sizes:
+            if offset + length > <size_t>data.shape[0]:
+                raise ValueError("Body data sections exceed the size of the supplied data.")
+            _binary.length = length
+            _binary.bytes = &data[offset] if length else <const unsigned char*>NULL
+            if c_message.message_add_body_amqp_data(self._c_value, _binary) != 0:
+                self._value_error()
+            offset += length
+
     cpdef get_body_data(self, size_t index):
         cdef c_message.BINARY_DATA _value
         if c_message.message_get_body_amqp_data_in_place(self._c_value, index, &_value) == 0:
@@ -259,6 +315,16 @@ cdef class cMessage(StructBase):
         else:
             self._value_error()
 
+    cpdef get_body_data_view(self, size_t index):
+        cdef c_message.BINARY_DATA _value
+        if c_message.message_get_body_amqp_data_in_place(self._c_value, index, &_value) != 0:
+            self._value_error()
+        body_data = cMessageBodyData()
+        body_data._message = self
+        body_data._bytes = _value.bytes
+        body_data._length = _value.length
+        return memoryview(body_data)
+
     cpdef count_body_data(self):
         cdef size_t body_count
         if c_message.message_get_body_amqp_data_count(self._c_value, &body_count) == 0:
@@ -751,6 +817,160 @@ cpdef size_t get_encoded_message_size(cMessage message, encoded_data):
         return total_encoded_size
 
 
+cdef int encode_bytearray_callback(void* context, const unsigned char* encoded_bytes, size_t length):
+    cdef bytearray output = <bytearray>context
+    cdef Py_ssize_t current_size = PyByteArray_GET_SIZE(output)
+    if PyByteArray_Resize(output, current_size + length) != 0:
+        return 1
+    memcpy(PyByteArray_AS_STRING(output) + current_size, encoded_bytes, length)
+    return 0
+
+
+cdef encode_value_into(c_amqpvalue.AMQP_VALUE value, bytearray output, description):
+    if c_amqpvalue.amqpvalue_encode(
+            value,
+            <c_amqpvalue.AMQPVALUE_ENCODER_OUTPUT>encode_bytearray_callback,
+            <void*>output) != 0:
+        raise ValueError("Cannot encode {}".format(description))
+
+
+cdef encode_data_section_into(const unsigned char* data_bytes, stdint.uint32_t length, bytearray output):
+    # Writes the same bytes as encoding amqpvalue_create_data(), without copying the
+    # payload into an intermediate AMQP value first: a described type with the
+    # small ulong descriptor 0x75, followed by the payload as vbin8 or vbin32.
+    cdef unsigned char constructor[8]
+    cdef size_t constructor_size
+    constructor[0] = 0x00
+    constructor[1] = 0x53
+    constructor[2] = 0x75
+    if length <= 255:
+        constructor[3] = 0xA0
+        constructor[4] = <unsigned char>length
+        constructor_size = 5
+    else:
+        constructor[3] = 0xB0
+        constructor[4] = (length >> 24) & 0xFF
+        constructor[5] = (length >> 16) & 0xFF
+        constructor[6] = (length >> 8) & 0xFF
+        constructor[7] = length & 0xFF
+        constructor_size = 8
+    if encode_bytearray_callback(<void*>output, constructor, constructor_size) != 0:
+        raise MemoryError("Cannot encode body AMQP data")
+    if length > 0 and encode_bytearray_callback(<void*>output, data_bytes, length) != 0:
+        raise MemoryError("Cannot encode body AMQP data")
+
+
+cdef encode_message_body_into(c_message.MESSAGE_HANDLE c_msg, bytearray output):
+    cdef c_message.MESSAGE_BODY_TYPE_TAG message_body_type
+    cdef c_amqpvalue.AMQP_VALUE message_body_value
+    cdef c_amqpvalue.AMQP_VALUE body_amqp_value
+    cdef c_message.BINARY_DATA binary_data
+    cdef size_t body_count = 0
+    cdef size_t i
+
+    if c_message.message_get_body_type(c_msg, &message_body_type) != 0:
+        raise ValueError("Failure getting message body type")
+
+    if message_body_type == c_message.MESSAGE_BODY_TYPE_TAG.MESSAGE_BODY_TYPE_VALUE:
+        if c_message.message_get_body_amqp_value_in_place(c_msg, &message_body_value) != 0:
+            raise ValueError("Cannot obtain AMQP value from body")
+        body_amqp_value = c_amqp_definitions.amqpvalue_create_amqp_value(message_body_value)
+        if <void*>body_amqp_value == NULL:
+            raise MemoryError("Cannot create body AMQP value")
+        try:
+            encode_value_into(body_amqp_value, output, "body AMQP value")
+        finally:
+            c_amqpvalue.amqpvalue_destroy(body_amqp_value)
+
+    elif message_body_type == c_message.MESSAGE_BODY_TYPE_TAG.MESSAGE_BODY_TYPE_DATA:
+        if c_message.message_get_body_amqp_data_count(c_msg, &body_count) != 0:
+            raise ValueError("Cannot get body AMQP data count")
+        if body_count == 0:
+            raise ValueError("Body data count is zero")
+        for i in range(body_count):
+            if c_message.message_get_body_amqp_data_in_place(c_msg, i, &binary_data) != 0:
+                raise ValueError("Cannot get body AMQP data {}".format(i))
+            encode_data_section_into(binary_data.bytes, <stdint.uint32_t>binary_data.length, output)
+
+    elif message_body_type == c_message.MESSAGE_BODY_TYPE_TAG.MESSAGE_BODY_TYPE_SEQUENCE:
+        if c_message.message_get_body_amqp_sequence_count(c_msg, &body_count) != 0:
+            raise ValueError("Cannot get body AMQP sequence count")
+        if body_count == 0:
+            raise ValueError("Body sequence count is zero")
+        for i in range(body_count):
+            if c_message.message_get_body_amqp_sequence_in_place(c_msg, i, &message_body_value) != 0:
+                raise ValueError("Cannot get body AMQP sequence {}".format(i))
+            body_amqp_value = c_amqp_definitions.amqpvalue_create_amqp_sequence(message_body_value)
+            if <void*>body_amqp_value == NULL:
+                raise MemoryError("Cannot create body AMQP sequence")
+            try:
+                encode_value_into(body_amqp_value, output, "body AMQP sequence")
+            finally:
+                c_amqpvalue.amqpvalue_destroy(body_amqp_value)
+
+
+cpdef size_t encode_message_into(
+        cMessage message,
+        bytearray output,
+        cHeader header=None,
+        cMessageAnnotations message_annotations=None,
+        cProperties properties=None,
+        AMQPValue application_properties=None,
+        cFooter footer=None,
+        cDeliveryAnnotations delivery_annotations=None):
+    """Encode a message to the end of the output buffer, using the supplied
+    sections rather than those set on the C message, which only provides the body.
+    Sections are written in the same order as get_encoded_message_size so that the
+    encoded bytes are identical. Returns the number of bytes written.
+    """
+    cdef c_amqpvalue.AMQP_VALUE section_value
+    cdef Py_ssize_t start_size = PyByteArray_GET_SIZE(output)
+
+    try:
+        if header is not None:
+            section_value = c_amqp_definitions.amqpvalue_create_header(header._c_value)
+            if <void*>section_value == NULL:
+                raise MemoryError("Cannot create header AMQP value")
+            try:
+                encode_value_into(section_value, output, "header value")
+            finally:
+                c_amqpvalue.amqpvalue_destroy(section_value)
+
+        if message_annotations is not None:
+            encode_value_into(message_annotations._c_value, output, "message annotations value")
+
+        if properties is not None:
+            section_value = c_amqp_definitions.amqpvalue_create_properties(properties._c_value)
+            if <void*>section_value == NULL:
+                raise MemoryError("Cannot create properties AMQP value")
+            try:
+                encode_value_into(section_value, output, "message properties value")
+            finally:
+                c_amqpvalue.amqpvalue_destroy(section_value)
+
+        if application_properties is not None:
+            section_value = c_amqp_definitions.amqpvalue_create_application_properties(
+                application_properties._c_value)
+            if <void*>section_value == NULL:
+                raise MemoryError("Cannot create application properties AMQP value")
+            try:
+                encode_value_into(section_value, output, "application properties value")
+            finally:
+                c_amqpvalue.amqpvalue_destroy(section_value)
+
+        if footer is not None:
+            encode_value_into(footer._c_value, output, "footer value")
+
+        if delivery_annotations is not None:
+            encode_value_into(delivery_annotations._c_value, output, "delivery annotations value")
+
+        encode_message_body_into(message._c_value, output)
+    except:
+        PyByteArray_Resize(output, start_size)
+        raise
+    return PyByteArray_GET_SIZE(output) - start_size
+
+
 cdef class cMessageDecoder(object):
 
     cdef c_message.MESSAGE_HANDLE decoded_message
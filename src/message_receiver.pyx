@@ -108,6 +108,36 @@ cdef class cMessageReceiver(StructBase):
             raise RuntimeError("Unable to send message dispostition 'delivery-modified' for message number {}".format(message_number))
         c_amqpvalue.amqpvalue_destroy(delivery_state)
 
+    cdef _settle_range(self, c_amqp_definitions.delivery_number first, c_amqp_definitions.delivery_number last, c_amqpvalue.AMQP_VALUE delivery_state, disposition):
+        if <void*>delivery_state == NULL:
+            self._memory_error()
+        result = c_message_receiver.messagereceiver_send_message_disposition_range(self._c_value, self._link_name, first, last, delivery_state)
+        c_amqpvalue.amqpvalue_destroy(delivery_state)
+        if result != 0:
+            raise RuntimeError("Unable to send message dispostition '{}' for message numbers {} to {}".format(disposition, first, last))
+
+    cpdef settle_accepted_range(self, c_amqp_definitions.delivery_number first, c_amqp_definitions.delivery_number last):
+        self._settle_range(first, last, c_message.messaging_delivery_accepted(), 'accepted')
+
+    cpdef settle_released_range(self, c_amqp_definitions.delivery_number first, c_amqp_definitions.delivery_number last):
+        self._settle_range(first, last, c_message.messaging_delivery_released(), 'released')
+
+    cpdef settle_rejected_range(self, c_amqp_definitions.delivery_number first, c_amqp_definitions.delivery_number last, const char* error_condition, const char* error_description, AMQPValue error_info=None):
+        cdef c_amqp_definitions.fields delivery_fields
+        if error_info is not None:
+            delivery_fields = <c_amqp_definitions.fields>error_info._c_value
+        else:
+            delivery_fields = <c_amqp_definitions.fields>NULL
+        self._settle_range(first, last, c_message.messaging_delivery_rejected(error_condition, error_description, delivery_fields), 'rejected')
+
+    cpdef settle_modified_range(self, c_amqp_definitions.delivery_number first, c_amqp_definitions.delivery_number last, bint delivery_failed, bint undeliverable_here, AMQPValue annotations):
+        cdef c_amqp_definitions.fields delivery_fields
+        if annotations is not None:
+            delivery_fields = <c_amqp_definitions.fields>annotations._c_value
+        else:
+            delivery_fields = <c_amqp_definitions.fields>NULL
+        self._settle_range(first, last, c_message.messaging_delivery_modified(delivery_failed, undeliverable_here, delivery_fields), 'delivery-modified')
+
     cdef wrap(self, cMessageReceiver value):
         self.destroy()
         self._link = value._link
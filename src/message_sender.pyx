@@ -10,6 +10,7 @@ import copy
 
 # C imports
 from libc cimport stdint
+from libc.string cimport memcpy
 
 from cpython.ref cimport PyObject
 cimport c_message_sender
@@ -37,9 +38,7 @@ cdef class cMessageSender(StructBase):
 
     cdef c_message_sender.MESSAGE_SENDER_HANDLE _c_value
     cdef cLink _link
-
-    def __cinit__(self):
-        pass
+    cdef cMessage _slot
 
     def __dealloc__(self):
         _logger.debug("Deallocating cMessageSender")
@@ -52,6 +51,13 @@ cdef class cMessageSender(StructBase):
     def __exit__(self, *args):
         self.destroy()
 
+    @property
+    def pending_count(self):
+        cdef size_t count
+        if c_message_sender.messagesender_get_pending_count(self._c_value, &count) != 0:
+            self._value_error()
+        return count
+
     cpdef open(self):
         if c_message_sender.messagesender_open(self._c_value) != 0:
             self._value_error()
@@ -90,6 +96,66 @@ cdef class cMessageSender(StructBase):
             return False
         return True
 
+    cpdef send_many(self, list messages, list timeouts, list callback_contexts):
+        cdef cMessage message
+        cdef c_amqp_definitions.tickcounter_ms_t timeout
+        cdef size_t index
+        results = []
+        try:
+            for index in range(len(messages)):
+                message = messages[index]
+                timeout = timeouts[index]
+                operation = c_message_sender.messagesender_send_async(self._c_value, <c_message.MESSAGE_HANDLE>message._c_value, on_message_send_complete, <void*>callback_contexts[index], timeout)
+                results.append(<void*>operation is not NULL)
+        except Exception as e:
+            # Stop at the first message that fails, so the caller knows which
+            # messages were added to the queue.
+            _logger.info("Failed to add message %r to the send queue: %r", len(results), e)
+        return results
+
+    cpdef send_presettled(self, list messages):
+        cdef cMessage message
+        cdef size_t sent = 0
+        for value in messages:
+            if isinstance(value, cMessage):
+                message = value
+            else:
+                message = self._fill_slot(value)
+            operation = c_message_sender.messagesender_send_async(self._c_value, <c_message.MESSAGE_HANDLE>message._c_value, NULL, NULL, 0)
+            if <void*>operation is NULL:
+                _logger.info("Send operation result is NULL")
+                break
+            sent += 1
+        return sent
+
+    cdef cMessage _fill_slot(self, const unsigned char[::1] data):
+        # Encode the data as the single Data section of a message that is reused for
+        # every send. The data is copied once, straight into the encoded payload of the
+        # message, and is only copied again if the C sender has to keep the message
+        # because the link is busy.
+        cdef size_t length = data.shape[0]
+        cdef size_t header_size = 5 if length <= 255 else 8
+        cdef unsigned char* buffer
+        if self._slot is None:
+            self._slot = create_message()
+        if c_message.message_reserve_encoded_payload(self._slot._c_value, header_size + length, &buffer) != 0:
+            self._memory_error()
+        buffer[0] = 0x00
+        buffer[1] = 0x53
+        buffer[2] = 0x75
+        if header_size == 5:
+            buffer[3] = 0xa0
+            buffer[4] = <unsigned char>length
+        else:
+            buffer[3] = 0xb0
+            buffer[4] = <unsigned char>(length >> 24)
+            buffer[5] = <unsigned char>(length >> 16)
+            buffer[6] = <unsigned char>(length >> 8)
+            buffer[7] = <unsigned char>length
+        if length:
+            memcpy(&buffer[header_size], &data[0], length)
+        return self._slot
+
     cpdef set_trace(self, bint value):
         c_message_sender.messagesender_set_trace(self._c_value, value)
 
@@ -81,6 +81,22 @@ cdef class XIO(StructBase):
         if c_xio.xio_setoption(self._c_value, option_name, option_value) != 0:
             raise self._value_error("Failed to set option {}".format(option_name))
 
+    cpdef get_socket_fd(self):
+        cdef int socket_fd = -1
+        if <void*>self._c_value is NULL:
+            return None
+        if c_xio.xio_setoption(self._c_value, b'socket_fd', <void*>&socket_fd) != 0 or socket_fd < 0:
+            return None
+        return socket_fd
+
+    cpdef has_pending_io(self):
+        cdef int pending_io = 0
+        if <void*>self._c_value is NULL:
+            return None
+        if c_xio.xio_setoption(self._c_value, b'socket_pending_io', <void*>&pending_io) != 0:
+            return None
+        return pending_io != 0
+
     cpdef set_certificates(self, bytes value):
         cdef char *certificate = value
         if c_xio.xio_setoption(self._c_value, b'TrustedCerts', <void*>certificate) != 0:
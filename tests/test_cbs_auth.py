@@ -0,0 +1,315 @@
+#-------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for
+# license information.
+#--------------------------------------------------------------------------
+import threading
+import time
+
+import pytest
+
+from uamqp import authentication, constants, errors
+
+
+class _CBSConnection(object):
+
+    def __init__(self):
+        self.container_id = "cbs"
+        self._closing = False
+        self._error = None
+        self.locks = 0
+
+    def lock(self):
+        self.locks += 1
+
+    def release(self):
+        pass
+
+
+class _CBSTokenAuth(object):
+
+    def __init__(self, status):
+        self.status = status
+        self.refresh_at = time.time() + 60
+        self.refreshed = []
+
+    def get_status(self):
+        return self.status.value
+
+    def refresh(self, token, expires_at):
+        self.refreshed.append(token)
+        self.status = constants.CBSAuthStatus.InProgress
+
+    def authenticate(self):
+        self.status = constants.CBSAuthStatus.InProgress
+
+
+def _create_auth(status):
+    auth = authentication.SASTokenAuth.from_shared_access_key(
+        "sb://localhost/queue", "key_name", "shared_access_key")
+    auth._connection = _CBSConnection()
+    auth._cbs_auth = _CBSTokenAuth(status)
+    auth._token_ok_until = 0
+    auth._token_refresh = None
+    auth._token_retry_at = None
+    auth._closed = False
+    return auth
+
+
+def test_cbs_auth_token_ok():
+    auth = _create_auth(constants.CBSAuthStatus.Ok)
+    assert auth.handle_token() == (False, False)
+    assert auth._token_ok_until == auth._cbs_auth.refresh_at
+
+    # The status is not checked again until a refresh is due.
+    auth._cbs_auth.status = constants.CBSAuthStatus.Expired
+    assert auth.handle_token() == (False, False)
+    assert auth._connection.locks == 1
+
+
+def test_cbs_auth_token_ok_closing():
+    auth = _create_auth(constants.CBSAuthStatus.Ok)
+    assert auth.handle_token() == (False, False)
+
+    # The connection state is checked first, without locking the connection.
+    auth._connection._closing = True
+    assert auth.handle_token() == (False, False)
+    auth._cbs_auth.status = constants.CBSAuthStatus.Expired
+    auth._token_ok_until = 0
+    assert auth.handle_token() == (False, False)
+    assert auth._connection.locks == 1
+
+
+def test_cbs_auth_token_refresh_closed():
+    auth = _create_auth(constants.CBSAuthStatus.RefreshRequired)
+    fetching = threading.Event()
+
+    def slow_acquire_token():
+        fetching.wait(5)
+        return b"refreshed", time.time() + 3600
+    auth._acquire_token = slow_acquire_token
+    auth._session = type("_Session", (object,), {"destroy": lambda self: None})()
+    auth._cbs_auth.destroy = lambda: None
+
+    # A fetch that is running when the authenticator is closed is not sent.
+    assert auth.handle_token() == (False, False)
+    refresh = auth._token_refresh
+    auth.close_authenticator()
+    fetching.set()
+    refresh.result(5)
+    auth._token_refresh = refresh
+    auth._send_refreshed_token()
+    assert not auth._cbs_auth.refreshed
+    assert auth.handle_token() == (False, False)
+
+
+def test_cbs_auth_token_refresh():
+    auth = _create_auth(constants.CBSAuthStatus.RefreshRequired)
+    fetching = threading.Event()
+
+    def slow_acquire_token():
+        fetching.wait(5)
+        return b"refreshed", time.time() + 3600
+    auth._acquire_token = slow_acquire_token
+
+    # The new token is fetched in the background while the current one is used.
+    assert auth.handle_token() == (False, False)
+    assert auth.handle_token() == (False, False)
+    assert not auth._cbs_auth.refreshed
+    assert auth.token != b"refreshed"
+    fetching.set()
+    auth._token_refresh.result(5)
+    assert auth.token != b"refreshed"
+    assert auth.handle_token() == (False, False)
+    assert auth._cbs_auth.refreshed == [b"refreshed"]
+    assert auth.token == b"refreshed"
+    assert auth._token_refresh is None
+
+
+def test_cbs_auth_token_refresh_retry():
+    auth = _create_auth(constants.CBSAuthStatus.RefreshRequired)
+    auth._retry_policy = authentication.TokenRetryPolicy(retries=1, backoff=50)
+    attempts = []
+
+    def failing_acquire_token():
+        attempts.append(None)
+        raise RuntimeError("fetch failed")
+    auth._acquire_token = failing_acquire_token
+
+    # A failed fetch is retried once the backoff has elapsed.
+    assert auth.handle_token() == (False, False)
+    auth._token_refresh.exception(5)
+    assert auth.handle_token() == (False, False)
+    assert auth._token_refresh is None
+    assert auth.retries == 1
+    assert auth.handle_token() == (False, False)
+    assert len(attempts) == 1
+    time.sleep(0.06)
+    assert auth.handle_token() == (False, False)
+    auth._token_refresh.exception(5)
+    assert len(attempts) == 2
+
+    # Once the retries are exhausted, the failure is raised.
+    with pytest.raises(errors.AuthenticationException):
+        auth.handle_token()
+
+
+def test_cbs_auth_token_retry():
+    auth = _create_auth(constants.CBSAuthStatus.Error)
+    auth._cbs_auth.get_failure_info = lambda: (401, b"Unauthorized")
+    auth._retry_policy = authentication.TokenRetryPolicy(retries=1, backoff=50)
+
+    # The retry is held back until the backoff has elapsed, without blocking.
+    assert auth.handle_token() == (False, True)
+    assert auth.handle_token() == (False, True)
+    assert auth._cbs_auth.status == constants.CBSAuthStatus.Error
+    time.sleep(0.06)
+    assert auth.handle_token() == (False, True)
+    assert auth._cbs_auth.status == constants.CBSAuthStatus.InProgress
+    assert auth.retries == 1
+
+    auth._cbs_auth.status = constants.CBSAuthStatus.Error
+    with pytest.raises(errors.TokenAuthFailure):
+        auth.handle_token()
+
+
+class _AccessToken(object):
+
+    def __init__(self, token, expires_on):
+        self.token = token
+        self.expires_on = expires_on
+
+
+def test_cbs_token_cache():
+    cache = authentication.TokenCache()
+    fetches = []
+    started = threading.Event()
+    release = threading.Event()
+
+    def fetch():
+        fetches.append(None)
+        started.set()
+        release.wait(5)
+        return b"token", time.time() + 3600
+
+    # Concurrent requests for the same key share a single fetch.
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_token("key", fetch)))
+               for _ in range(3)]
+    threads[0].start()
+    started.wait(5)
+    for thread in threads[1:]:
+        thread.start()
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    assert len(fetches) == 1
+    assert [token for token, _ in results] == [b"token"] * 3
+
+    # A cached token is only used while it has the required lifetime remaining.
+    assert cache.get_token("key", fetch, min_lifetime=60)[0] == b"token"
+    assert len(fetches) == 1
+    cache.get_token("key", fetch, min_lifetime=7200)
+    assert len(fetches) == 2
+
+
+def test_cbs_token_cache_jwt():
+    cache = authentication.TokenCache()
+    calls = []
+
+    def get_token():
+        calls.append(None)
+        return _AccessToken("jwt-{}".format(len(calls)), time.time() + 3600)
+
+    auths = [authentication.JWTTokenAuth(
+        "sb://localhost/queue", "sb://localhost/queue", get_token, token_cache=cache) for _ in range(3)]
+    for auth in auths:
+        auth.update_token()
+    assert len(calls) == 1
+    assert all(auth.token == b"jwt-1" for auth in auths)
+
+    sas = [authentication.SASTokenAuth.from_shared_access_key(
+        "sb://localhost/queue", "key_name", "shared_access_key", token_cache=cache) for _ in range(2)]
+    for auth in sas:
+        auth.update_token()
+    assert sas[0].token == sas[1].token
+    assert len(cache) == 2
+    # The shared access key itself is not part of the cache key.
+    assert not any("shared_access_key" in repr(key) for key in cache._tokens)
+
+
+def test_cbs_token_cache_async():
+    import asyncio
+    from uamqp.authentication import JWTTokenAsync
+
+    cache = authentication.TokenCache()
+    calls = []
+
+    async def get_token():
+        calls.append(None)
+        await asyncio.sleep(0.01)
+        return _AccessToken("jwt", time.time() + 3600)
+
+    async def run():
+        auths = [JWTTokenAsync("sb://localhost/queue", "sb://localhost/queue", get_token, token_cache=cache)
+                 for _ in range(3)]
+        await asyncio.gather(*[auth.update_token() for auth in auths])
+        assert len(calls) == 1
+        assert all(auth.token == b"jwt" for auth in auths)
+
+    loop = asyncio.new_event_loop()
+    try:
+        loop.run_until_complete(run())
+    finally:
+        loop.close()
+
+
+def test_cbs_token_cache_cancelled():
+    import asyncio
+    from uamqp.authentication.cbs_auth_async import get_cached_token_async
+
+    cache = authentication.TokenCache()
+    calls = []
+
+    async def fetch():
+        calls.append(None)
+        await asyncio.sleep(0.05)
+        return b"token", time.time() + 3600
+
+    async def run():
+        # A cancelled fetch releases the key, and a waiting caller fetches instead.
+        first = asyncio.ensure_future(get_cached_token_async(cache, "key", fetch))
+        await asyncio.sleep(0)
+        waiting = asyncio.ensure_future(get_cached_token_async(cache, "key", fetch))
+        await asyncio.sleep(0)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        token, _ = await asyncio.wait_for(waiting, 1)
+        assert token == b"token"
+        assert len(calls) == 2
+
+        # A later fetch for the same key does not hang, and a cancelled
+        # waiter does not cancel the fetch it was waiting on.
+        cache.clear()
+        fetching = asyncio.ensure_future(get_cached_token_async(cache, "key", fetch))
+        await asyncio.sleep(0)
+        waiting = asyncio.ensure_future(get_cached_token_async(cache, "key", fetch))
+        await asyncio.sleep(0)
+        waiting.cancel()
+        token, _ = await asyncio.wait_for(fetching, 1)
+        assert token == b"token"
+        assert len(calls) == 3
+
+    loop = asyncio.new_event_loop()
+    try:
+        loop.run_until_complete(run())
+    finally:
+        loop.close()
+
+    # An interrupted sync fetch also releases the key.
+    def interrupted():
+        raise KeyboardInterrupt()
+    with pytest.raises(KeyboardInterrupt):
+        cache.get_token("other", interrupted)
+    assert cache.get_token("other", lambda: (b"token", time.time() + 3600))[0] == b"token"
@@ -0,0 +1,332 @@
+#-------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for
+# license information.
+#--------------------------------------------------------------------------
+import asyncio
+import selectors
+import socket
+import time
+
+from uamqp import c_uamqp, authentication, connection
+
+
+class _WorkCounter(object):
+
+    def __init__(self, conn, iterations):
+        self._conn = conn
+        self._iterations = iterations
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def do_work(self):
+        self._iterations.append(None)
+        self._conn.do_work()
+
+
+def _open_local_connection(server, **kwargs):
+    port = server.getsockname()[1]
+    auth = authentication.SASLAnonymous("127.0.0.1", port=port)
+    conn = connection.Connection("127.0.0.1", auth, **kwargs)
+    conn._conn.open()
+    for _ in range(50):
+        conn._conn.do_work()
+        if conn._conn.get_socket_fd() is not None:
+            break
+        time.sleep(0.01)
+    peer, _ = server.accept()
+    return conn, peer
+
+
+def test_connection_wait():
+    server = socket.socket()
+    server.bind(("127.0.0.1", 0))
+    server.listen(1)
+    conn, peer = _open_local_connection(server, idle_timeout=5000)
+    try:
+        socket_fd = conn._conn.get_socket_fd()
+        assert socket_fd is not None
+        assert 0 < conn._conn.handle_deadlines() <= 5000
+        assert not connection._wait_readable(socket_fd, 0.01)
+        peer.sendall(b"\x00")
+        assert connection._wait_readable(socket_fd, 1.0)
+
+        # The socket is only used once the connection is open.
+        assert conn._state != c_uamqp.ConnectionState.OPENED
+        assert not conn.wait(0.01)
+        conn._state = c_uamqp.ConnectionState.OPENED
+        assert conn.wait(1.0)
+    finally:
+        conn.destroy()
+        peer.close()
+        server.close()
+
+
+class _PendingWrite(object):
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def has_pending_io(self):
+        return True
+
+
+def test_connection_wait_poll():
+    server = socket.socket()
+    server.bind(("127.0.0.1", 0))
+    server.listen(1)
+    conn, peer = _open_local_connection(server)
+    try:
+        # Without a socket, the wait is capped at the polling interval.
+        start = time.time()
+        assert not conn.wait(1.0)
+        assert time.time() - start < 0.5
+
+        conn._state = c_uamqp.ConnectionState.OPENED
+        assert not conn.wait(0.01)
+        conn._conn = _PendingWrite(conn._conn)
+        assert conn.wants_write()
+        start = time.time()
+        assert conn.wait(1.0)
+        assert time.time() - start < 0.5
+    finally:
+        conn._conn = getattr(conn._conn, "_conn", conn._conn)
+        conn.destroy()
+        peer.close()
+        server.close()
+
+
+def test_connection_readiness():
+    server = socket.socket()
+    server.bind(("127.0.0.1", 0))
+    server.listen(1)
+    conn, peer = _open_local_connection(server)
+    selector = selectors.DefaultSelector()
+    try:
+        assert conn.fileno() == conn._conn.get_socket_fd()
+        assert conn.wants_read()
+        assert not conn.wants_write()
+        assert conn.get_next_timeout() is None
+
+        selector.register(conn, selectors.EVENT_READ)
+        assert not selector.select(0.01)
+        conn.work_until_idle()
+        peer.sendall(b"\x00")
+        assert [key.fileobj for key, _ in selector.select(1.0)] == [conn]
+        selector.unregister(conn)
+    finally:
+        selector.close()
+        conn.destroy()
+        peer.close()
+        server.close()
+    assert not conn.wants_read()
+
+
+def test_connection_async_event_driven():
+    from uamqp.async_ops.connection_async import ConnectionAsync
+
+    async def run():
+        server = socket.socket()
+        server.bind(("127.0.0.1", 0))
+        server.listen(1)
+        auth = authentication.SASLAnonymous("127.0.0.1", port=server.getsockname()[1])
+        conn = ConnectionAsync("127.0.0.1", auth, event_driven=True)
+        conn._conn.open()
+        while conn._conn.get_socket_fd() is None:
+            await conn.work_async()
+        peer, _ = server.accept()
+        try:
+            conn._state = c_uamqp.ConnectionState.OPENED
+            await conn.work_async()
+            assert conn._transport is not None
+            assert not await conn.wait_async(0.01)
+
+            # Iterations are now run by the event loop when the socket is ready.
+            iterations = []
+            conn._conn = _WorkCounter(conn._conn, iterations)
+            await conn.work_async()
+            assert not iterations
+            peer.sendall(b"\x00")
+            assert await conn.wait_async(1.0)
+            assert iterations
+
+            # Work is deferred while a coroutine holds the Connection lock.
+            del iterations[:]
+            await conn.lock_async()
+            peer.sendall(b"\x00")
+            await asyncio.sleep(0.05)
+            assert not iterations
+            assert conn._transport_deferred is not None
+            conn.release_async()
+            assert await conn.wait_async(1.0)
+            assert iterations
+            assert conn._transport_deferred is None
+        finally:
+            conn._conn = getattr(conn._conn, "_conn", conn._conn)
+            await conn.destroy_async()
+            peer.close()
+            server.close()
+        assert conn._transport is None
+
+    loop = asyncio.new_event_loop()
+    try:
+        loop.run_until_complete(run())
+    finally:
+        loop.close()
+
+
+class _PingCounter(object):
+
+    def __init__(self, name):
+        self.container_id = name
+        self.pings = 0
+        self.locked = False
+
+    def work(self):
+        self.pings += 1
+
+    def _try_keep_alive(self, heartbeat):
+        if self.locked:
+            return False, None
+        if heartbeat:
+            return True, self.heartbeat()
+        self.work()
+        return True, None
+
+    async def work_async(self):
+        self.pings += 1
+
+
+def test_keep_alive_scheduler():
+    scheduler = connection.KeepAliveScheduler()
+    shared, other = _PingCounter("shared"), _PingCounter("other")
+    scheduler.register(shared, 0.05)
+    scheduler.register(shared, 0.05)
+    scheduler.register(other, 10)
+    time.sleep(0.13)
+
+    # A connection shared by two clients is only pinged once per interval.
+    assert 1 <= shared.pings <= 3
+    assert other.pings == 0
+    scheduler.unregister(shared, 0.05)
+    scheduler.unregister(shared, 0.05)
+    pings = shared.pings
+    time.sleep(0.1)
+    assert shared.pings == pings
+    thread = scheduler._thread
+    scheduler.unregister(other, 10)
+    thread.join(1.0)
+    assert scheduler._thread is None
+
+
+def test_keep_alive_scheduler_locked():
+    scheduler = connection.KeepAliveScheduler()
+    busy, other = _PingCounter("busy"), _PingCounter("other")
+    busy.locked = True
+    scheduler.register(busy, 0.02)
+    scheduler.register(other, 0.02)
+    time.sleep(0.15)
+
+    # A connection locked by a client does not hold up the others.
+    assert busy.pings == 0
+    assert other.pings >= 3
+    busy.locked = False
+    time.sleep(0.15)
+    assert busy.pings >= 1
+    scheduler.unregister(busy, 0.02)
+    scheduler.unregister(other, 0.02)
+
+    server = socket.socket()
+    server.bind(("127.0.0.1", 0))
+    auth = authentication.SASLAnonymous("127.0.0.1", port=server.getsockname()[1])
+    conn = connection.Connection("127.0.0.1", auth)
+    try:
+        conn.lock()
+        start = time.time()
+        assert conn._try_keep_alive(False) == (False, None)
+        assert time.time() - start < 1.0
+    finally:
+        conn.release()
+        conn.destroy()
+        server.close()
+
+
+def test_keep_alive_scheduler_async():
+    from uamqp.async_ops.connection_async import KeepAliveSchedulerAsync
+
+    async def run():
+        scheduler = KeepAliveSchedulerAsync()
+        shared = _PingCounter("shared")
+        scheduler.register(shared, 0.05)
+        scheduler.register(shared, 0.05)
+        await asyncio.sleep(0.13)
+        assert 1 <= shared.pings <= 3
+        await scheduler.unregister_async(shared, 0.05)
+        await scheduler.unregister_async(shared, 0.05)
+        pings = shared.pings
+        await asyncio.sleep(0.1)
+        assert shared.pings == pings
+
+    loop = asyncio.new_event_loop()
+    try:
+        loop.run_until_complete(run())
+    finally:
+        loop.close()
+
+
+class _HeartbeatCounter(_PingCounter):
+
+    def __init__(self, name, due):
+        super(_HeartbeatCounter, self).__init__(name)
+        self._state = c_uamqp.ConnectionState.OPENED
+        self.due = due
+        self.heartbeats = 0
+
+    def heartbeat(self):
+        self.heartbeats += 1
+        return self.due
+
+
+def test_connection_heartbeat():
+    server = socket.socket()
+    server.bind(("127.0.0.1", 0))
+    server.listen(1)
+    conn, peer = _open_local_connection(server, idle_timeout=5000)
+    try:
+        assert 0 < conn.heartbeat() <= 5.0
+        conn._state = c_uamqp.ConnectionState.OPENED
+        assert 0 < conn.heartbeat() <= 5.0
+    finally:
+        conn.destroy()
+        peer.close()
+        server.close()
+
+
+def test_keep_alive_scheduler_heartbeat():
+    scheduler = connection.KeepAliveScheduler()
+    conn = _HeartbeatCounter("heartbeat", 0.05)
+    scheduler.register(conn, None)
+    scheduler.register(conn, 10)
+
+    # Heartbeats are timed by the connection rather than the interval.
+    entry = scheduler._entries[id(conn)]
+    assert entry.heartbeat and entry.interval == 10
+    assert entry.get_delay(0.05) == 0.05
+    assert entry.get_delay(None) == 10
+    time.sleep(0.2)
+    assert conn.heartbeats >= 2
+    assert conn.pings == 0
+
+    # Without an idle timeout on an open connection, no heartbeat is needed.
+    conn.due = None
+    time.sleep(0.1)
+    heartbeats = conn.heartbeats
+    time.sleep(0.1)
+    assert conn.heartbeats == heartbeats
+    scheduler.unregister(conn, 10)
+    assert entry.get_delay(None) is None
+    scheduler.unregister(conn, None)
@@ -4,6 +4,7 @@
 # license information.
 #--------------------------------------------------------------------------
 import copy
+import mmap
 import pickle
 import pytest
 
@@ -17,7 +18,8 @@ from uamqp.message import (
     SequenceBody,
     DataBody,
     ValueBody,
-    BatchMessage
+    BatchMessage,
+    EncodedMessage
 )
 from uamqp import MessageBodyType
 
@@ -355,3 +357,235 @@ def test_message_body_sequence_type():
 
     with pytest.raises(TypeError):
         Message(body=True, body_type=MessageBodyType.Sequence)
+
+
+def _encode_with_clone(message):
+    cloned_data = message._message.clone()
+    message._populate_message_attributes(cloned_data)
+    encoded_data = []
+    c_uamqp.get_encoded_message_size(cloned_data, encoded_data)
+    return b"".join(encoded_data)
+
+
+def test_message_encode():
+    properties = MessageProperties(message_id='1', subject='test', group_sequence=3)
+    header = MessageHeader()
+    header.delivery_count = 2
+    header.time_to_live = 100
+    header.durable = True
+    messages = [
+        Message(body=b'a' * 10),
+        Message(body=[b'b' * 300, 'c', b'']),
+        Message(body={b'key': [1, 2, 3]}),
+        Message(body=[[1, 2], [b'abc']], body_type=MessageBodyType.Sequence),
+        Message(
+            body=b'd' * 1000,
+            properties=properties,
+            header=header,
+            application_properties={'prop': 1},
+            annotations={b'x-opt-annotation': 'value'},
+            delivery_annotations={b'x-opt-delivery': 2},
+            footer={b'footer': 3}
+        ),
+    ]
+    for message in messages:
+        assert message.encode_message() == _encode_with_clone(message)
+
+
+def test_batch_message_gather():
+    messages = [Message(body=b'a' * size) for size in (10, 300, 1000)]
+    expected = [_encode_with_clone(m) for m in messages]
+    expected.append(_encode_with_clone(Message(body=b'raw')))
+    batch = BatchMessage(data=iter(messages + [b'raw']), properties=MessageProperties(message_id='batch'))
+    gathered = batch.gather()
+    assert len(gathered) == 1
+    assert gathered[0].get_message().message_format == BatchMessage.batch_format
+    assert list(gathered[0].get_data()) == expected
+
+    batch = BatchMessage(data=iter(messages))
+    batch.max_message_length = 1000
+    with pytest.raises(errors.MessageContentTooLarge):
+        batch.gather()
+
+    batch = BatchMessage(data=(b'a' * 200 for _ in range(20)), multi_messages=True)
+    batch.max_message_length = 1000
+    gathered = list(batch.gather())
+    sections = [list(m.get_data()) for m in gathered]
+    assert len(gathered) > 1
+    assert sum(len(s) for s in sections) == 20
+    assert all(d == _encode_with_clone(Message(body=b'a' * 200)) for s in sections for d in s)
+
+
+def test_batch_message_remaining_capacity():
+    batch = BatchMessage(data=[], properties=MessageProperties(message_id='batch'))
+    batch.max_message_length = 2000
+    envelope_size = batch._create_batch_message().get_message_encoded_size()
+    assert batch.remaining_capacity() == 2000 - envelope_size
+
+    for size in (10, 255, 256, 600):
+        batch.append(Message(body=b'a' * size))
+    capacity = batch.remaining_capacity()
+    with pytest.raises(errors.MessageContentTooLarge):
+        batch.append(b'a' * capacity)
+    assert batch.remaining_capacity() == capacity
+
+    gathered = batch.gather()
+    assert len(list(gathered[0].get_data())) == 4
+    assert gathered[0].get_message_encoded_size() == 2000 - capacity
+
+    batch = BatchMessage(data=(b'a' * 200 for _ in range(20)), multi_messages=True)
+    batch.max_message_length = 1000
+    for message in batch.gather():
+        assert message.get_message_encoded_size() <= 1000
+
+
+def test_message_body_data_buffer():
+    payload = bytearray(b'0123456789' * 100)
+    view = memoryview(payload)
+    message = Message(body=view[10:20])
+    assert isinstance(message._body, DataBody)
+    assert list(message.get_data()) == [b'0123456789']
+
+    message = Message(body=[payload, view[:5], b'abc', 'def'])
+    assert list(message.get_data()) == [bytes(payload), b'01234', b'abc', b'def']
+
+    message = Message(body=bytearray(b'data'), body_type=MessageBodyType.Data)
+    assert list(message.get_data()) == [b'data']
+    message._body.append(memoryview(b'\x00\x01\x02\x03').cast('B', shape=[2, 2]))
+    assert list(message.get_data()) == [b'data', b'\x00\x01\x02\x03']
+
+    message = Message(body=memoryview(b'0123456789')[::2])
+    assert list(message.get_data()) == [b'02468']
+    message._body.append(memoryview(bytearray(b'\x00\x01\x02\x03')).cast('H')[::-1])
+    assert list(message.get_data()) == [b'02468', b'\x02\x03\x00\x01']
+
+    buffer = mmap.mmap(-1, 1000)
+    buffer.write(b'x' * 1000)
+    message = Message(body=memoryview(buffer)[100:300])
+    assert list(message.get_data()) == [b'x' * 200]
+    del message
+    buffer.close()
+
+    with pytest.raises(TypeError):
+        Message(body=[b'abc', True], body_type=MessageBodyType.Data)
+
+
+def test_message_data_views():
+    encoded = Message(body=[b'abc', b'', b'd' * 1000]).encode_message()
+    received = Message(message=c_uamqp.decode_message(len(encoded), encoded))
+    views = list(received.get_data_views())
+    assert [v.tobytes() for v in views] == [b'abc', b'', b'd' * 1000]
+    assert all(v.readonly for v in views)
+    with pytest.raises(TypeError):
+        views[0][0] = 1
+
+    c_message = received._message
+    with pytest.raises(BufferError):
+        c_message.destroy()
+    del received, c_message
+    assert bytes(views[2]) == b'd' * 1000
+    for view in views:
+        view.release()
+
+    with pytest.raises(TypeError):
+        Message(body={b'key': b'value'}).get_data_views()
+
+
+def test_message_freeze():
+    message = Message(
+        body=b'data',
+        properties=MessageProperties(message_id='id'),
+        application_properties={'key': 'value'},
+        msg_format=10,
+    )
+    encoded = message.freeze()
+    assert isinstance(encoded, EncodedMessage)
+    assert encoded.encode_message() == message.encode_message()
+    assert encoded.get_message_encoded_size() == message.get_message_encoded_size()
+    assert encoded.get_message().get_encoded_payload() == message.encode_message()
+    assert encoded.get_message().message_format == 10
+    assert encoded.properties.message_id == b'id'
+    assert encoded.application_properties == {b'key': b'value'}
+    assert list(encoded.get_data()) == [b'data']
+    assert encoded.freeze() is encoded
+    with pytest.raises(TypeError):
+        encoded.application_properties = {}
+
+    # Each send shares the encoded C message, with its own send state.
+    first, = encoded.gather()
+    second, = encoded.gather()
+    assert first is not second
+    assert first.get_message() is second.get_message() is encoded.get_message()
+    first.state = constants.MessageState.SendComplete
+    assert second.state == constants.MessageState.WaitingToBeSent
+
+    unpickled = pickle.loads(pickle.dumps(encoded))
+    assert unpickled.encode_message() == encoded.encode_message()
+    assert unpickled.get_message().get_encoded_payload() == encoded.encode_message()
+    assert unpickled.get_message().message_format == 10
+
+    batch = BatchMessage(data=[b'a', b'b'])
+    assert batch.freeze().get_message().message_format == BatchMessage.batch_format
+    with pytest.raises(TypeError):
+        BatchMessage(data=[b'a'], multi_messages=True).freeze()
+
+    # An encoded message is added to a batch without the batch application properties.
+    frozen = Message(body=b'y').freeze()
+    batch = BatchMessage(data=[frozen, b'z'], application_properties={'a': 'b'})
+    sections = list(batch.gather()[0].get_data())
+    assert sections[0] == frozen.encode_message()
+    assert Message.decode_from_bytes(sections[1]).application_properties == {b'a': b'b'}
+
+
+def test_message_section_cache():
+    header = MessageHeader()
+    header.durable = True
+    message = Message(
+        body=b'data',
+        properties=MessageProperties(message_id='id'),
+        header=header,
+        application_properties={'key': 'value'},
+        annotations={b'x-opt-key': 'value'},
+    )
+    sections = message._get_message_sections()
+    cached = message._get_message_sections()
+    assert all(cached[name] is sections[name] for name in sections)
+    encoded = message.encode_message()
+    assert message.encode_message() == encoded
+
+    # Sections are converted again once they have been changed.
+    message.properties.message_id = 'other'
+    header.priority = 4
+    message.application_properties['key'] = 'other'
+    message.annotations = {b'x-opt-key': 'other'}
+    cached = message._get_message_sections()
+    assert all(cached[name] is not sections[name] for name in sections)
+    decoded = Message.decode_from_bytes(message.encode_message())
+    assert decoded.properties.message_id == b'other'
+    assert decoded.header.priority == 4
+    assert decoded.application_properties == {b'key': b'other'}
+    assert decoded.annotations == {b'x-opt-key': b'other'}
+
+    # Changes to nested values are also detected.
+    message.application_properties['key'] = ['a']
+    message.encode_message()
+    message.application_properties['key'].append('b')
+    decoded = Message.decode_from_bytes(message.encode_message())
+    assert decoded.application_properties == {b'key': [b'a', b'b']}
+
+    # Values that compare equal but have a different AMQP type are re-encoded.
+    message.application_properties['key'] = {'nested': [1]}
+    sections = message._get_message_sections()
+    assert message._get_message_sections()['application_properties'] is sections['application_properties']
+    message.application_properties['key']['nested'][0] = True
+    assert message._get_message_sections()['application_properties'] is not sections['application_properties']
+    decoded = Message.decode_from_bytes(message.encode_message())
+    assert decoded.application_properties[b'key'][b'nested'][0] is True
+
+    # A section with a value that cannot be tracked is converted on every send.
+    message.footer = {'key': bytearray(b'a')}
+    sections = message._get_message_sections()
+    assert message._get_message_sections()['footer'] is not sections['footer']
+
+    unpickled = pickle.loads(pickle.dumps(message))
+    assert unpickled.encode_message() == message.encode_message()
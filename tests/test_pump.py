@@ -0,0 +1,156 @@
+#-------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for
+# license information.
+#--------------------------------------------------------------------------
+import pytest
+
+from uamqp import pump as pump_module
+from uamqp import ConnectionPump, Message, ReceiveClient, SendClient, c_uamqp, constants, errors
+
+
+class _PumpConnection(object):
+
+    def __init__(self):
+        self.auth = None
+        self.works = 0
+        self.waits = []
+        self._state = None
+
+    def lock(self, timeout=3.0):
+        pass
+
+    def release(self):
+        pass
+
+    def work(self):
+        self.works += 1
+
+    def wait(self, timeout, wakeup=None):
+        self.waits.append(timeout)
+        return False
+
+
+class _Link(object):
+
+    def __init__(self):
+        self.works = 0
+        self.sent = []
+
+    def work(self):
+        self.works += 1
+
+    def send_many(self, messages, callback, timeout=0):
+        self.sent.extend(messages)
+        return [True] * len(messages)
+
+
+def _attach(pump, client):
+    client._connection = pump.connection
+    client._session = object()
+    client.message_handler = _Link()
+    client.client_ready = lambda: True
+    pump.attach(client)
+    return client
+
+
+def test_connection_pump():
+    pump = ConnectionPump(_PumpConnection())
+    sender = _attach(pump, SendClient("amqps://localhost/queue"))
+    receivers = [_attach(pump, ReceiveClient("amqps://localhost/queue")) for _ in range(3)]
+    assert pump.clients == [sender] + receivers
+
+    # One connection iteration runs the links of every client.
+    message = Message(body=b"data")
+    sender.queue_message(message)
+    assert pump.run_once()
+    assert pump.connection.works == 1
+    assert sender.message_handler.sent == [message]
+    assert all(c.message_handler.works == 1 for c in pump.clients)
+    assert pump.connection.waits == [constants.MAX_IDLE_WAIT_SECS]
+
+    # Working an attached client runs the pump.
+    assert receivers[0].do_work()
+    assert pump.connection.works == 2
+    assert all(c.message_handler.works == 2 for c in pump.clients)
+
+    # A client error detaches the client and is raised from the client.
+    def fail():
+        raise ValueError("link failed")
+    receivers[1].message_handler.work = fail
+    pump.run_once()
+    assert receivers[1] not in pump.clients
+    with pytest.raises(ValueError):
+        receivers[1].do_work()
+
+    receivers[2]._shutdown = True
+    pump.run_once()
+    assert pump.clients == [sender, receivers[0]]
+    assert not receivers[2].do_work()
+
+    pump.connection._state = c_uamqp.ConnectionState.DISCARDING
+    with pytest.raises(errors.ConnectionClose):
+        pump.run_once()
+    assert not pump.clients
+    with pytest.raises(errors.ConnectionClose):
+        sender.do_work()
+
+
+def test_connection_pump_thread_error():
+    pump = ConnectionPump(_PumpConnection(), max_wait=0.01)
+    sender = _attach(pump, SendClient("amqps://localhost/queue"))
+
+    def wait(timeout, wakeup=None):
+        raise RuntimeError("wait failed")
+    pump.connection.wait = wait
+
+    # An error that stops the background thread is raised from the attached clients.
+    pump.start()
+    with pytest.raises(RuntimeError):
+        for _ in range(100):
+            sender.do_work()
+    assert pump._thread is None
+    assert not pump.clients
+    with pytest.raises(RuntimeError):
+        pump.work()
+
+
+def test_connection_pump_opening_client():
+    pump = ConnectionPump(_PumpConnection())
+    sender = _attach(pump, SendClient("amqps://localhost/queue"))
+    sender.client_ready = lambda: False
+
+    # A client that is still opening limits the wait, rather than not waiting at all.
+    assert pump.run_once()
+    assert pump.connection.waits == [pump_module._OPENING_WAIT_SECS]
+    assert sender.message_handler.works == 0
+
+
+def test_connection_pump_error_cleared():
+    pump = ConnectionPump(_PumpConnection())
+    sender = _attach(pump, SendClient("amqps://localhost/queue"))
+
+    def fail():
+        raise ValueError("link failed")
+    sender.message_handler.work = fail
+    pump.run_once()
+    with pytest.raises(ValueError):
+        sender.do_work()
+
+    # The error is cleared once the client is detached again, or reopened.
+    pump.detach(sender)
+    assert sender._pump_error is None
+    sender._pump_error = ValueError("link failed")
+    sender._session = None
+    sender._build_session = lambda: None
+    sender.open(connection=pump.connection)
+    assert sender._pump_error is None
+
+
+def test_connection_pump_async_client():
+    from uamqp.async_ops.client_async import SendClientAsync
+
+    pump = ConnectionPump(_PumpConnection())
+    with pytest.raises(TypeError):
+        pump.attach(SendClientAsync("amqps://localhost/queue"))
+    assert not pump.clients
@@ -0,0 +1,141 @@
+#-------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for
+# license information.
+#--------------------------------------------------------------------------
+import functools
+
+from uamqp import c_uamqp, constants, errors
+from uamqp.client import ReceiveClient
+from uamqp.message import Message
+from uamqp.receiver import MessageReceiver
+
+
+class _RecordingReceiver(object):
+
+    def __init__(self):
+        self.ranges = []
+
+    def settle_accepted_range(self, first, last):
+        self.ranges.append(("accepted", first, last))
+
+    def settle_released_range(self, first, last):
+        self.ranges.append(("released", first, last))
+
+
+def _create_receiver():
+    receiver = MessageReceiver.__new__(MessageReceiver)
+    receiver._receiver = _RecordingReceiver()
+    return receiver
+
+
+def _create_received_message(receiver, message_number, settler=None):
+    encoded = Message(body=b"data").encode_message()
+    message = Message(
+        message=c_uamqp.decode_message(len(encoded), encoded),
+        settler=settler or functools.partial(receiver._settle_message, message_number),
+        delivery_no=message_number)
+    if settler is None:
+        message._receiver = receiver
+    return message
+
+
+def test_receiver_settle_messages():
+    receiver = _create_receiver()
+    receiver.settle_messages([5, 1, 2, 3, 7, 8, 3], errors.MessageAccepted())
+    assert receiver._receiver.ranges == [
+        ("accepted", 1, 3), ("accepted", 5, 5), ("accepted", 7, 8)]
+
+    receiver = _create_receiver()
+    receiver.settle_messages([0, 4294967294, 1, 4294967295, 7], errors.MessageAccepted())
+    assert receiver._receiver.ranges == [("accepted", 4294967294, 1), ("accepted", 7, 7)]
+
+    receiver = _create_receiver()
+    receiver.settle_messages([], errors.MessageAccepted())
+    receiver.settle_messages([1, 2], errors.MessageAlreadySettled())
+    assert receiver._receiver.ranges == []
+
+
+def test_client_settle_batch():
+    receiver = _create_receiver()
+    messages = [_create_received_message(receiver, n) for n in (10, 11, 12, 14)]
+    messages[1].release()
+    assert receiver._receiver.ranges == [("released", 11, 11)]
+
+    client = ReceiveClient.__new__(ReceiveClient)
+    client.settle_batch(messages, errors.MessageAccepted())
+    assert receiver._receiver.ranges[1:] == [("accepted", 10, 10), ("accepted", 12, 12), ("accepted", 14, 14)]
+    assert all(m.settled and m.state == constants.MessageState.ReceivedSettled for m in messages)
+    assert not messages[0].accept()
+
+
+def test_client_settle_batch_custom_settler():
+    receiver = _create_receiver()
+    settled = []
+    messages = [
+        _create_received_message(receiver, 1),
+        _create_received_message(receiver, 2, settler=settled.append)]
+    client = ReceiveClient.__new__(ReceiveClient)
+    client.settle_batch(messages, errors.MessageAccepted())
+    assert receiver._receiver.ranges == [("accepted", 1, 1)]
+    assert len(settled) == 1 and isinstance(settled[0], errors.MessageAccepted)
+    assert all(m.settled for m in messages)
+
+
+def test_client_async_receive_batch():
+    import asyncio
+    from uamqp.async_ops.client_async import ReceiveClientAsync
+
+    async def run():
+        client = ReceiveClientAsync("amqps://localhost/queue", prefetch=10)
+        deliveries = [[Message(body=b"a"), Message(body=b"b")], [Message(body=b"c")], []]
+
+        async def open_async():
+            pass
+
+        async def do_work_async():
+            for message in deliveries.pop(0):
+                client._message_received(message)
+            return True
+
+        client.open_async = open_async
+        client.do_work_async = do_work_async
+        client.auto_complete = False
+        batch = await client.receive_message_batch_async(max_batch_size=2)
+        assert [list(m.get_data()) for m in batch] == [[b"a"], [b"b"]]
+        batch = await client.receive_message_batch_async(max_batch_size=5)
+        assert [list(m.get_data()) for m in batch] == [[b"c"]]
+        assert client._received_messages.received == 3
+
+        buffered = client._received_messages
+        assert not await buffered.wait_async(1, 0.01)
+        asyncio.get_event_loop().call_soon(buffered.put, Message(body=b"d"))
+        assert await buffered.wait_async(1, 1.0)
+        assert len(buffered.take(5)) == 1
+
+    loop = asyncio.new_event_loop()
+    try:
+        loop.run_until_complete(run())
+    finally:
+        loop.close()
+
+
+def test_client_receive_batch():
+    client = ReceiveClient("amqps://localhost/queue", prefetch=10)
+    deliveries = [[Message(body=b"a"), Message(body=b"b"), Message(body=b"c")], []]
+
+    def do_work():
+        for message in deliveries.pop(0):
+            client._message_received(message)
+        return True
+
+    client.open = lambda: None
+    client.do_work = do_work
+    client.auto_complete = False
+    batch = client.receive_message_batch(max_batch_size=2)
+    assert [list(m.get_data()) for m in batch] == [[b"a"], [b"b"]]
+    assert client._received_messages.qsize() == 1
+    batch = client.receive_message_batch(max_batch_size=2)
+    assert [list(m.get_data()) for m in batch] == [[b"c"]]
+    assert client._received_messages.empty()
+    assert client._received_messages.received == 3
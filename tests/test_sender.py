@@ -0,0 +1,477 @@
+#-------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for
+# license information.
+#--------------------------------------------------------------------------
+import shutil
+import socket
+import ssl
+import struct
+import subprocess
+import threading
+import time
+
+import pytest
+
+from uamqp import address, authentication, compat, connection, constants, errors
+from uamqp.client import SendClient
+from uamqp.message import BatchMessage, Message
+from uamqp.sender import MessageSender
+from uamqp.session import Session
+
+class _RecordingSender(object):
+
+    def __init__(self):
+        self.sent = []
+        self.batches = 0
+
+    def send(self, message, callback, timeout=0):
+        self.sent.append((message, callback))
+        return True
+
+    def send_many(self, messages, callback, timeout=0):
+        self.batches += 1
+        return [self.send(m, callback, t) for m, t in zip(messages, timeout)]
+
+    def send_presettled(self, messages):
+        self.sent.extend((m, None) for m in messages)
+        return len(messages)
+
+
+def _uint(value):
+    return b"\x70" + struct.pack(">I", value)
+
+
+def _str(value):
+    value = value.encode("utf-8")
+    return b"\xb1" + struct.pack(">I", len(value)) + value
+
+
+def _list(*items):
+    body = b"".join(items)
+    return b"\xd0" + struct.pack(">II", len(body) + 4, len(items)) + body
+
+
+def _performative(code, *fields):
+    return b"\x00\x53" + bytes([code]) + _list(*fields)
+
+
+def _frame(body, frame_type=0):
+    return struct.pack(">IBBH", len(body) + 8, 2, frame_type, 0) + body
+
+
+def _recv_exactly(sock, size):
+    data = b""
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            raise EOFError()
+        data += chunk
+    return data
+
+
+def _recv_frame(sock):
+    while True:
+        size, doff = struct.unpack(">IB", _recv_exactly(sock, 5))
+        body = _recv_exactly(sock, size - 5)[doff * 4 - 5:]
+        if body:  # Empty frames are heartbeats.
+            return body
+
+
+def _get_link_name(attach):
+    # The name is the first field of the ATTACH list, which is either a list8 or a list32.
+    index = 6 if attach[3] == 0xc0 else 12
+    if attach[index] == 0xa1:
+        return attach[index:index + 2 + attach[index + 1]]
+    return attach[index:index + 5 + struct.unpack(">I", attach[index + 1:index + 5])[0]]
+
+
+def _create_peer_cert(directory):
+    """Generate a self-signed certificate and key for the local TLS peer,
+    skipping the test if they cannot be generated.
+    """
+    openssl = shutil.which("openssl")
+    if not openssl:
+        pytest.skip("openssl is required to generate a certificate for the local peer.")
+    cert, key = str(directory / "cert.pem"), str(directory / "key.pem")
+    try:
+        subprocess.run(
+            [openssl, "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+             "-subj", "/CN=127.0.0.1", "-addext", "subjectAltName=IP:127.0.0.1",
+             "-keyout", key, "-out", cert],
+            check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=60)
+    except (OSError, subprocess.SubprocessError) as e:
+        pytest.skip("Failed to generate a certificate for the local peer: {}".format(e))
+    return cert, key
+
+
+class _Peer(object):
+    """A minimal AMQP peer that accepts a single link from a sender,
+    grants it credit, and counts the transfers it receives.
+    """
+
+    def __init__(self, server, cert, key):
+        self._server = server
+        self._cert = cert
+        self._key = key
+        self.transfers = 0
+        self._thread = threading.Thread(target=self._run)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def _run(self):
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(self._cert, self._key)
+        sock, _ = self._server.accept()
+        try:
+            sock = context.wrap_socket(sock, server_side=True)
+            sock.sendall(_recv_exactly(sock, 8))
+            mechanisms = b"\xf0" + struct.pack(">IIBI", 18, 1, 0xb3, 9) + b"ANONYMOUS"
+            sock.sendall(_frame(_performative(0x40, mechanisms), frame_type=1))
+            _recv_frame(sock)
+            sock.sendall(_frame(_performative(0x44, b"\x50\x00"), frame_type=1))
+            sock.sendall(_recv_exactly(sock, 8))
+            _recv_frame(sock)
+            sock.sendall(_frame(_performative(0x10, _str("peer"))))
+            _recv_frame(sock)
+            sock.sendall(_frame(_performative(0x11, b"\x60\x00\x00", _uint(0), _uint(5000), _uint(5000))))
+            name = _get_link_name(_recv_frame(sock))
+            sock.sendall(_frame(_performative(
+                0x12, name, _uint(0), b"\x41", b"\x50\x01", b"\x50\x00",
+                _performative(0x28, _str("source")), _performative(0x29, _str("queue")))))
+            sock.sendall(_frame(_performative(
+                0x13, _uint(0), _uint(5000), _uint(0), _uint(5000), _uint(0), _uint(0), _uint(5000))))
+            while True:
+                if _recv_frame(sock)[2] == 0x14:
+                    self.transfers += 1
+        except (EOFError, OSError):
+            pass
+        finally:
+            sock.close()
+
+    def join(self):
+        self._thread.join(5)
+
+
+def _create_client():
+    client = SendClient("amqps://localhost/queue")
+    client.message_handler = _RecordingSender()
+    return client
+
+
+def test_send_client_scheduler():
+    client = _create_client()
+    messages = [Message(body=b"data") for _ in range(3)]
+    client.queue_message(*messages)
+    assert client.pending_messages == messages
+    assert client._scheduler.awaiting_ack == 0
+
+    client._send_pending()
+    assert [m for m, _ in client.message_handler.sent] == messages
+    assert client.message_handler.batches == 1
+    assert client._scheduler.awaiting_ack == 3
+    assert all(m.state == constants.MessageState.WaitingForSendAck for m in messages)
+
+    # A retryable failure puts the message back in the queue to be sent.
+    message, callback = client.message_handler.sent[1]
+    callback(message, constants.MessageSendResult.Error, None)
+    assert message.state == constants.MessageState.WaitingToBeSent
+    assert client._scheduler.awaiting_ack == 2
+    client._send_pending()
+    assert client.message_handler.sent[-1][0] is message
+
+    for message, callback in client.message_handler.sent[:1] + client.message_handler.sent[2:]:
+        callback(message, constants.MessageSendResult.Ok, None)
+    assert all(m.state == constants.MessageState.SendComplete for m in messages)
+    assert not client.messages_pending()
+    assert client.pending_messages == []
+
+
+def test_send_client_partial_batch():
+    client = _create_client()
+    messages = [Message(body=b"data") for _ in range(4)]
+    handler = client.message_handler
+
+    def send(message, callback, timeout=0):
+        if message is messages[1]:
+            raise ValueError("Invalid message.")
+        return _RecordingSender.send(handler, message, callback, timeout)
+
+    def send_many(messages, callback, timeout=0):
+        # Adding the second message fails, so only the first has a result.
+        handler.batches += 1
+        return [handler.send(messages[0], callback, timeout[0])]
+
+    handler.send = send
+    handler.send_many = send_many
+    client.queue_message(*messages)
+    client._send_pending()
+    sent = [m for m, _ in handler.sent]
+    assert sent == [messages[0], messages[2], messages[3]]
+    # The failed message is put back in the queue rather than being sent twice.
+    assert messages[1].state == constants.MessageState.WaitingToBeSent
+    assert client._scheduler.awaiting_ack == 3
+
+
+def test_send_client_window():
+    client = SendClient("amqps://localhost/queue", max_in_flight=2)
+    client.message_handler = _RecordingSender()
+    messages = [Message(body=b"data") for _ in range(3)]
+    first, second = client.queue_message(*messages[:2])
+    assert not first.done()
+    assert client._window_full(0)
+
+    # Queuing another message works the client until a message completes.
+    def do_work():
+        client._send_pending()
+        message, callback = client.message_handler.sent[0]
+        callback(message, constants.MessageSendResult.Ok, None)
+        return True
+
+    client.open = lambda: None
+    client.do_work = do_work
+    third, = client.queue_message(messages[2])
+    assert first.result() is None
+    assert not second.done()
+    assert client._scheduler.window_count == 2
+
+    client._send_pending()
+    message, callback = client.message_handler.sent[1]
+    client._error_policy.max_retries = 0
+    callback(message, constants.MessageSendResult.Error, None)
+    assert isinstance(second.exception(), errors.MessageException)
+
+    client._scheduler.cancel()
+    assert third.cancelled()
+    assert client._scheduler.window_bytes == 0
+
+
+def test_send_client_window_bytes():
+    message = Message(body=b"data")
+    size = message.get_message_encoded_size()
+    client = SendClient("amqps://localhost/queue", max_in_flight_bytes=size * 2)
+    client.message_handler = _RecordingSender()
+    client.queue_message(message, Message(body=b"data"))
+    assert client._scheduler.window_bytes == size * 2
+    assert client._window_full(1)
+    assert not client._window_full(0)
+
+
+def test_send_client_window_threads():
+    client = SendClient("amqps://localhost/queue", max_in_flight_bytes=10)
+    scheduler = client._scheduler
+
+    # Messages are admitted on one thread while their outcomes are released on another.
+    def admit():
+        for message in messages:
+            scheduler.admit(message, 3, message)
+
+    def release():
+        for message in messages:
+            while scheduler.release(message) is None:
+                time.sleep(0)
+
+    messages = [Message(body=b"data") for _ in range(5000)]
+    threads = [threading.Thread(target=admit), threading.Thread(target=release)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert scheduler.window_usage() == (0, 0)
+
+
+def test_send_client_close_futures():
+    client = _create_client()
+    futures = client.queue_message(Message(body=b"data"), Message(body=b"data"), futures=True)
+    client._send_pending()
+    client.message_handler = None
+    client.close()
+    assert all(f.cancelled() for f in futures)
+    assert client._scheduler.window_usage() == (0, 0)
+    assert len(client.pending_messages) == 2
+
+    # A producer waiting for room in the send window is released by the close.
+    client = SendClient("amqps://localhost/queue", max_in_flight=1)
+    client.message_handler = _RecordingSender()
+    first, = client.queue_message(Message(body=b"data"))
+    client.open = lambda: None
+    client.do_work = lambda: time.sleep(0.01) or not client._shutdown
+    queued = []
+    producer = threading.Thread(target=lambda: queued.extend(client.queue_message(Message(body=b"data"))))
+    producer.start()
+    time.sleep(0.05)
+    assert not queued
+    client.message_handler = None
+    client.close()
+    producer.join(5)
+    assert not producer.is_alive()
+    assert first.cancelled() and queued[0].cancelled()
+
+
+def test_send_client_async_close_futures():
+    import asyncio
+    from uamqp.async_ops.client_async import SendClientAsync
+
+    async def run():
+        client = SendClientAsync("amqps://localhost/queue")
+        client.message_handler = _RecordingSender()
+        future, = await client.queue_message_async(Message(body=b"data"), futures=True)
+        client.message_handler = None
+        await client.close_async()
+        assert future.cancelled()
+        assert client._scheduler.window_usage() == (0, 0)
+
+    loop = asyncio.new_event_loop()
+    try:
+        loop.run_until_complete(run())
+    finally:
+        loop.close()
+
+
+def test_send_client_futures():
+    client = _create_client()
+    assert client.queue_message(Message(body=b"data")) is None
+    futures = client.queue_message(Message(body=b"data"), Message(body=b"data"), futures=True)
+    assert len(futures) == 2
+    client._send_pending()
+    for message, callback in client.message_handler.sent:
+        callback(message, constants.MessageSendResult.Ok, None)
+    assert [f.result(timeout=0) for f in futures] == [None, None]
+    assert not client.messages_pending()
+    assert client._scheduler.window_count == 0
+
+
+def test_send_client_async_futures():
+    import asyncio
+    from uamqp.async_ops.client_async import SendClientAsync
+
+    async def run():
+        client = SendClientAsync("amqps://localhost/queue")
+        client.message_handler = _RecordingSender()
+        future, = await client.queue_message_async(Message(body=b"data"), futures=True)
+        assert isinstance(future, asyncio.Future)
+        client._send_pending()
+        message, callback = client.message_handler.sent[0]
+        callback(message, constants.MessageSendResult.Timeout, None)
+        with pytest.raises(compat.TimeoutException):
+            await future
+
+        # The sync queue_message cannot wait for room in the window.
+        client = SendClientAsync("amqps://localhost/queue", max_in_flight=1)
+        client.message_handler = _RecordingSender()
+        with pytest.raises(TypeError):
+            client.queue_message(Message(body=b"data"))
+        assert client._scheduler.window_count == 0
+
+    loop = asyncio.new_event_loop()
+    try:
+        loop.run_until_complete(run())
+    finally:
+        loop.close()
+
+
+def test_send_client_presettled():
+    client = _create_client()
+    with pytest.raises(ValueError):
+        client.send_presettled(b"data")
+
+    client = SendClient("amqps://localhost/queue", send_settle_mode=constants.SenderSettleMode.Settled)
+    client.message_handler = _RecordingSender()
+    client.open = lambda: None
+    client.client_ready = lambda: True
+    message = Message(body=b"data")
+    batch = BatchMessage(data=[b"a", b"b"])
+    assert client.send_presettled(message, batch, b"raw") == 3
+    sent = [m for m, _ in client.message_handler.sent]
+    assert sent[0] is message and sent[2] == b"raw"
+    assert sent[1].get_message().message_format == BatchMessage.batch_format
+    assert message.state == constants.MessageState.WaitingToBeSent
+    assert not client.messages_pending()
+
+
+def test_sender_presettled_pending(tmp_path):
+    cert, key = _create_peer_cert(tmp_path)
+    server = socket.socket()
+    server.bind(("127.0.0.1", 0))
+    server.listen(1)
+    peer = _Peer(server, cert, key)
+    auth = authentication.SASLAnonymous("127.0.0.1", port=server.getsockname()[1], verify=cert)
+    conn = connection.Connection("127.0.0.1", auth)
+    session = Session(conn)
+    sender = MessageSender(
+        session, "source", address.Target("amqps://127.0.0.1/queue"),
+        send_settle_mode=constants.SenderSettleMode.Settled)
+    try:
+        sender.open()
+        deadline = time.time() + 5
+        while sender.get_state() != constants.MessageSenderState.Open and time.time() < deadline:
+            conn.work()
+        assert sender.get_state() == constants.MessageSenderState.Open
+
+        # Presettled messages are no longer pending once they have been written.
+        for _ in range(10):
+            assert sender.send_presettled([b"data"] * 100) == 100
+            while sender._sender.pending_count and time.time() < deadline:
+                conn.work()
+            assert sender._sender.pending_count == 0
+        while peer.transfers < 1000 and time.time() < deadline:
+            time.sleep(0.01)
+        assert peer.transfers == 1000
+    finally:
+        sender.destroy()
+        session.destroy()
+        conn.destroy()
+        server.close()
+        peer.join()
+
+
+def test_send_client_message_timeout():
+    client = SendClient("amqps://localhost/queue", msg_timeout=5)
+    client.message_handler = _RecordingSender()
+    sent, waiting = Message(body=b"data"), Message(body=b"data")
+    client.queue_message(sent)
+    client._send_pending()
+    future, = client.queue_message(waiting, futures=True)
+    time.sleep(0.02)
+
+    # Only the message still waiting to be sent is expired by the client.
+    client._expire_messages()
+    assert waiting.state == constants.MessageState.SendFailed
+    assert isinstance(future.exception(timeout=0), compat.TimeoutException)
+    assert sent.state == constants.MessageState.WaitingForSendAck
+    assert not client._scheduler.pop_expired(client._counter.get_current_ms())
+    client._send_pending()
+    assert [m for m, _ in client.message_handler.sent] == [sent]
+
+
+class _IdleConnection(object):
+
+    def __init__(self):
+        self.waits = []
+        self._state = None
+
+    def work(self):
+        pass
+
+    def wait(self, timeout):
+        self.waits.append(timeout)
+        return False
+
+
+def test_send_client_backoff():
+    client = _create_client()
+    client.message_handler.work = lambda: None
+    client._connection = _IdleConnection()
+    client.queue_message(Message(body=b"data"))
+
+    # Sends are held back without blocking the connection.
+    client._backoff = 0.05
+    assert client._client_run()
+    assert 0 < client._connection.waits[0] <= 0.05
+    assert not client.message_handler.sent
+    assert client._get_backoff()
+
+    time.sleep(0.06)
+    assert client._client_run()
+    assert len(client.message_handler.sent) == 1
+    assert len(client._connection.waits) == 1
@@ -11,12 +11,13 @@ import sys
 
 from uamqp import c_uamqp  # pylint: disable=import-self
 
-from uamqp.message import Message, BatchMessage
+from uamqp.message import Message, BatchMessage, EncodedMessage
 from uamqp.address import Source, Target
 
 from uamqp.connection import Connection
 from uamqp.session import Session
 from uamqp.client import AMQPClient, SendClient, ReceiveClient
+from uamqp.pump import ConnectionPump
 from uamqp.sender import MessageSender
 from uamqp.receiver import MessageReceiver
 from uamqp.constants import TransportType, MessageBodyType
@@ -12,12 +12,13 @@ import collections.abc
 import logging
 import uuid
 
-from uamqp import address, authentication, client, constants, errors, compat, c_uamqp
-from uamqp.async_ops.connection_async import ConnectionAsync
+from uamqp import address, authentication, client, constants, errors, c_uamqp
+from uamqp.async_ops.connection_async import KEEP_ALIVE_SCHEDULER_ASYNC, ConnectionAsync
 from uamqp.async_ops.receiver_async import MessageReceiverAsync
 from uamqp.async_ops.sender_async import MessageSenderAsync
 from uamqp.async_ops.session_async import SessionAsync
 from uamqp.async_ops.utils import get_dict_with_loop_if_needed
+from uamqp.utils import get_running_loop
 
 try:
     TimeoutException = TimeoutError
@@ -50,11 +51,17 @@ class AMQPClientAsync(client.AMQPClient):
     :param error_policy: A policy for parsing errors on link, connection and message
      disposition to determine whether the error should be retryable.
     :type error_policy: ~uamqp.errors.ErrorPolicy
-    :param keep_alive_interval: If set, a thread will be started to keep the connection
-     alive during periods of user inactivity. The value will determine how long the
-     thread will sleep (in seconds) between pinging the connection. If 0 or None, no
-     thread will be started.
+    :param keep_alive_interval: If set, the connection will be kept alive during periods
+     of user inactivity by a keep-alive scheduler shared by all clients. The value will
+     determine how long to wait (in seconds) between pinging the connection. If 0 or None,
+     the connection will not be kept alive.
     :type keep_alive_interval: int
+    :param heartbeat: If set, the connection is kept alive by sending an empty frame only
+     when one is needed to satisfy the remote idle timeout and the
+     `remote_idle_timeout_empty_frame_send_ratio`, timed from when the last frame was
+     sent and received, instead of being pinged every `keep_alive_interval`.
+     Default is `False`.
+    :type heartbeat: bool
     :param max_frame_size: Maximum AMQP frame size. Default is 63488 bytes.
     :type max_frame_size: int
     :param channel_max: Maximum number of Session channels in the Connection.
@@ -91,6 +98,10 @@ class AMQPClientAsync(client.AMQPClient):
     :param encoding: The encoding to use for parameters supplied as strings.
      Default is 'UTF-8'
     :type encoding: str
+    :param event_driven: Whether the Connection socket should be registered with the event
+     loop once open, so that the Connection is only worked when the socket is ready or a
+     deadline is due, instead of on every iteration. Default is `False`.
+    :type event_driven: bool
     """
 
     def __init__(
@@ -105,6 +116,7 @@ class AMQPClientAsync(client.AMQPClient):
             **kwargs):
 
         self._internal_kwargs = get_dict_with_loop_if_needed(loop)
+        self._event_driven = kwargs.pop('event_driven', False)
 
         super(AMQPClientAsync, self).__init__(
             remote_address,
@@ -128,22 +140,6 @@ class AMQPClientAsync(client.AMQPClient):
         """Close and destroy Client on exiting an async context manager."""
         await self.close_async()
 
-    async def _keep_alive_async(self):
-        start_time = self._counter.get_current_ms()
-        try:
-            while self._connection and not self._shutdown:
-                current_time = self._counter.get_current_ms()
-                elapsed_time = (current_time - start_time)/1000
-                if elapsed_time >= self._keep_alive_interval:
-                    _logger.info("Keeping %r connection alive. %r",
-                                 self.__class__.__name__,
-                                 self._connection.container_id)
-                    await asyncio.shield(self._connection.work_async(), **self._internal_kwargs)
-                    start_time = current_time
-                await asyncio.sleep(1, **self._internal_kwargs)
-        except Exception as e:  # pylint: disable=broad-except
-            _logger.info("Connection keep-alive for %r failed: %r.", self.__class__.__name__, e)
-
     async def _client_ready_async(self):  # pylint: disable=no-self-use
         """Determine whether the client is ready to start sending and/or
         receiving messages. To be ready, the connection must be open and
@@ -238,10 +234,12 @@ class AMQPClientAsync(client.AMQPClient):
                 remote_idle_timeout_empty_frame_send_ratio=self._remote_idle_timeout_empty_frame_send_ratio,
                 error_policy=self._error_policy,
                 debug=self._debug_trace,
+                event_driven=self._event_driven,
                 **self._internal_kwargs)
             await self._build_session_async()
-            if self._keep_alive_interval:
-                self._keep_alive_thread = asyncio.ensure_future(self._keep_alive_async(), **self._internal_kwargs)
+            if self._heartbeat or self._keep_alive_interval:
+                KEEP_ALIVE_SCHEDULER_ASYNC.register(self._connection, self._get_keep_alive_interval())
+                self._keep_alive_registered = True
         finally:
             if self._ext_connection:
                 connection.release_async()
@@ -256,9 +254,9 @@ class AMQPClientAsync(client.AMQPClient):
             await self.message_handler.destroy_async()
             self.message_handler = None
         self._shutdown = True
-        if self._keep_alive_thread:
-            await self._keep_alive_thread
-            self._keep_alive_thread = None
+        if self._keep_alive_registered:
+            await KEEP_ALIVE_SCHEDULER_ASYNC.unregister_async(self._connection, self._get_keep_alive_interval())
+            self._keep_alive_registered = False
         if not self._session:
             return  # already closed.
         if not self._connection._cbs:  # pylint: disable=protected-access
@@ -403,11 +401,17 @@ class SendClientAsync(client.SendClient, AMQPClientAsync):
     :param error_policy: A policy for parsing errors on link, connection and message
      disposition to determine whether the error should be retryable.
     :type error_policy: ~uamqp.errors.ErrorPolicy
-    :param keep_alive_interval: If set, a thread will be started to keep the connection
-     alive during periods of user inactivity. The value will determine how long the
-     thread will sleep (in seconds) between pinging the connection. If 0 or None, no
-     thread will be started.
+    :param keep_alive_interval: If set, the connection will be kept alive during periods
+     of user inactivity by a keep-alive scheduler shared by all clients. The value will
+     determine how long to wait (in seconds) between pinging the connection. If 0 or None,
+     the connection will not be kept alive.
     :type keep_alive_interval: int
+    :param heartbeat: If set, the connection is kept alive by sending an empty frame only
+     when one is needed to satisfy the remote idle timeout and the
+     `remote_idle_timeout_empty_frame_send_ratio`, timed from when the last frame was
+     sent and received, instead of being pinged every `keep_alive_interval`.
+     Default is `False`.
+    :type heartbeat: bool
     :param send_settle_mode: The mode by which to settle message send
      operations. If set to `Unsettled`, the client will wait for a confirmation
      from the service that the message was successfully sent. If set to 'Settled',
@@ -456,6 +460,19 @@ class SendClientAsync(client.SendClient, AMQPClientAsync):
     :param encoding: The encoding to use for parameters supplied as strings.
      Default is 'UTF-8'
     :type encoding: str
+    :param event_driven: Whether the Connection socket should be registered with the event
+     loop once open, so that the Connection is only worked when the socket is ready or a
+     deadline is due, instead of on every iteration. Default is `False`.
+    :type event_driven: bool
+    :param max_in_flight: The maximum number of queued messages that can be waiting to be
+     sent or acknowledged. If set, `queue_message_async` will work the client until there is
+     room for each message, and returns a future for each message. Messages must then be queued
+     with `queue_message_async` rather than `queue_message`. Default is None (no limit).
+    :type max_in_flight: int
+    :param max_in_flight_bytes: The maximum total encoded size of the queued messages that can
+     be waiting to be sent or acknowledged. A single message larger than this is sent on its own.
+     If set, `queue_message_async` behaves as for `max_in_flight`. Default is None (no limit).
+    :type max_in_flight_bytes: int
     """
 
     def __init__(
@@ -520,6 +537,28 @@ class SendClientAsync(client.SendClient, AMQPClientAsync):
             return False
         return True
 
+    def _create_future(self):
+        loop = self._internal_kwargs.get('loop') or get_running_loop()
+        return loop.create_future()
+
+    def _wait_for_window(self, size):
+        # The event loop cannot be blocked while waiting for room in the send
+        # window, so this is only done by queue_message_async.
+        if not self._windowed:
+            return
+        raise TypeError("The send window of an async client can only be used with queue_message_async.")
+
+    async def _wait_for_window_async(self, size):
+        """Work the client until there is room in the send window for a message
+        of the given size, or the client is shut down.
+        """
+        if not self._window_full(size):
+            return
+        await self.open_async()
+        running = True
+        while running and self._window_full(size):
+            running = await self.do_work_async()
+
     async def _transfer_message_async(self, message, timeout):
         sent = await asyncio.shield(
             self.message_handler.send_async(message, self._on_message_sent, timeout=timeout),
@@ -529,29 +568,28 @@ class SendClientAsync(client.SendClient, AMQPClientAsync):
             _logger.info("Message not sent, raising RuntimeError.")
             raise RuntimeError("Message sender failed to add message data to outgoing queue.")
 
-    async def _filter_pending_async(self):
-        filtered = []
-        for message in self._pending_messages:
-            if message.state in constants.DONE_STATES:
-                continue
-            elif message.state == constants.MessageState.WaitingForSendAck:
-                self._waiting_messages += 1
-            elif message.state == constants.MessageState.WaitingToBeSent:
-                message.state = constants.MessageState.WaitingForSendAck
-                try:
-                    timeout = self._get_msg_timeout(message)
-                    if timeout is None:
-                        self._on_message_sent(message, constants.MessageSendResult.Timeout)
-                        if message.state != constants.MessageState.WaitingToBeSent:
-                            continue
-                    else:
-                        await self._transfer_message_async(message, timeout)
-                except Exception as exp:  # pylint: disable=broad-except
-                    self._on_message_sent(message, constants.MessageSendResult.Error, delivery_state=exp)
-                    if message.state != constants.MessageState.WaitingToBeSent:
-                        continue
-            filtered.append(message)
-        return filtered
+    async def _transfer_messages_async(self, messages, timeouts):
+        try:
+            results = await asyncio.shield(
+                self.message_handler.send_many_async(messages, self._on_message_sent, timeout=timeouts),
+                **self._internal_kwargs
+                )
+        except Exception:  # pylint: disable=broad-except
+            # None of the messages were added to the queue.
+            results = []
+        self._process_transfer_results(messages, results)
+        # Send the messages that were not added individually, so that the error
+        # is only reported for the message it applies to.
+        for message, timeout in zip(messages[len(results):], timeouts[len(results):]):
+            try:
+                await self._transfer_message_async(message, timeout)
+            except Exception as exp:  # pylint: disable=broad-except
+                self._on_message_sent(message, constants.MessageSendResult.Error, delivery_state=exp)
+
+    async def _send_pending_async(self):
+        messages, timeouts = self._take_pending()
+        if messages:
+            await self._transfer_messages_async(messages, timeouts)
 
     async def _client_run_async(self):
         """MessageSender Link is now open - perform message send
@@ -566,13 +604,12 @@ class SendClientAsync(client.SendClient, AMQPClientAsync):
         await asyncio.shield(self._connection.work_async(), **self._internal_kwargs)
         if self._connection._state == c_uamqp.ConnectionState.DISCARDING:
             raise errors.ConnectionClose(constants.ErrorCodes.InternalServerError)
-        self._waiting_messages = 0
-        async with self._pending_messages_lock:
-            self._pending_messages = await self._filter_pending_async()
-        if self._backoff and not self._waiting_messages:
-            _logger.info("Client told to backoff - sleeping for %r seconds", self._backoff)
-            await self._connection.sleep_async(self._backoff)
-            self._backoff = 0
+        backoff = self._get_backoff()
+        if backoff:
+            await self._connection.wait_async(backoff)
+        else:
+            async with self._pending_messages_lock:
+                await self._send_pending_async()
         return True
 
     async def redirect_async(self, redirect, auth):
@@ -592,7 +629,8 @@ class SendClientAsync(client.SendClient, AMQPClientAsync):
             await self.message_handler.destroy_async()
             self.message_handler = None
         async with self._pending_messages_lock:
-            self._pending_messages = []
+            self._scheduler.cancel()
+            self._scheduler = client._SendScheduler()  # pylint: disable=protected-access
 
         self._remote_address = address.Target(redirect.address)
         await self._redirect_async(redirect, auth)
@@ -602,9 +640,52 @@ class SendClientAsync(client.SendClient, AMQPClientAsync):
         messages can be sent and the client cannot be re-opened.
 
         All pending, unsent messages will remain uncleared to allow
-        them to be inspected and queued to a new client.
+        them to be inspected and queued to a new client. The futures
+        of any messages in the send window are cancelled, as their
+        outcome will not be known.
         """
         await super(SendClientAsync, self).close_async()
+        async with self._pending_messages_lock:
+            self._scheduler.cancel()
+
+    async def queue_message_async(self, *messages, futures=False):
+        """Add one or more messages to the send queue.
+        No further action will be taken until either `SendClientAsync.wait_async()`
+        or `SendClientAsync.send_all_messages_async()` has been called.
+        If the client has a maximum number or size of messages in flight, this will
+        open and work the client until there is room for each message in the send window.
+
+        :param messages: A message to send. This can either be a single instance
+         of `Message`, or multiple messages wrapped in an instance of `BatchMessage`.
+        :type message: ~uamqp.message.Message
+        :param futures: Whether to return a future for each message queued. The future is
+         resolved once the outcome of the message is known, with an exception if the message
+         failed to send. Futures are always returned if the client has a maximum number or
+         size of messages in flight. Default is `False`.
+        :type futures: bool
+        :rtype: list[~asyncio.Future] or None
+        """
+        futures = futures or self._windowed
+        queued = []
+        for message in messages:
+            for internal_message in message.gather():
+                size = self._get_window_size(internal_message) if self._windowed else 0
+                await self._wait_for_window_async(size)
+                queued.append(self._queue_message(internal_message, size, futures))
+        return queued if futures else None
+
+    async def do_work_async(self):
+        """Run a single connection iteration asynchronously.
+        This will return `True` if the connection is still open
+        and ready to be used for further work, or `False` if it needs
+        to be shut down. Messages that have not been sent within the message
+        timeout are failed, whether or not the client is ready.
+
+        :rtype: bool
+        :raises: TimeoutError or ~uamqp.errors.ClientTimeout if CBS authentication timeout reached.
+        """
+        self._expire_messages()
+        return await super(SendClientAsync, self).do_work_async()
 
     async def wait_async(self):
         """Run the client asynchronously until all pending messages
@@ -614,6 +695,29 @@ class SendClientAsync(client.SendClient, AMQPClientAsync):
         while running and self.messages_pending():
             running = await self.do_work_async()
 
+    async def send_presettled_async(self, *messages):
+        """Send messages asynchronously as fire-and-forget, on a client with a send
+        settle mode of `Settled`. The messages are sent immediately rather than queued,
+        and their state, timeouts and retries are not tracked: `on_send_complete` is
+        not run, and the state of each message is left unchanged. The client is
+        opened and worked until ready if needed, and must then be worked for
+        the messages to be written to the network.
+
+        :param messages: The messages to send. Each can be a ~uamqp.message.Message
+         or ~uamqp.message.BatchMessage, or bytes to be sent as the body of a message.
+        :type messages: ~uamqp.message.Message or bytes
+        :returns: The number of messages sent. Sending stops at the first message that
+         could not be added to the outgoing queue.
+        :rtype: int
+        """
+        if self._send_settle_mode != constants.SenderSettleMode.Settled:
+            raise ValueError("Presettled messages can only be sent with a send settle mode of Settled.")
+        await self.open_async()
+        while not await self.client_ready_async():
+            if self._shutdown:
+                return 0
+        return await self.message_handler.send_presettled_async(self._gather_presettled(messages))
+
     async def send_message_async(self, messages, close_on_done=False):
         """Send a single message or batched message asynchronously.
 
@@ -630,13 +734,15 @@ class SendClientAsync(client.SendClient, AMQPClientAsync):
         pending_batch = []
         for message in batch:
             message.idle_time = self._counter.get_current_ms()
-            async with self._pending_messages_lock:
-                self._pending_messages.append(message)
+            if self._msg_timeout > 0:
+                self._scheduler.add_deadline(message, message.idle_time + self._msg_timeout)
+            self._scheduler.queue(message)
             pending_batch.append(message)
         await self.open_async()
         running = True
         try:
-            while running and any([m for m in pending_batch if m.state not in constants.DONE_STATES]):
+            done = client._CompletionCursor(pending_batch)  # pylint: disable=protected-access
+            while running and not done.complete():
                 running = await self.do_work_async()
             failed = [m for m in pending_batch if m.state == constants.MessageState.SendFailed]
             if any(failed):
@@ -664,8 +770,7 @@ class SendClientAsync(client.SendClient, AMQPClientAsync):
         """
         await self.open_async()
         try:
-            async with self._pending_messages_lock:
-                messages = self._pending_messages[:]
+            messages = self._scheduler.pending()
             await self.wait_async()
             results = [m.state for m in messages]
             return results
@@ -711,11 +816,17 @@ class ReceiveClientAsync(client.ReceiveClient, AMQPClientAsync):
     :param error_policy: A policy for parsing errors on link, connection and message
      disposition to determine whether the error should be retryable.
     :type error_policy: ~uamqp.errors.ErrorPolicy
-    :param keep_alive_interval: If set, a thread will be started to keep the connection
-     alive during periods of user inactivity. The value will determine how long the
-     thread will sleep (in seconds) between pinging the connection. If 0 or None, no
-     thread will be started.
+    :param keep_alive_interval: If set, the connection will be kept alive during periods
+     of user inactivity by a keep-alive scheduler shared by all clients. The value will
+     determine how long to wait (in seconds) between pinging the connection. If 0 or None,
+     the connection will not be kept alive.
     :type keep_alive_interval: int
+    :param heartbeat: If set, the connection is kept alive by sending an empty frame only
+     when one is needed to satisfy the remote idle timeout and the
+     `remote_idle_timeout_empty_frame_send_ratio`, timed from when the last frame was
+     sent and received, instead of being pinged every `keep_alive_interval`.
+     Default is `False`.
+    :type heartbeat: bool
     :param send_settle_mode: The mode by which to settle message send
      operations. If set to `Unsettled`, the client will wait for a confirmation
      from the service that the message was successfully sent. If set to 'Settled',
@@ -765,6 +876,10 @@ class ReceiveClientAsync(client.ReceiveClient, AMQPClientAsync):
     :param encoding: The encoding to use for parameters supplied as strings.
      Default is 'UTF-8'
     :type encoding: str
+    :param event_driven: Whether the Connection socket should be registered with the event
+     loop once open, so that the Connection is only worked when the socket is ready or a
+     deadline is due, instead of on every iteration. Default is `False`.
+    :type event_driven: bool
     """
 
     def __init__(
@@ -794,6 +909,7 @@ class ReceiveClientAsync(client.ReceiveClient, AMQPClientAsync):
 
         # AMQP object settings
         self.receiver_type = MessageReceiverAsync
+        self._received_messages = _AsyncMessageBuffer(**self._internal_kwargs)
 
     async def _client_ready_async(self):
         """Determine whether the client is ready to start receiving messages.
@@ -846,8 +962,14 @@ class ReceiveClientAsync(client.ReceiveClient, AMQPClientAsync):
         await self._connection.work_async()
         now = self._counter.get_current_ms()
         if self._last_activity_timestamp and not self._was_message_received:
-            # If no messages are coming through, back off a little to keep CPU use low.
-            await asyncio.sleep(0.05, **self._internal_kwargs)
+            # If no messages are coming through, wait for the connection socket to become
+            # readable rather than polling, bounded by the receive timeout. If the event loop
+            # is running the connection, wait only for the next message to be buffered.
+            idle_wait = self._get_idle_wait(now)
+            if self._streaming_receive or self._connection._transport is None:  # pylint: disable=protected-access
+                await self._connection.wait_async(idle_wait)
+            else:
+                await self._received_messages.wait_async(1, idle_wait)
             if self._timeout > 0:
                 timespan = now - self._last_activity_timestamp
                 if timespan >= self._timeout:
@@ -926,35 +1048,22 @@ class ReceiveClientAsync(client.ReceiveClient, AMQPClientAsync):
                 'Maximum batch size {} cannot be greater than the '
                 'connection link credit: {}'.format(max_batch_size, self._prefetch))
         timeout = self._counter.get_current_ms() + int(timeout) if timeout else 0
-        expired = False
         await self.open_async()
         receiving = True
-        batch = []
-        while not self._received_messages.empty() and len(batch) < max_batch_size:
-            batch.append(self._received_messages.get())
-            self._received_messages.task_done()
-        if len(batch) >= max_batch_size:
-            return batch
+        if len(self._received_messages) >= max_batch_size:
+            return self._received_messages.take(max_batch_size)
 
         self._timeout_reached = False
         self._last_activity_timestamp = None
-        while receiving and not expired and len(batch) < max_batch_size and not self._timeout_reached:
-            while receiving and self._received_messages.qsize() < max_batch_size and not self._timeout_reached:
-                if timeout and self._counter.get_current_ms() > timeout:
-                    expired = True
-                    break
-                before = self._received_messages.qsize()
-                receiving = await self.do_work_async()
-                received = self._received_messages.qsize() - before
-                if self._received_messages.qsize() > 0 and received == 0:
-                    # No new messages arrived, but we have some - so return what we have.
-                    expired = True
-                    break
-
-            while not self._received_messages.empty() and len(batch) < max_batch_size:
-                batch.append(self._received_messages.get())
-                self._received_messages.task_done()
-        return batch
+        while receiving and len(self._received_messages) < max_batch_size and not self._timeout_reached:
+            if timeout and self._counter.get_current_ms() > timeout:
+                break
+            received = self._received_messages.received
+            receiving = await self.do_work_async()
+            if self._received_messages and self._received_messages.received == received:
+                # No new messages arrived, but we have some - so return what we have.
+                break
+        return self._received_messages.take(max_batch_size)
 
     def receive_messages_iter_async(self, on_message_received=None):
         """Receive messages by asynchronous generator. Messages returned in the
@@ -993,7 +1102,7 @@ class ReceiveClientAsync(client.ReceiveClient, AMQPClientAsync):
         self._shutdown = False
         self._last_activity_timestamp = None
         self._was_message_received = False
-        self._received_messages = compat.queue.Queue()
+        self._received_messages = _AsyncMessageBuffer(**self._internal_kwargs)
 
         self._remote_address = address.Source(redirect.address)
         await self._redirect_async(redirect, auth)
@@ -1024,11 +1133,10 @@ class AsyncMessageIter(collections.abc.AsyncIterator):  # pylint: disable=no-mem
         if self.current_message and self.auto_complete:
             self.current_message.accept()
         try:
-            while self.receiving and self._client._received_messages.empty() and not self._client._timeout_reached:
+            while self.receiving and not self._client._received_messages and not self._client._timeout_reached:
                 self.receiving = await self._client.do_work_async()
-            if not self._client._received_messages.empty():
+            if self._client._received_messages:
                 message = self._client._received_messages.get()
-                self._client._received_messages.task_done()
                 self.current_message = message
                 return message
             raise StopAsyncIteration("Message receiver closing.")  # pylint: disable=undefined-variable
@@ -1038,3 +1146,44 @@ class AsyncMessageIter(collections.abc.AsyncIterator):  # pylint: disable=no-mem
         finally:
             if not self.receiving and self._client._shutdown_after_timeout:
                 await self._client.close_async()
+
+
+class _AsyncMessageBuffer(client._MessageBuffer):  # pylint: disable=protected-access
+    """Buffer of received messages for an asynchronous receive client,
+    supporting a single waiting consumer.
+    """
+
+    def __init__(self, **kwargs):
+        super(_AsyncMessageBuffer, self).__init__()
+        self._internal_kwargs = kwargs
+        self._arrived = asyncio.Event(**kwargs)
+        self._wanted = None
+
+    def put(self, message):
+        super(_AsyncMessageBuffer, self).put(message)
+        if self._wanted is not None and len(self._messages) >= self._wanted:
+            self._arrived.set()
+
+    async def wait_async(self, count, timeout):
+        """Wait until at least `count` messages are buffered, or until `timeout`
+        seconds have elapsed. Messages will only arrive while something else is
+        running the connection, for example an event driven ConnectionAsync.
+
+        :param count: The number of messages to wait for.
+        :type count: int
+        :param timeout: Maximum length of time to wait in seconds.
+        :type timeout: float
+        :returns: Whether `count` messages are available.
+        :rtype: bool
+        """
+        if len(self._messages) >= count:
+            return True
+        self._wanted = count
+        self._arrived.clear()
+        try:
+            await asyncio.wait_for(self._arrived.wait(), timeout, **self._internal_kwargs)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            self._wanted = None
+        return len(self._messages) >= count
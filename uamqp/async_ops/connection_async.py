@@ -8,8 +8,9 @@ import asyncio
 import logging
 
 import uamqp
-from uamqp import c_uamqp, connection
+from uamqp import c_uamqp, connection, constants
 from uamqp.async_ops.utils import get_dict_with_loop_if_needed
+from uamqp.utils import get_running_loop
 
 _logger = logging.getLogger(__name__)
 
@@ -56,6 +57,11 @@ class ConnectionAsync(connection.Connection):
     :param encoding: The encoding to use for parameters supplied as strings.
      Default is 'UTF-8'
     :type encoding: str
+    :param event_driven: Whether, once the Connection is open, its socket should be
+     registered with the event loop so that Connection iterations are run only when the
+     socket is ready or a deadline is due, rather than on every call to `work_async`.
+     Default is `False`.
+    :type event_driven: bool
     """
 
     def __init__(self, hostname, sasl,
@@ -68,7 +74,8 @@ class ConnectionAsync(connection.Connection):
                  error_policy=None,
                  debug=False,
                  encoding='UTF-8',
-                 loop=None):
+                 loop=None,
+                 event_driven=False):
         self._internal_kwargs = get_dict_with_loop_if_needed(loop)
         super(ConnectionAsync, self).__init__(
             hostname, sasl,
@@ -82,6 +89,13 @@ class ConnectionAsync(connection.Connection):
             debug=debug,
             encoding=encoding)
         self._async_lock = asyncio.Lock(**self._internal_kwargs)
+        self._reader = None
+        self._event_driven = event_driven
+        self._transport = None
+        self._transport_writing = False
+        self._transport_deadline = None
+        self._transport_waiter = None
+        self._transport_deferred = None
 
     async def __aenter__(self):
         """Open the Connection in an async context manager."""
@@ -96,6 +110,8 @@ class ConnectionAsync(connection.Connection):
     async def _close_async(self):
         _logger.info("Shutting down connection %r.", self.container_id)
         self._closing = True
+        self._remove_reader()
+        self._stop_transport()
         if self._cbs:
             await self.auth.close_authenticator_async()
             self._cbs = None
@@ -137,6 +153,13 @@ class ConnectionAsync(connection.Connection):
             if self._closing:
                 _logger.debug("Connection unlocked but shutting down.")
                 return
+            if self._transport is not None:
+                # The event loop runs the Connection as the socket becomes ready, but
+                # outgoing data queued since then may need the socket to become writable.
+                self._schedule_transport()
+                return
+            if self._start_transport():
+                return
             await asyncio.sleep(0, **self._internal_kwargs)
             self._conn.do_work()
         except asyncio.TimeoutError:
@@ -145,6 +168,261 @@ class ConnectionAsync(connection.Connection):
             await asyncio.sleep(0, **self._internal_kwargs)
             self.release_async()
 
+    async def heartbeat_async(self):
+        """Keep the Connection alive asynchronously based on when the last frame
+        was sent and received, rather than on a fixed interval. An empty frame is
+        only sent if no other frame has been sent within the remote idle timeout.
+        If the Connection is event driven, heartbeats are already sent by the
+        event loop, so this only returns the time until the next one is due.
+
+        :returns: The time in seconds until the next heartbeat or idle timeout
+         is due, or `None` if neither end of the Connection has an idle timeout.
+        :rtype: float
+        """
+        try:
+            raise self._error
+        except TypeError:
+            pass
+        except Exception as e:
+            _logger.warning("%r", e)
+            raise
+        try:
+            await self.lock_async()
+            if self._closing:
+                _logger.debug("Connection unlocked but shutting down.")
+                return None
+            if self._transport is not None:
+                deadline = self._conn.handle_deadlines()
+                return None if deadline is None else deadline / 1000.0
+            return self._heartbeat()
+        except asyncio.TimeoutError:
+            _logger.debug("Connection %r timed out while waiting for lock acquisition.", self.container_id)
+            return constants.MAX_IDLE_WAIT_SECS
+        finally:
+            self.release_async()
+
+    async def work_until_idle_async(self, max_iterations=10):
+        """Perform Connection iterations asynchronously until there is no more
+        incoming data ready to be processed. This will not wait for data to arrive,
+        so it can be scheduled whenever the socket returned by `fileno()` is reported
+        as ready.
+
+        :param max_iterations: The maximum number of iterations to perform, so that
+         a busy Connection does not starve any others. Default is 10.
+        :type max_iterations: int
+        """
+        try:
+            raise self._error
+        except TypeError:
+            pass
+        except Exception as e:
+            _logger.warning("%r", e)
+            raise
+        try:
+            await self.lock_async()
+            if self._closing:
+                _logger.debug("Connection unlocked but shutting down.")
+                return
+            for _ in range(max_iterations):
+                self._conn.do_work()
+                socket_fd = self._get_socket_fd()
+                if socket_fd is None or not connection._wait_readable(socket_fd, 0):  # pylint: disable=protected-access
+                    break
+        except asyncio.TimeoutError:
+            _logger.debug("Connection %r timed out while waiting for lock acquisition.", self.container_id)
+        finally:
+            await asyncio.sleep(0, **self._internal_kwargs)
+            self.release_async()
+
+    def _start_transport(self):
+        if not self._event_driven or self._state != c_uamqp.ConnectionState.OPENED:
+            return False
+        socket_fd = self._get_socket_fd()
+        if socket_fd is None:
+            return False
+        loop = self.loop or get_running_loop()
+        self._remove_reader()
+        try:
+            loop.add_reader(socket_fd, self._run_transport)
+        except NotImplementedError:
+            _logger.info("Event loop does not support socket readers, Connection %r will be polled.",
+                         self.container_id)
+            self._event_driven = False
+            return False
+        _logger.debug("Connection %r socket registered with the event loop.", self.container_id)
+        self._transport = (loop, socket_fd)
+        self._schedule_transport()
+        return True
+
+    def _stop_transport(self):
+        if self._transport is None:
+            return
+        loop, socket_fd = self._transport
+        self._transport = None
+        if self._transport_deadline is not None:
+            self._transport_deadline.cancel()
+            self._transport_deadline = None
+        if self._transport_deferred is not None:
+            self._transport_deferred.cancel()
+            self._transport_deferred = None
+        try:
+            loop.remove_reader(socket_fd)
+            if self._transport_writing:
+                loop.remove_writer(socket_fd)
+        except (OSError, ValueError):
+            pass
+        self._transport_writing = False
+        self._wake_transport_waiter()
+
+    def _run_transport(self):
+        # Called by the event loop when the socket is ready or a deadline is due. A coroutine
+        # may hold the Connection lock across an await in the middle of an iteration, so if
+        # the lock is held the work is deferred until it is released. As the socket is
+        # non-blocking the iteration itself never waits on the peer.
+        self._transport_deadline = None
+        if self._transport is None:
+            return
+        if self._async_lock.locked():
+            self._defer_transport()
+            return
+        self._work_transport()
+
+    def _defer_transport(self):
+        # Stop watching the socket while the work is deferred, otherwise the event loop
+        # would keep calling back for as long as the socket is ready.
+        loop, socket_fd = self._transport
+        if self._transport_deadline is not None:
+            self._transport_deadline.cancel()
+            self._transport_deadline = None
+        loop.remove_reader(socket_fd)
+        if self._transport_writing:
+            loop.remove_writer(socket_fd)
+            self._transport_writing = False
+        if self._transport_deferred is None:
+            self._transport_deferred = loop.create_task(self._run_deferred_transport())
+
+    async def _run_deferred_transport(self):
+        await self._async_lock.acquire()
+        try:
+            self._transport_deferred = None
+            if self._transport is not None:
+                loop, socket_fd = self._transport
+                loop.add_reader(socket_fd, self._run_transport)
+                self._work_transport()
+        finally:
+            self._async_lock.release()
+
+    def _work_transport(self):
+        if not self._closing:
+            self._conn.do_work()
+        if self._closing or not self.wants_read():
+            self._stop_transport()
+        else:
+            self._schedule_transport()
+            self._wake_transport_waiter()
+
+    def _schedule_transport(self):
+        loop, socket_fd = self._transport
+        wants_write = self.wants_write()
+        if wants_write and not self._transport_writing:
+            loop.add_writer(socket_fd, self._run_transport)
+        elif not wants_write and self._transport_writing:
+            loop.remove_writer(socket_fd)
+        self._transport_writing = wants_write
+        if self._transport_deadline is not None:
+            self._transport_deadline.cancel()
+            self._transport_deadline = None
+        deadline = self._conn.handle_deadlines()
+        if deadline is not None:
+            self._transport_deadline = loop.call_later(deadline / 1000.0, self._run_transport)
+
+    def _get_transport_waiter(self):
+        if self._transport_waiter is None:
+            loop, _ = self._transport
+            self._transport_waiter = loop.create_future()
+        return self._transport_waiter
+
+    def _wake_transport_waiter(self):
+        waiter, self._transport_waiter = self._transport_waiter, None
+        if waiter is not None and not waiter.done():
+            waiter.set_result(True)
+
+    def _get_readable(self, socket_fd):
+        # A single reader is shared by every coroutine waiting on this Connection,
+        # as the event loop only supports one reader callback per file descriptor.
+        if self._reader is None or self._reader[2].done():
+            loop = self.loop or get_running_loop()
+            readable = loop.create_future()
+
+            def _on_readable():
+                self._remove_reader()
+                if not readable.done():
+                    readable.set_result(True)
+
+            loop.add_reader(socket_fd, _on_readable)
+            self._reader = (loop, socket_fd, readable)
+        return self._reader[2]
+
+    def _remove_reader(self):
+        if self._reader is not None:
+            loop, socket_fd, _ = self._reader
+            self._reader = None
+            try:
+                loop.remove_reader(socket_fd)
+            except (OSError, ValueError):
+                pass
+
+    async def wait_async(self, timeout):
+        """Wait asynchronously until the Connection socket has incoming data, or until
+        the next Connection deadline (local idle timeout or remote heartbeat) is due,
+        for at most `timeout` seconds. The Connection is not locked while waiting.
+        If the underlying transport does not expose a socket, or the event loop does not
+        support readers, this will instead sleep for a short polling interval, as it will
+        while the Connection has outgoing data queued.
+
+        :param timeout: Maximum length of time to wait in seconds.
+        :type timeout: float
+        :returns: Whether the socket became readable. If the Connection is event driven,
+         whether the event loop ran a Connection iteration.
+        :rtype: bool
+        """
+        if self._transport is not None:
+            # Deadlines are already scheduled with the event loop. The waiter must be
+            # registered before yielding, so that no iteration run in between is missed.
+            readable = self._get_transport_waiter()
+            try:
+                await asyncio.wait_for(asyncio.shield(readable), timeout, **self._internal_kwargs)
+                return True
+            except asyncio.TimeoutError:
+                return False
+        try:
+            await self.lock_async()
+            socket_fd, timeout, writable = self._get_wait_params(timeout)
+        except asyncio.TimeoutError:
+            _logger.debug("Connection %r timed out while waiting for lock acquisition.", self.container_id)
+            return False
+        finally:
+            self.release_async()
+        if writable:
+            # Only readers are registered, so poll until the queued data is sent.
+            timeout = min(timeout, connection._IDLE_POLL_SECS)  # pylint: disable=protected-access
+        readable = None
+        if socket_fd is not None:
+            try:
+                readable = self._get_readable(socket_fd)
+            except NotImplementedError:
+                _logger.debug("Event loop does not support socket readers, falling back to sleep.")
+                self._socket_fd = -1
+        if readable is None:
+            timeout = min(timeout, connection._IDLE_POLL_SECS)  # pylint: disable=protected-access
+            await asyncio.sleep(timeout, **self._internal_kwargs)
+            return False
+        try:
+            await asyncio.wait_for(asyncio.shield(readable), timeout, **self._internal_kwargs)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
     async def sleep_async(self, seconds):
         """Lock the connection for a given number of seconds.
 
@@ -175,7 +453,10 @@ class ConnectionAsync(connection.Connection):
                 await self._close_async()
             self.hostname = redirect_error.hostname
             self.auth = auth
+            self._remove_reader()
+            self._stop_transport()
             self._conn = self._create_connection(auth)
+            self._socket_fd = None
             for setting, value in self._settings.items():
                 setattr(self, setting, value)
             self._error = None
@@ -201,3 +482,109 @@ class ConnectionAsync(connection.Connection):
         finally:
             self.release_async()
         uamqp._Platform.deinitialize()  # pylint: disable=protected-access
+
+
+class _KeepAliveEntryAsync(connection._KeepAliveEntry):  # pylint: disable=protected-access
+
+    def __init__(self, connection_async, loop):
+        super(_KeepAliveEntryAsync, self).__init__(connection_async)
+        self.loop = loop
+        self.timer = None
+
+    async def keep_alive_async(self):
+        """Keep the Connection alive asynchronously.
+
+        :returns: The delay in seconds until the Connection next needs to be kept alive.
+        :rtype: float
+        """
+        if not self.heartbeat:
+            await asyncio.shield(self.connection.work_async())
+            return self.interval
+        return self.get_delay(await asyncio.shield(self.connection.heartbeat_async()))
+
+
+class KeepAliveSchedulerAsync(object):
+    """Keeps asynchronous Connections alive during periods of user inactivity.
+    Rather than running a task per client that wakes every second, the next
+    keep-alive of each Connection is scheduled as a timer on its event loop,
+    and a task is only created when it is due.
+
+    Each distinct Connection is worked once per interval, however many clients
+    have registered it. If clients sharing a Connection request different
+    intervals, the shortest is used. A client can instead register for heartbeats,
+    in which case the Connection is kept alive when its next heartbeat or idle
+    timeout is due, based on when the last frame was sent and received.
+    """
+
+    def __init__(self):
+        self._entries = {}
+
+    def _schedule(self, entry, delay):
+        if entry.timer:
+            entry.timer.cancel()
+            entry.timer = None
+        if delay is not None:
+            entry.timer = entry.loop.call_later(delay, self._on_deadline, entry)
+
+    def _on_deadline(self, entry):
+        entry.timer = None
+        entry.pending = entry.loop.create_task(self._keep_alive_async(entry))
+
+    async def _keep_alive_async(self, entry):
+        try:
+            _logger.debug("Keeping connection %r alive.", entry.connection.container_id)
+            delay = await entry.keep_alive_async()
+        except Exception as e:  # pylint: disable=broad-except
+            _logger.info("Connection keep-alive for %r failed: %r.", entry.connection.container_id, e)
+            self._entries.pop(id(entry.connection), None)
+            return
+        finally:
+            entry.pending = None
+        if self._entries.get(id(entry.connection)) is entry:
+            self._schedule(entry, delay)
+
+    def register(self, connection, interval):
+        """Start keeping a Connection alive on the running event loop.
+
+        :param connection: The Connection to keep alive.
+        :type connection: ~uamqp.async_ops.connection_async.ConnectionAsync
+        :param interval: The length of time in seconds between pinging the Connection,
+         or `None` to send heartbeats as required by the idle timeout of the Connection.
+        :type interval: int
+        """
+        entry = self._entries.get(id(connection))
+        if entry is None:
+            entry = _KeepAliveEntryAsync(connection, get_running_loop())
+            self._entries[id(connection)] = entry
+        first_heartbeat = interval is None and not entry.heartbeat
+        entry.intervals.append(interval)
+        if entry.pending:
+            return  # Rescheduled once the keep-alive in progress completes.
+        if first_heartbeat or (not entry.heartbeat and entry.interval == interval):
+            self._schedule(entry, 0 if first_heartbeat else entry.interval)
+
+    async def unregister_async(self, connection, interval):
+        """Stop keeping a Connection alive on behalf of one client. Once the last
+        client has unregistered, this will wait for any keep-alive iteration of
+        the Connection that is in progress to complete.
+
+        :param connection: The Connection to stop keeping alive.
+        :type connection: ~uamqp.async_ops.connection_async.ConnectionAsync
+        :param interval: The interval with which the Connection was registered.
+        :type interval: int
+        """
+        entry = self._entries.get(id(connection))
+        if entry is None or entry.connection is not connection:
+            return
+        entry.intervals.remove(interval)
+        if entry.intervals:
+            return
+        del self._entries[id(connection)]
+        if entry.timer:
+            entry.timer.cancel()
+            entry.timer = None
+        if entry.pending:
+            await asyncio.wait([entry.pending])
+
+
+KEEP_ALIVE_SCHEDULER_ASYNC = KeepAliveSchedulerAsync()
@@ -167,6 +167,71 @@ class MessageSenderAsync(sender.MessageSender):
         finally:
             self._session._connection.release_async()
 
+    async def send_many_async(self, messages, callback, timeout=0):
+        """Add a list of messages to the internal pending queue to be processed
+        by the Connection without waiting for them to be sent. The Connection
+        is locked only once for the whole list.
+
+        :param messages: The messages to send.
+        :type messages: list[~uamqp.message.Message]
+        :param callback: The callback to be run once a disposition is received
+         in receipt of each message. The callback must take three arguments, the message,
+         the send result and the optional delivery condition (exception).
+        :type callback:
+         callable[~uamqp.message.Message, ~uamqp.constants.MessageSendResult, ~uamqp.errors.MessageException]
+        :param timeout: An expiry time for the messages added to the queue. If a
+         message is not sent within this timeout it will be discarded with an error
+         state. This can be a single value for all messages, or a list with a timeout
+         for each message. If set to 0, the messages will not expire. The default is 0.
+        :type timeout: int or list[int]
+        :returns: Whether each message was added to the queue. If adding a message
+         raises an error, it and the messages after it are not added and have no result,
+         so the list can be shorter than the messages.
+        :rtype: list[bool]
+        """
+        # pylint: disable=protected-access
+        try:
+            raise self._error
+        except TypeError:
+            pass
+        except Exception as e:
+            _logger.warning("%r", e)
+            raise
+        messages, c_messages, timeouts = self._prepare_many(messages, callback, timeout)
+        try:
+            await self._session._connection.lock_async(timeout=None)
+            return self._sender.send_many(c_messages, timeouts, messages)
+        finally:
+            self._session._connection.release_async()
+
+    async def send_presettled_async(self, messages):
+        """Send a list of messages on a link with a send settle mode of `Settled`,
+        without tracking the outcome of each message. No callback is run once a message
+        has been sent. The Connection is locked only once for the whole list.
+
+        :param messages: The messages to send. Each can be a ~uamqp.message.Message,
+         or bytes to be sent as the single Data section of a message body, in which case
+         a single underlying C message is reused for every value.
+        :type messages: list[~uamqp.message.Message or bytes]
+        :returns: The number of messages sent. Sending stops at the first message that
+         could not be added to the queue.
+        :rtype: int
+        """
+        # pylint: disable=protected-access
+        try:
+            raise self._error
+        except TypeError:
+            pass
+        except Exception as e:
+            _logger.warning("%r", e)
+            raise
+        values = self._prepare_presettled(messages)
+        try:
+            await self._session._connection.lock_async(timeout=None)
+            return self._sender.send_presettled(values)
+        finally:
+            self._session._connection.release_async()
+
     async def work_async(self):
         """Update the link status."""
         await asyncio.sleep(0, **self._internal_kwargs)
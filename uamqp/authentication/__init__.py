@@ -5,7 +5,7 @@
 #--------------------------------------------------------------------------
 
 from .common import AMQPAuth, SASLPlain, SASLAnonymous
-from .cbs_auth import TokenRetryPolicy, CBSAuthMixin, SASTokenAuth, JWTTokenAuth
+from .cbs_auth import TokenRetryPolicy, CBSAuthMixin, SASTokenAuth, JWTTokenAuth, TokenCache, TOKEN_CACHE
 try:
     from .cbs_auth_async import CBSAsyncAuthMixin, SASTokenAsync, JWTTokenAsync
 except (ImportError, SyntaxError):
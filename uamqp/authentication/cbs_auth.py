@@ -6,8 +6,12 @@
 
 # pylint: disable=super-init-not-called,no-self-use
 
+import concurrent.futures
 import datetime
+import functools
+import hashlib
 import logging
+import threading
 import time
 
 from uamqp import Session, c_uamqp, compat, constants, errors, utils
@@ -17,6 +21,20 @@ from .common import _SASL, AMQPAuth
 
 _logger = logging.getLogger(__name__)
 
+# Shared by all connections to fetch refreshed tokens off the connection thread.
+# This is only created once a token first needs to be refreshed.
+_TOKEN_REFRESH_POOL = None
+_TOKEN_REFRESH_POOL_LOCK = threading.Lock()
+
+
+def _get_token_refresh_pool():
+    global _TOKEN_REFRESH_POOL  # pylint: disable=global-statement
+    with _TOKEN_REFRESH_POOL_LOCK:
+        if _TOKEN_REFRESH_POOL is None:
+            _TOKEN_REFRESH_POOL = concurrent.futures.ThreadPoolExecutor(
+                max_workers=4, thread_name_prefix="uamqp-token-refresh")
+        return _TOKEN_REFRESH_POOL
+
 
 class TokenRetryPolicy(object):
     """Retry policy for sending authentication tokens
@@ -36,17 +54,157 @@ class TokenRetryPolicy(object):
         self.backoff = float(backoff)/1000
 
 
+class TokenCache(object):
+    """A cache of CBS tokens that can be shared between the authentication
+    objects of many connections. Tokens are cached by a key such as the audience
+    and credential, until they are within the required lifetime of expiring.
+
+    Only a single fetch is made for a key at a time. Any other connections
+    needing a token for the same key wait for that fetch to complete and share
+    its result, rather than each fetching a token of their own.
+    """
+
+    def __init__(self):
+        self._tokens = {}
+        self._fetching = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._tokens)
+
+    def clear(self):
+        with self._lock:
+            self._tokens.clear()
+
+    def _begin(self, key, min_lifetime):
+        """Look up a cached token, or register the caller as the one to fetch it.
+
+        :returns: The cached token and expiry if there is one, the future of the
+         fetch in progress and whether the caller is responsible for the fetch.
+        :rtype: tuple[tuple[bytes, float], ~concurrent.futures.Future, bool]
+        """
+        now = time.time()
+        with self._lock:
+            cached = self._tokens.get(key)
+            if cached and cached[1] - now > min_lifetime:
+                return cached, None, False
+            future = self._fetching.get(key)
+            if future:
+                return None, future, False
+            future = self._fetching[key] = concurrent.futures.Future()
+            return None, future, True
+
+    def _complete(self, key, future, result=None, error=None):
+        now = time.time()
+        with self._lock:
+            del self._fetching[key]
+            if error is None:
+                for expired in [k for k, v in self._tokens.items() if v[1] <= now]:
+                    del self._tokens[expired]
+                self._tokens[key] = result
+        if error is None:
+            future.set_result(result)
+        else:
+            future.set_exception(error)
+
+    def _abandon(self, key, future):
+        """Release the callers waiting on a fetch that was interrupted, such as by
+        the cancellation of the task making it, so that one of them fetches instead.
+        """
+        with self._lock:
+            del self._fetching[key]
+        future.cancel()
+
+    def get_token(self, key, fetch, min_lifetime=0):
+        """Get a cached token, or fetch a new one.
+
+        :param key: The key of the token, such as the audience and credential.
+        :type key: tuple
+        :param fetch: A callable that returns a new token and the time at which it
+         will expire in seconds since epoch.
+        :type fetch: callable
+        :param min_lifetime: The number of seconds for which a cached token must
+         remain valid in order to be used.
+        :type min_lifetime: float
+        :rtype: tuple[bytes, float]
+        """
+        while True:
+            cached, future, fetching = self._begin(key, min_lifetime)
+            if cached:
+                return cached
+            if fetching:
+                break
+            try:
+                return future.result()
+            except concurrent.futures.CancelledError:
+                pass  # The fetch was abandoned, so try again.
+        try:
+            result = fetch()
+        except Exception as e:
+            self._complete(key, future, error=e)
+            raise
+        except BaseException:
+            self._abandon(key, future)
+            raise
+        self._complete(key, future, result=result)
+        return result
+
+
+TOKEN_CACHE = TokenCache()
+
+
+def _get_shared_access_key_digest(username, password):
+    """A digest of a shared access key and its name, so that the key itself is
+    not held in the token cache.
+    """
+    credential = u"{}:{}".format(username, password)
+    return hashlib.sha256(credential.encode("UTF-8")).hexdigest()
+
+
+def _get_credential_key(get_token):
+    """A hashable identity for a token callback, so that callbacks that wrap the
+    same credential (such as separate bound methods or partials) share a key.
+    """
+    if isinstance(get_token, functools.partial):
+        try:
+            key = (get_token.func, get_token.args, tuple(sorted(get_token.keywords.items())))
+            hash(key)
+            return key
+        except TypeError:
+            pass
+    try:
+        hash(get_token)
+        return get_token
+    except TypeError:
+        return id(get_token)
+
+
 class CBSAuthMixin(object):
     """Mixin to handle sending and refreshing CBS auth tokens."""
 
     def update_token(self):
-        """Update a token that is about to expire. This is specific
-        to a particular token type, and therefore must be implemented
-        in a child class.
+        """Update a token that is about to expire with a new token
+        from `_acquire_token`.
+        """
+        self._set_token(*self._acquire_token())
+
+    def _acquire_token(self):
+        """Get a new token. This is specific to a particular token type,
+        and therefore must be implemented in a child class. The new token
+        is returned rather than set, as this is run in a token refresh thread.
+
+        :returns: The new token, and the time at which it will expire
+         in seconds since epoch.
+        :rtype: tuple[bytes, float]
         """
         raise errors.TokenExpired(
             "Unable to refresh token - no refresh logic implemented.")
 
+    def _set_token(self, token, expires_at):
+        self.expires_at = expires_at
+        self._prev_token = self.token
+        self.token = token
+
     def create_authenticator(self, connection, debug=False, **kwargs):
         """Create the AMQP session and the CBS channel with which
         to negotiate the token.
@@ -61,6 +219,10 @@ class CBSAuthMixin(object):
         """
         self._connection = connection
         self._session = Session(connection, **kwargs)
+        self._token_ok_until = 0
+        self._token_refresh = None
+        self._token_retry_at = None
+        self._closed = False
 
         try:
             self._cbs_auth = c_uamqp.CBSTokenAuth(
@@ -86,17 +248,87 @@ class CBSAuthMixin(object):
         _logger.info("Shutting down CBS session on connection: %r.", self._connection.container_id)
         try:
             _logger.debug("Unlocked CBS to close on connection: %r.", self._connection.container_id)
+            self._closed = True
             self._cbs_auth.destroy()
+            self._token_ok_until = 0
+            if self._token_refresh:
+                self._token_refresh.cancel()
+                self._token_refresh = None
             _logger.info("Auth closed, destroying session on connection: %r.", self._connection.container_id)
             self._session.destroy()
         finally:
             _logger.info("Finished shutting down CBS session on connection: %r.", self._connection.container_id)
 
+    def _fetch_token(self):
+        """Start fetching a new token with `_acquire_token`, without blocking
+        the connection.
+
+        :rtype: ~concurrent.futures.Future
+        """
+        return _get_token_refresh_pool().submit(self._acquire_token)
+
+    def _retry_token_refresh(self, error):
+        """Schedule another attempt to fetch a new token after a failed fetch,
+        once the backoff of the retry policy has elapsed.
+
+        :raises: ~uamqp.errors.AuthenticationException if the retries are exhausted.
+        """
+        if self.retries >= self._retry_policy.retries:  # pylint: disable=no-member
+            _logger.warning("Token refresh failed. Retries exhausted.")
+            if isinstance(error, errors.AuthenticationException):
+                raise error
+            raise errors.AuthenticationException("Token refresh failed: {!r}".format(error))
+        _logger.info("Token refresh failed: %r. Retrying.", error)
+        self.retries += 1  # pylint: disable=no-member
+        self._token_retry_at = time.time() + self._retry_policy.backoff
+
+    def _send_refreshed_token(self):
+        """Set and send the new token once it has been fetched."""
+        refresh, self._token_refresh = self._token_refresh, None
+        if self._closed:
+            # A fetch that was already running when the authenticator was
+            # closed cannot be cancelled, so its token is discarded.
+            return
+        try:
+            token, expires_at = refresh.result()
+        except Exception as e:  # pylint: disable=broad-except
+            self._retry_token_refresh(e)
+            return
+        self._set_token(token, expires_at)
+        if self.token != self._prev_token:
+            self._cbs_auth.refresh(self.token, int(self.expires_at))
+        else:
+            _logger.info(
+                "The newly acquired token on connection %r is the same as the previous one,"
+                " will keep attempting to refresh",
+                self._connection.container_id
+            )
+
+    def _refresh_token(self):
+        if self._token_refresh is None:
+            if self._token_retry_at is not None:
+                if time.time() < self._token_retry_at:
+                    return
+                self._token_retry_at = None
+            _logger.info("Token on connection %r will expire soon - attempting to refresh.",
+                         self._connection.container_id)
+            self._token_refresh = self._fetch_token()
+        elif self._token_refresh.done():
+            self._send_refreshed_token()
+
     def handle_token(self):
         """This function is called periodically to check the status of the current
         token if there is one, and request a new one if needed.
         If the token request fails, it will be retried according to the retry policy.
-        A token refresh will be attempted if the token will expire soon.
+        The retry is made on a later call once the backoff has elapsed, rather than
+        waiting while the connection is locked.
+        A token refresh will be attempted if the token will expire soon. The new token
+        is fetched in a background thread, and sent once it is ready, while the
+        current token remains in use. A failed fetch is retried according to the
+        same retry policy.
+
+        Once the token has been accepted, no further checks are made until it is
+        due to be refreshed.
 
         This function will return a tuple of two booleans. The first represents whether
         the token authentication has not completed within it's given timeout window. The
@@ -110,22 +342,29 @@ class CBSAuthMixin(object):
         # pylint: disable=protected-access
         timeout = False
         in_progress = False
+        if self._closed or self._connection._closing or self._connection._error:
+            return timeout, in_progress
+        if time.time() < self._token_ok_until:
+            return timeout, in_progress
         try:
             self._connection.lock()
-            if self._connection._closing or self._connection._error:
+            if self._closed or self._connection._closing or self._connection._error:
                 return timeout, in_progress
             auth_status = self._cbs_auth.get_status()
             auth_status = constants.CBSAuthStatus(auth_status)
             if auth_status == constants.CBSAuthStatus.Error:
-                if self.retries >= self._retry_policy.retries:  # pylint: disable=no-member
-                    _logger.warning("Authentication Put-Token failed. Retries exhausted.")
-                    raise errors.TokenAuthFailure(*self._cbs_auth.get_failure_info())
-                error_code, error_description = self._cbs_auth.get_failure_info()
-                _logger.info("Authentication status: %r, description: %r", error_code, error_description)
-                _logger.info("Authentication Put-Token failed. Retrying.")
-                self.retries += 1  # pylint: disable=no-member
-                time.sleep(self._retry_policy.backoff)
-                self._cbs_auth.authenticate()
+                if self._token_retry_at is None:
+                    if self.retries >= self._retry_policy.retries:  # pylint: disable=no-member
+                        _logger.warning("Authentication Put-Token failed. Retries exhausted.")
+                        raise errors.TokenAuthFailure(*self._cbs_auth.get_failure_info())
+                    error_code, error_description = self._cbs_auth.get_failure_info()
+                    _logger.info("Authentication status: %r, description: %r", error_code, error_description)
+                    _logger.info("Authentication Put-Token failed. Retrying.")
+                    self.retries += 1  # pylint: disable=no-member
+                    self._token_retry_at = time.time() + self._retry_policy.backoff
+                if time.time() >= self._token_retry_at:
+                    self._token_retry_at = None
+                    self._cbs_auth.authenticate()
                 in_progress = True
             elif auth_status == constants.CBSAuthStatus.Failure:
                 raise errors.AuthenticationException("Failed to open CBS authentication link.")
@@ -136,21 +375,13 @@ class CBSAuthMixin(object):
             elif auth_status == constants.CBSAuthStatus.InProgress:
                 in_progress = True
             elif auth_status == constants.CBSAuthStatus.RefreshRequired:
-                _logger.info("Token on connection %r will expire soon - attempting to refresh.",
-                             self._connection.container_id)
-                self.update_token()
-                if self.token != self._prev_token:
-                    self._cbs_auth.refresh(self.token, int(self.expires_at))
-                else:
-                    _logger.info(
-                        "The newly acquired token on connection %r is the same as the previous one,"
-                        " will keep attempting to refresh",
-                        self._connection.container_id
-                    )
+                self._refresh_token()
             elif auth_status == constants.CBSAuthStatus.Idle:
                 self._cbs_auth.authenticate()
                 in_progress = True
-            elif auth_status != constants.CBSAuthStatus.Ok:
+            elif auth_status == constants.CBSAuthStatus.Ok:
+                self._token_ok_until = self._cbs_auth.refresh_at
+            else:
                 raise errors.AuthenticationException("Invalid auth state.")
         except compat.TimeoutException:
             _logger.debug("CBS auth timed out while waiting for lock acquisition.")
@@ -162,6 +393,14 @@ class CBSAuthMixin(object):
             self._connection.release()
         return timeout, in_progress
 
+    def _get_token_cache_lifetime(self):
+        """The time in seconds for which a cached token must remain valid in order
+        to be used, so that it is not already due to be refreshed.
+
+        :rtype: float
+        """
+        return self._refresh_window or self.expires_in.total_seconds() * 0.1
+
     def _set_expiry(self, expires_at, expires_in):
         if not expires_at and not expires_in:
             raise ValueError("Must specify either 'expires_at' or 'expires_in'.")
@@ -225,6 +464,10 @@ class SASTokenAuth(AMQPAuth, CBSAuthMixin):
     :keyword int refresh_window: The time in seconds before the token expiration
      time to start the process of token refresh.
      Default value is 10% of the remaining seconds until the token expires.
+    :keyword token_cache: A cache with which to share refreshed tokens between all the
+     authentication objects using the same URI and shared access key. Use
+     `uamqp.authentication.TOKEN_CACHE` for the process-wide cache. Default is no cache.
+    :paramtype token_cache: ~uamqp.authentication.cbs_auth.TokenCache
     """
 
     def __init__(self, audience, uri, token,
@@ -244,6 +487,7 @@ class SASTokenAuth(AMQPAuth, CBSAuthMixin):
         self._retry_policy = retry_policy
         self._encoding = encoding
         self._refresh_window = kwargs.pop("refresh_window", 0)
+        self._token_cache = kwargs.pop("token_cache", None)
         self._prev_token = None
         self.uri = uri
         parsed = compat.urlparse(uri)  # pylint: disable=no-member
@@ -264,21 +508,29 @@ class SASTokenAuth(AMQPAuth, CBSAuthMixin):
         self.sasl = _SASL()
         self.set_io(self.hostname, port, http_proxy, transport_type)
 
-    def update_token(self):
+    def _acquire_token(self):
         """If a username and password are present - attempt to use them to
         request a fresh SAS token.
         """
         if not self.username or not self.password:
             raise errors.TokenExpired("Unable to refresh token - no username or password.")
+        if self._token_cache is not None:
+            return self._token_cache.get_token(
+                (self.uri, _get_shared_access_key_digest(self.username, self.password)),
+                self._create_token,
+                self._get_token_cache_lifetime())
+        return self._create_token()
+
+    def _create_token(self):
         encoded_uri = compat.quote_plus(self.uri).encode(self._encoding)  # pylint: disable=no-member
         encoded_key = compat.quote_plus(self.username).encode(self._encoding)  # pylint: disable=no-member
-        self.expires_at = time.time() + self.expires_in.seconds
-        self._prev_token = self.token
-        self.token = utils.create_sas_token(
+        expires_at = time.time() + self.expires_in.seconds
+        token = utils.create_sas_token(
             encoded_key,
             self.password.encode(self._encoding),
             encoded_uri,
             self.expires_in)
+        return token, expires_at
 
     @classmethod
     def from_shared_access_key(
@@ -332,6 +584,9 @@ class SASTokenAuth(AMQPAuth, CBSAuthMixin):
         :keyword int refresh_window: The time in seconds before the token expiration
         time to start the process of token refresh.
         Default value is 10% of the remaining seconds until the token expires.
+        :keyword token_cache: A cache with which to share refreshed tokens between all the
+         authentication objects using the same URI and shared access key.
+        :paramtype token_cache: ~uamqp.authentication.cbs_auth.TokenCache
         """
         expires_in = datetime.timedelta(seconds=expiry or constants.AUTH_EXPIRATION_SECS)
         encoded_uri = compat.quote_plus(uri).encode(encoding)  # pylint: disable=no-member
@@ -355,7 +610,8 @@ class SASTokenAuth(AMQPAuth, CBSAuthMixin):
             http_proxy=http_proxy,
             transport_type=transport_type,
             encoding=encoding,
-            custom_endpoint_hostname=kwargs.pop("custom_endpoint_hostname", None))
+            custom_endpoint_hostname=kwargs.pop("custom_endpoint_hostname", None),
+            token_cache=kwargs.pop("token_cache", None))
 
 
 class JWTTokenAuth(AMQPAuth, CBSAuthMixin):
@@ -403,6 +659,10 @@ class JWTTokenAuth(AMQPAuth, CBSAuthMixin):
     :keyword int refresh_window: The time in seconds before the token expiration
      time to start the process of token refresh.
      Default value is 10% of the remaining seconds until the token expires.
+    :keyword token_cache: A cache with which to share tokens between all the
+     authentication objects using the same audience and `get_token` credential. Use
+     `uamqp.authentication.TOKEN_CACHE` for the process-wide cache. Default is no cache.
+    :paramtype token_cache: ~uamqp.authentication.cbs_auth.TokenCache
     """
 
     def __init__(self, audience, uri,
@@ -421,6 +681,7 @@ class JWTTokenAuth(AMQPAuth, CBSAuthMixin):
         self._retry_policy = retry_policy
         self._encoding = encoding
         self._refresh_window = kwargs.pop("refresh_window", 0)
+        self._token_cache = kwargs.pop("token_cache", None)
         self._prev_token = None
         self.uri = uri
         parsed = compat.urlparse(uri)  # pylint: disable=no-member
@@ -445,8 +706,14 @@ class JWTTokenAuth(AMQPAuth, CBSAuthMixin):
         self.update_token()
         return super(JWTTokenAuth, self).create_authenticator(connection, debug, **kwargs)
 
-    def update_token(self):
+    def _acquire_token(self):
+        if self._token_cache is not None:
+            return self._token_cache.get_token(
+                (self.audience, _get_credential_key(self.get_token)),
+                self._fetch_access_token,
+                self._get_token_cache_lifetime())
+        return self._fetch_access_token()
+
+    def _fetch_access_token(self):
         access_token = self.get_token()
-        self.expires_at = access_token.expires_on
-        self._prev_token = self.token
-        self.token = self._encode(access_token.token)
+        return self._encode(access_token.token), access_token.expires_on
@@ -9,13 +9,14 @@
 import asyncio
 import datetime
 import logging
+import time
 
 from uamqp import c_uamqp, compat, constants, errors
 from uamqp.async_ops import SessionAsync
 from uamqp.constants import TransportType
 from uamqp.async_ops.utils import get_dict_with_loop_if_needed
 
-from .cbs_auth import CBSAuthMixin, SASTokenAuth, JWTTokenAuth, TokenRetryPolicy
+from .cbs_auth import CBSAuthMixin, SASTokenAuth, JWTTokenAuth, TokenRetryPolicy, _get_credential_key
 
 from .common import _SASL
 
@@ -33,6 +34,48 @@ def is_coroutine(get_token):
     raise ValueError("get_token must be a coroutine function")
 
 
+async def get_cached_token_async(token_cache, key, fetch, min_lifetime=0):
+    """Get a cached token, or fetch a new one asynchronously. Only a single fetch
+    is made for a key at a time, whether by a coroutine or a thread.
+
+    :param token_cache: The cache of tokens.
+    :type token_cache: ~uamqp.authentication.cbs_auth.TokenCache
+    :param key: The key of the token, such as the audience and credential.
+    :type key: tuple
+    :param fetch: A coroutine function that returns a new token and the time at
+     which it will expire in seconds since epoch.
+    :type fetch: coroutine function
+    :param min_lifetime: The number of seconds for which a cached token must
+     remain valid in order to be used.
+    :type min_lifetime: float
+    :rtype: tuple[bytes, float]
+    """
+    # pylint: disable=protected-access
+    while True:
+        cached, future, fetching = token_cache._begin(key, min_lifetime)
+        if cached:
+            return cached
+        if fetching:
+            break
+        try:
+            # The fetch is shielded so that a cancelled waiter does not cancel it.
+            return await asyncio.shield(asyncio.wrap_future(future))
+        except asyncio.CancelledError:
+            if not future.cancelled():
+                raise
+            # The fetch was abandoned, so try again.
+    try:
+        result = await fetch()
+    except Exception as e:
+        token_cache._complete(key, future, error=e)
+        raise
+    except BaseException:
+        token_cache._abandon(key, future)
+        raise
+    token_cache._complete(key, future, result=result)
+    return result
+
+
 class CBSAsyncAuthMixin(CBSAuthMixin):
     """Mixin to handle sending and refreshing CBS auth tokens asynchronously."""
 
@@ -56,6 +99,10 @@ class CBSAsyncAuthMixin(CBSAuthMixin):
         self._connection = connection
         kwargs.update(self._internal_kwargs)
         self._session = SessionAsync(connection, **kwargs)
+        self._token_ok_until = 0
+        self._token_refresh = None
+        self._token_retry_at = None
+        self._closed = False
 
         try:
             self._cbs_auth = c_uamqp.CBSTokenAuth(
@@ -81,17 +128,52 @@ class CBSAsyncAuthMixin(CBSAuthMixin):
         """Close the CBS auth channel and session asynchronously."""
         _logger.info("Shutting down CBS session on connection: %r.", self._connection.container_id)
         try:
+            self._closed = True
             self._cbs_auth.destroy()
+            self._token_ok_until = 0
+            if self._token_refresh:
+                self._token_refresh.cancel()
+                self._token_refresh = None
             _logger.info("Auth closed, destroying session on connection: %r.", self._connection.container_id)
             await self._session.destroy_async()
         finally:
             _logger.info("Finished shutting down CBS session on connection: %r.", self._connection.container_id)
 
+    async def update_token(self):
+        """Update a token that is about to expire with a new token
+        from `_acquire_token_async`.
+        """
+        self._set_token(*await self._acquire_token_async())
+
+    async def _acquire_token_async(self):
+        """Get a new token asynchronously. By default this uses `_acquire_token`.
+
+        :returns: The new token, and the time at which it will expire
+         in seconds since epoch.
+        :rtype: tuple[bytes, float]
+        """
+        return self._acquire_token()
+
+    def _fetch_token(self):
+        """Start fetching a new token with `_acquire_token_async` in a separate task.
+
+        :rtype: ~asyncio.Future
+        """
+        return asyncio.ensure_future(self._acquire_token_async(), **self._internal_kwargs)
+
     async def handle_token_async(self):
         """This coroutine is called periodically to check the status of the current
         token if there is one, and request a new one if needed.
         If the token request fails, it will be retried according to the retry policy.
-        A token refresh will be attempted if the token will expire soon.
+        The retry is made on a later call once the backoff has elapsed, rather than
+        waiting while the connection is locked.
+        A token refresh will be attempted if the token will expire soon. The new token
+        is fetched in a separate task, and sent once it is ready, while the current
+        token remains in use. A failed fetch is retried according to the same
+        retry policy.
+
+        Once the token has been accepted, no further checks are made until it is
+        due to be refreshed.
 
         This function will return a tuple of two booleans. The first represents whether
         the token authentication has not completed within it's given timeout window. The
@@ -105,22 +187,29 @@ class CBSAsyncAuthMixin(CBSAuthMixin):
         # pylint: disable=protected-access
         timeout = False
         in_progress = False
+        if self._closed or self._connection._closing or self._connection._error:
+            return timeout, in_progress
+        if time.time() < self._token_ok_until:
+            return timeout, in_progress
         try:
             await self._connection.lock_async()
-            if self._connection._closing or self._connection._error:
+            if self._closed or self._connection._closing or self._connection._error:
                 return timeout, in_progress
             auth_status = self._cbs_auth.get_status()
             auth_status = constants.CBSAuthStatus(auth_status)
             if auth_status == constants.CBSAuthStatus.Error:
-                if self.retries >= self._retry_policy.retries:  # pylint: disable=no-member
-                    _logger.warning("Authentication Put-Token failed. Retries exhausted.")
-                    raise errors.TokenAuthFailure(*self._cbs_auth.get_failure_info())
-                error_code, error_description = self._cbs_auth.get_failure_info()
-                _logger.info("Authentication status: %r, description: %r", error_code, error_description)
-                _logger.info("Authentication Put-Token failed. Retrying.")
-                self.retries += 1  # pylint: disable=no-member
-                await asyncio.sleep(self._retry_policy.backoff, **self._internal_kwargs)
-                self._cbs_auth.authenticate()
+                if self._token_retry_at is None:
+                    if self.retries >= self._retry_policy.retries:  # pylint: disable=no-member
+                        _logger.warning("Authentication Put-Token failed. Retries exhausted.")
+                        raise errors.TokenAuthFailure(*self._cbs_auth.get_failure_info())
+                    error_code, error_description = self._cbs_auth.get_failure_info()
+                    _logger.info("Authentication status: %r, description: %r", error_code, error_description)
+                    _logger.info("Authentication Put-Token failed. Retrying.")
+                    self.retries += 1  # pylint: disable=no-member
+                    self._token_retry_at = time.time() + self._retry_policy.backoff
+                if time.time() >= self._token_retry_at:
+                    self._token_retry_at = None
+                    self._cbs_auth.authenticate()
                 in_progress = True
             elif auth_status == constants.CBSAuthStatus.Failure:
                 raise errors.AuthenticationException("Failed to open CBS authentication link.")
@@ -131,21 +220,13 @@ class CBSAsyncAuthMixin(CBSAuthMixin):
             elif auth_status == constants.CBSAuthStatus.InProgress:
                 in_progress = True
             elif auth_status == constants.CBSAuthStatus.RefreshRequired:
-                _logger.info("Token on connection %r will expire soon - attempting to refresh.",
-                             self._connection.container_id)
-                await self.update_token()
-                if self.token != self._prev_token:
-                    self._cbs_auth.refresh(self.token, int(self.expires_at))
-                else:
-                    _logger.info(
-                        "The newly acquired token on connection %r is the same as the previous one,"
-                        " will keep attempting to refresh",
-                        self._connection.container_id
-                    )
+                self._refresh_token()
             elif auth_status == constants.CBSAuthStatus.Idle:
                 self._cbs_auth.authenticate()
                 in_progress = True
-            elif auth_status != constants.CBSAuthStatus.Ok:
+            elif auth_status == constants.CBSAuthStatus.Ok:
+                self._token_ok_until = self._cbs_auth.refresh_at
+            else:
                 raise ValueError("Invalid auth state.")
         except asyncio.TimeoutError:
             _logger.debug("CBS auth timed out while waiting for lock acquisition.")
@@ -208,9 +289,11 @@ class SASTokenAsync(SASTokenAuth, CBSAsyncAuthMixin):
     :keyword int refresh_window: The time in seconds before the token expiration
      time to start the process of token refresh.
      Default value is 10% of the remaining seconds until the token expires.
+    :keyword token_cache: A cache with which to share refreshed tokens between all the
+     authentication objects using the same URI and shared access key. Use
+     `uamqp.authentication.TOKEN_CACHE` for the process-wide cache. Default is no cache.
+    :paramtype token_cache: ~uamqp.authentication.cbs_auth.TokenCache
     """
-    async def update_token(self):  # pylint: disable=useless-super-delegation
-        super(SASTokenAsync, self).update_token()
 
 
 class JWTTokenAsync(JWTTokenAuth, CBSAsyncAuthMixin):
@@ -258,6 +341,10 @@ class JWTTokenAsync(JWTTokenAuth, CBSAsyncAuthMixin):
     :keyword int refresh_window: The time in seconds before the token expiration
      time to start the process of token refresh.
      Default value is 10% of the remaining seconds until the token expires.
+    :keyword token_cache: A cache with which to share tokens between all the
+     authentication objects using the same audience and `get_token` credential. Use
+     `uamqp.authentication.TOKEN_CACHE` for the process-wide cache. Default is no cache.
+    :paramtype token_cache: ~uamqp.authentication.cbs_auth.TokenCache
     """
 
     def __init__(self, audience, uri,
@@ -276,6 +363,7 @@ class JWTTokenAsync(JWTTokenAuth, CBSAsyncAuthMixin):
         self._retry_policy = retry_policy
         self._encoding = encoding
         self._refresh_window = kwargs.pop("refresh_window", 0)
+        self._token_cache = kwargs.pop("token_cache", None)
         self._prev_token = None
         self.uri = uri
         parsed = compat.urlparse(uri)  # pylint: disable=no-member
@@ -299,8 +387,15 @@ class JWTTokenAsync(JWTTokenAuth, CBSAsyncAuthMixin):
         await self.update_token()
         return await super(JWTTokenAsync, self).create_authenticator_async(connection, debug, **kwargs)
 
-    async def update_token(self):
+    async def _acquire_token_async(self):
+        if self._token_cache is not None:
+            return await get_cached_token_async(
+                self._token_cache,
+                (self.audience, _get_credential_key(self.get_token)),
+                self._fetch_access_token_async,
+                self._get_token_cache_lifetime())
+        return await self._fetch_access_token_async()
+
+    async def _fetch_access_token_async(self):
         access_token = await self.get_token()
-        self.expires_at = access_token.expires_on
-        self._prev_token = self.token
-        self.token = self._encode(access_token.token)
+        return self._encode(access_token.token), access_token.expires_on
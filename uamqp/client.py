@@ -6,6 +6,10 @@
 
 # pylint: disable=too-many-lines
 
+import collections
+import concurrent.futures
+import heapq
+import itertools
 import logging
 import threading
 import time
@@ -13,6 +17,7 @@ import uuid
 
 from uamqp import (Connection, Session, address, authentication, c_uamqp,
                    compat, constants, errors, receiver, sender)
+from uamqp.connection import KEEP_ALIVE_SCHEDULER
 from uamqp.constants import TransportType
 
 _logger = logging.getLogger(__name__)
@@ -41,11 +46,17 @@ class AMQPClient(object):
     :param error_policy: A policy for parsing errors on link, connection and message
      disposition to determine whether the error should be retryable.
     :type error_policy: ~uamqp.errors.ErrorPolicy
-    :param keep_alive_interval: If set, a thread will be started to keep the connection
-     alive during periods of user inactivity. The value will determine how long the
-     thread will sleep (in seconds) between pinging the connection. If 0 or None, no
-     thread will be started.
+    :param keep_alive_interval: If set, the connection will be kept alive during periods
+     of user inactivity by a keep-alive scheduler shared by all clients. The value will
+     determine how long to wait (in seconds) between pinging the connection. If 0 or None,
+     the connection will not be kept alive.
     :type keep_alive_interval: int
+    :param heartbeat: If set, the connection is kept alive by sending an empty frame only
+     when one is needed to satisfy the remote idle timeout and the
+     `remote_idle_timeout_empty_frame_send_ratio`, timed from when the last frame was
+     sent and received, instead of being pinged every `keep_alive_interval`.
+     Default is `False`.
+    :type heartbeat: bool
     :param max_frame_size: Maximum AMQP frame size. Default is 63488 bytes.
     :type max_frame_size: int
     :param channel_max: Maximum number of Session channels in the Connection.
@@ -118,7 +129,10 @@ class AMQPClient(object):
         self._backoff = 0
         self._error_policy = error_policy or errors.ErrorPolicy()
         self._keep_alive_interval = int(keep_alive_interval) if keep_alive_interval else 0
-        self._keep_alive_thread = None
+        self._heartbeat = kwargs.pop('heartbeat', False)
+        self._keep_alive_registered = False
+        self._pump = None
+        self._pump_error = None
 
         # Connection settings
         self._max_frame_size = kwargs.pop('max_frame_size', None) or constants.MAX_FRAME_SIZE_BYTES
@@ -156,19 +170,13 @@ class AMQPClient(object):
         """Close and destroy Client on exiting a context manager."""
         self.close()
 
-    def _keep_alive(self):
-        start_time = self._counter.get_current_ms()
-        try:
-            while self._connection and not self._shutdown:
-                current_time = self._counter.get_current_ms()
-                elapsed_time = (current_time - start_time)/1000
-                if elapsed_time >= self._keep_alive_interval:
-                    _logger.debug("Keeping %r connection alive.", self.__class__.__name__)
-                    self._connection.work()
-                    start_time = current_time
-                time.sleep(1)
-        except Exception as e:  # pylint: disable=broad-except
-            _logger.info("Connection keep-alive for %r failed: %r.", self.__class__.__name__, e)
+    def _get_keep_alive_interval(self):
+        """The interval with which the Connection is registered to be kept alive,
+        or `None` for heartbeats.
+
+        :rtype: int
+        """
+        return None if self._heartbeat else self._keep_alive_interval
 
     def _client_ready(self):  # pylint: disable=no-self-use
         """Determine whether the client is ready to start sending and/or
@@ -183,6 +191,22 @@ class AMQPClient(object):
         """Perform a single Connection iteration."""
         self._connection.work()
 
+    def _pump_run(self):  # pylint: disable=no-self-use
+        """Perform a single iteration of the client link, once the Connection
+        has been worked by a ConnectionPump.
+
+        :rtype: bool
+        """
+        return True
+
+    def _pump_wait(self):  # pylint: disable=no-self-use
+        """The length of time in seconds for which a ConnectionPump can wait
+        for incoming data before the client needs to run again.
+
+        :rtype: float
+        """
+        return constants.MAX_IDLE_WAIT_SECS
+
     def _redirect(self, redirect, auth):
         """Redirect the client endpoint using a Link DETACH redirect
         response.
@@ -239,6 +263,7 @@ class AMQPClient(object):
         if self._session:
             return  # already open.
         _logger.debug("Opening client connection.")
+        self._pump_error = None
         try:
             if connection:
                 _logger.debug("Using existing connection.")
@@ -258,10 +283,9 @@ class AMQPClient(object):
                 debug=self._debug_trace,
                 encoding=self._encoding)
             self._build_session()
-            if self._keep_alive_interval:
-                self._keep_alive_thread = threading.Thread(target=self._keep_alive)
-                self._keep_alive_thread.daemon = True
-                self._keep_alive_thread.start()
+            if self._heartbeat or self._keep_alive_interval:
+                KEEP_ALIVE_SCHEDULER.register(self._connection, self._get_keep_alive_interval())
+                self._keep_alive_registered = True
         finally:
             if self._ext_connection:
                 connection.release()
@@ -278,13 +302,15 @@ class AMQPClient(object):
         All pending, unsent messages will remain uncleared to allow
         them to be inspected and queued to a new client.
         """
+        if self._pump:
+            self._pump.detach(self)
         if self.message_handler:
             self.message_handler.destroy()
             self.message_handler = None
         self._shutdown = True
-        if self._keep_alive_thread:
-            self._keep_alive_thread.join()
-            self._keep_alive_thread = None
+        if self._keep_alive_registered:
+            KEEP_ALIVE_SCHEDULER.unregister(self._connection, self._get_keep_alive_interval())
+            self._keep_alive_registered = False
         if not self._session:
             return  # already closed.
         if not self._connection._cbs:  # pylint: disable=protected-access
@@ -389,11 +415,22 @@ class AMQPClient(object):
         and ready to be used for further work, or `False` if it needs
         to be shut down.
 
+        If the client is attached to a ConnectionPump, this will run or wait for
+        a single iteration of the pump instead.
+
         :rtype: bool
         :raises: TimeoutError or ~uamqp.errors.ClientTimeout if CBS authentication timeout reached.
         """
         if self._shutdown:
             return False
+        if self._pump:
+            self._pump.work()
+        try:
+            raise self._pump_error
+        except TypeError:
+            pass
+        if self._pump or self._shutdown:
+            return not self._shutdown
         if not self.client_ready():
             return True
         return self._client_run()
@@ -426,11 +463,17 @@ class SendClient(AMQPClient):
     :param error_policy: A policy for parsing errors on link, connection and message
      disposition to determine whether the error should be retryable.
     :type error_policy: ~uamqp.errors.ErrorPolicy
-    :param keep_alive_interval: If set, a thread will be started to keep the connection
-     alive during periods of user inactivity. The value will determine how long the
-     thread will sleep (in seconds) between pinging the connection. If 0 or None, no
-     thread will be started.
+    :param keep_alive_interval: If set, the connection will be kept alive during periods
+     of user inactivity by a keep-alive scheduler shared by all clients. The value will
+     determine how long to wait (in seconds) between pinging the connection. If 0 or None,
+     the connection will not be kept alive.
     :type keep_alive_interval: int
+    :param heartbeat: If set, the connection is kept alive by sending an empty frame only
+     when one is needed to satisfy the remote idle timeout and the
+     `remote_idle_timeout_empty_frame_send_ratio`, timed from when the last frame was
+     sent and received, instead of being pinged every `keep_alive_interval`.
+     Default is `False`.
+    :type heartbeat: bool
     :param send_settle_mode: The mode by which to settle message send
      operations. If set to `Unsettled`, the client will wait for a confirmation
      from the service that the message was successfully sent. If set to 'Settled',
@@ -479,6 +522,14 @@ class SendClient(AMQPClient):
     :param encoding: The encoding to use for parameters supplied as strings.
      Default is 'UTF-8'
     :type encoding: str
+    :param max_in_flight: The maximum number of queued messages that can be waiting to be
+     sent or acknowledged. If set, `queue_message` will work the client until there is room
+     for each message, and returns a future for each message. Default is None (no limit).
+    :type max_in_flight: int
+    :param max_in_flight_bytes: The maximum total encoded size of the queued messages that can
+     be waiting to be sent or acknowledged. A single message larger than this is sent on its own.
+     If set, `queue_message` behaves as for `max_in_flight`. Default is None (no limit).
+    :type max_in_flight_bytes: int
     """
 
     def __init__(
@@ -486,8 +537,7 @@ class SendClient(AMQPClient):
             error_policy=None, keep_alive_interval=None, **kwargs):
         target = target if isinstance(target, address.Address) else address.Target(target)
         self._msg_timeout = msg_timeout
-        self._pending_messages = []
-        self._waiting_messages = []
+        self._scheduler = _SendScheduler()
         self._shutdown = None
 
         # Sender and Link settings
@@ -495,6 +545,11 @@ class SendClient(AMQPClient):
         self._link_properties = kwargs.pop('link_properties', None)
         self._link_credit = kwargs.pop('link_credit', None)
 
+        # Send window settings
+        self._max_in_flight = kwargs.pop('max_in_flight', None)
+        self._max_in_flight_bytes = kwargs.pop('max_in_flight_bytes', None)
+        self._windowed = bool(self._max_in_flight or self._max_in_flight_bytes)
+
         # AMQP object settings
         self.sender_type = sender.MessageSender
 
@@ -557,6 +612,7 @@ class SendClient(AMQPClient):
         """
         # pylint: disable=protected-access
         try:
+            self._scheduler.completed(message)
             exception = delivery_state
             result = constants.MessageSendResult(result)
             if result == constants.MessageSendResult.Error:
@@ -581,6 +637,7 @@ class SendClient(AMQPClient):
                     self._backoff = exception.action.backoff
                     _logger.debug("Message error, retrying. Attempts: %r, Error: %r", message.retries, exception)
                     message.state = constants.MessageState.WaitingToBeSent
+                    self._scheduler.queue(message)
                     return
                 if exception.action.retry == errors.ErrorAction.retry:
                     _logger.info("Message error, %r retries exhausted. Error: %r", message.retries, exception)
@@ -597,12 +654,74 @@ class SendClient(AMQPClient):
                 _logger.debug("Message sent: %r, %r", result, exception)
                 message.state = constants.MessageState.SendComplete
                 message._response = errors.MessageAlreadySettled()
+            future = self._scheduler.release(message)
+            if future and not future.done():
+                if message.state == constants.MessageState.SendComplete:
+                    future.set_result(None)
+                else:
+                    future.set_exception(message._response)
             if message.on_send_complete:
                 message.on_send_complete(result, exception)
         except KeyboardInterrupt:
             _logger.error("Received shutdown signal while processing message send completion.")
             self.message_handler._error = errors.AMQPClientShutdown()
 
+    def _create_future(self):  # pylint: disable=no-self-use
+        return concurrent.futures.Future()
+
+    def _get_window_size(self, message):
+        if self._max_in_flight_bytes:
+            return message.get_message_encoded_size()
+        return 0
+
+    def _window_full(self, size):
+        """Whether a message of the given size would exceed the send window.
+        An empty window always has room for a message, however large.
+
+        :rtype: bool
+        """
+        count, window_bytes = self._scheduler.window_usage()
+        if not count:
+            return False
+        if self._max_in_flight and count >= self._max_in_flight:
+            return True
+        return bool(self._max_in_flight_bytes) and window_bytes + size > self._max_in_flight_bytes
+
+    def _wait_for_window(self, size):
+        """Work the client until there is room in the send window for a message
+        of the given size, or the client is shut down.
+        """
+        if not self._window_full(size):
+            return
+        self.open()
+        running = True
+        while running and self._window_full(size):
+            running = self.do_work()
+
+    def _expire_messages(self):
+        if self._msg_timeout > 0:
+            for message in self._scheduler.pop_expired(self._counter.get_current_ms()):
+                self._on_message_sent(message, constants.MessageSendResult.Timeout)
+
+    def _queue_message(self, message, size=0, future=False):
+        message.idle_time = self._counter.get_current_ms()
+        message.state = constants.MessageState.WaitingToBeSent
+        if self._msg_timeout > 0:
+            self._scheduler.add_deadline(message, message.idle_time + self._msg_timeout)
+        if not future:
+            self._scheduler.queue(message)
+        elif self._shutdown:
+            # The client has been closed, so the outcome will not be known.
+            future = self._create_future()
+            future.cancel()
+            self._scheduler.queue(message)
+        else:
+            future = self._create_future()
+            self._scheduler.admit(message, size, future)
+        if self._pump:
+            self._pump.wake()
+        return future or None
+
     def _get_msg_timeout(self, message):
         current_time = self._counter.get_current_ms()
         elapsed_time = (current_time - message.idle_time)
@@ -616,29 +735,67 @@ class SendClient(AMQPClient):
             _logger.info("Message not sent, raising RuntimeError.")
             raise RuntimeError("Message sender failed to add message data to outgoing queue.")
 
-    def _filter_pending(self):
-        filtered = []
-        for message in self._pending_messages:
-            if message.state in constants.DONE_STATES:
+    def _transfer_messages(self, messages, timeouts):
+        try:
+            results = self.message_handler.send_many(messages, self._on_message_sent, timeout=timeouts)
+        except Exception:  # pylint: disable=broad-except
+            # None of the messages were added to the queue.
+            results = []
+        self._process_transfer_results(messages, results)
+        # Send the messages that were not added individually, so that the error
+        # is only reported for the message it applies to.
+        for message, timeout in zip(messages[len(results):], timeouts[len(results):]):
+            try:
+                self._transfer_message(message, timeout)
+            except Exception as exp:  # pylint: disable=broad-except
+                self._on_message_sent(message, constants.MessageSendResult.Error, delivery_state=exp)
+
+    def _process_transfer_results(self, messages, results):
+        for message, sent in zip(messages, results):
+            if not sent:
+                _logger.info("Message not sent, raising RuntimeError.")
+                exp = RuntimeError("Message sender failed to add message data to outgoing queue.")
+                self._on_message_sent(message, constants.MessageSendResult.Error, delivery_state=exp)
+
+    def _take_pending(self):
+        """Take the messages that are waiting to be sent, failing any that have
+        expired, along with the send timeout for each.
+
+        :rtype: tuple[list[~uamqp.message.Message], list[int]]
+        """
+        messages = []
+        timeouts = []
+        for message in self._scheduler.take_to_send():
+            if message.state != constants.MessageState.WaitingToBeSent:
                 continue
-            elif message.state == constants.MessageState.WaitingForSendAck:
-                self._waiting_messages += 1
-            elif message.state == constants.MessageState.WaitingToBeSent:
-                message.state = constants.MessageState.WaitingForSendAck
-                try:
-                    timeout = self._get_msg_timeout(message)
-                    if timeout is None:
-                        self._on_message_sent(message, constants.MessageSendResult.Timeout)
-                        if message.state != constants.MessageState.WaitingToBeSent:
-                            continue
-                    else:
-                        self._transfer_message(message, timeout)
-                except Exception as exp:  # pylint: disable=broad-except
-                    self._on_message_sent(message, constants.MessageSendResult.Error, delivery_state=exp)
-                    if message.state != constants.MessageState.WaitingToBeSent:
-                        continue
-            filtered.append(message)
-        return filtered
+            message.state = constants.MessageState.WaitingForSendAck
+            self._scheduler.transferred(message)
+            timeout = self._get_msg_timeout(message)
+            if timeout is None:
+                self._on_message_sent(message, constants.MessageSendResult.Timeout)
+            else:
+                messages.append(message)
+                timeouts.append(timeout)
+        return messages, timeouts
+
+    def _get_backoff(self):
+        """The number of seconds for which sending is held back after the service
+        told the client to back off. This is a deadline rather than a sleep, so that
+        the Connection continues to be serviced for other links and heartbeats.
+
+        :rtype: float
+        """
+        now = self._counter.get_current_ms()
+        if self._backoff:
+            _logger.info("Client told to backoff - holding back sends for %r seconds", self._backoff)
+            self._scheduler.back_off(now + int(self._backoff * 1000))
+            self._backoff = 0
+        return max(self._scheduler.not_before - now, 0) / 1000.0
+
+    def _send_pending(self):
+        messages, timeouts = self._take_pending()
+        if messages:
+            self._transfer_messages(messages, timeouts)
 
     def _client_run(self):
         """MessageSender Link is now open - perform message send
@@ -653,14 +810,28 @@ class SendClient(AMQPClient):
         self._connection.work()
         if self._connection._state == c_uamqp.ConnectionState.DISCARDING:
             raise errors.ConnectionClose(constants.ErrorCodes.InternalServerError)
-        self._waiting_messages = 0
-        self._pending_messages = self._filter_pending()
-        if self._backoff and not self._waiting_messages:
-            _logger.info("Client told to backoff - sleeping for %r seconds", self._backoff)
-            self._connection.sleep(self._backoff)
-            self._backoff = 0
+        backoff = self._get_backoff()
+        if backoff:
+            self._connection.wait(backoff)
+        else:
+            self._send_pending()
         return True
 
+    def _pump_run(self):
+        self._expire_messages()
+        self.message_handler.work()
+        if not self._get_backoff():
+            self._send_pending()
+        return True
+
+    def _pump_wait(self):
+        backoff = self._get_backoff()
+        if backoff:
+            return min(backoff, constants.MAX_IDLE_WAIT_SECS)
+        if self._scheduler.to_send:
+            return 0
+        return constants.MAX_IDLE_WAIT_SECS
+
     @property
     def _message_sender(self):
         """Temporary property to support backwards compatibility
@@ -670,7 +841,7 @@ class SendClient(AMQPClient):
 
     @property
     def pending_messages(self):
-        return [m for m in self._pending_messages if m.state in constants.PENDING_STATES]
+        return [m for m in self._scheduler.pending() if m.state in constants.PENDING_STATES]
 
     def redirect(self, redirect, auth):
         """Redirect the client endpoint using a Link DETACH redirect
@@ -688,11 +859,24 @@ class SendClient(AMQPClient):
         if self.message_handler:
             self.message_handler.destroy()
             self.message_handler = None
-        self._pending_messages = []
+        self._scheduler.cancel()
+        self._scheduler = _SendScheduler()
         self._remote_address = address.Target(redirect.address)
         self._redirect(redirect, auth)
 
-    def queue_message(self, *messages):
+    def close(self):
+        """Close down the client. No further messages can be sent
+        and the client cannot be re-opened.
+
+        All pending, unsent messages will remain uncleared to allow
+        them to be inspected and queued to a new client. The futures
+        of any messages in the send window are cancelled, as their
+        outcome will not be known.
+        """
+        super(SendClient, self).close()
+        self._scheduler.cancel()
+
+    def queue_message(self, *messages, futures=False):
         """Add one or more messages to the send queue.
         No further action will be taken until either `SendClient.wait()`
         or `SendClient.send_all_messages()` has been called.
@@ -702,15 +886,59 @@ class SendClient(AMQPClient):
             - `send_client.queue_message(message_1, message_2, message_3)`
             - `send_client.queue_message(*my_message_list)`
 
+        If the client has a maximum number or size of messages in flight, this will
+        open and work the client until there is room for each message in the send window.
+
         :param messages: A message to send. This can either be a single instance
          of `Message`, or multiple messages wrapped in an instance of `BatchMessage`.
         :type message: ~uamqp.message.Message
+        :param futures: Whether to return a future for each message queued. The future is
+         resolved once the outcome of the message is known, with an exception if the message
+         failed to send. Futures are always returned if the client has a maximum number or
+         size of messages in flight. Default is `False`.
+        :type futures: bool
+        :rtype: list[~concurrent.futures.Future] or None
         """
+        futures = futures or self._windowed
+        queued = []
         for message in messages:
             for internal_message in message.gather():
-                internal_message.idle_time = self._counter.get_current_ms()
-                internal_message.state = constants.MessageState.WaitingToBeSent
-                self._pending_messages.append(internal_message)
+                size = self._get_window_size(internal_message) if self._windowed else 0
+                self._wait_for_window(size)
+                queued.append(self._queue_message(internal_message, size, futures))
+        return queued if futures else None
+
+    def send_presettled(self, *messages):
+        """Send messages as fire-and-forget, on a client with a send settle mode
+        of `Settled`. The messages are sent immediately rather than queued, and
+        their state, timeouts and retries are not tracked: `on_send_complete` is
+        not run, and the state of each message is left unchanged. The client is
+        opened and worked until ready if needed, and must then be worked for
+        the messages to be written to the network.
+
+        :param messages: The messages to send. Each can be a ~uamqp.message.Message
+         or ~uamqp.message.BatchMessage, or bytes to be sent as the body of a message.
+        :type messages: ~uamqp.message.Message or bytes
+        :returns: The number of messages sent. Sending stops at the first message that
+         could not be added to the outgoing queue.
+        :rtype: int
+        """
+        if self._send_settle_mode != constants.SenderSettleMode.Settled:
+            raise ValueError("Presettled messages can only be sent with a send settle mode of Settled.")
+        self.open()
+        while not self.client_ready():
+            if self._shutdown:
+                return 0
+        return self.message_handler.send_presettled(self._gather_presettled(messages))
+
+    def _gather_presettled(self, messages):  # pylint: disable=no-self-use
+        values = []
+        for message in messages:
+            try:
+                values.extend(message.gather())
+            except AttributeError:
+                values.append(message)
+        return values
 
     def send_message(self, messages, close_on_done=False):
         """Send a single message or batched message.
@@ -727,12 +955,17 @@ class SendClient(AMQPClient):
         pending_batch = []
         for message in batch:
             message.idle_time = self._counter.get_current_ms()
-            self._pending_messages.append(message)
+            if self._msg_timeout > 0:
+                self._scheduler.add_deadline(message, message.idle_time + self._msg_timeout)
+            self._scheduler.queue(message)
             pending_batch.append(message)
+        if self._pump:
+            self._pump.wake()
         self.open()
         running = True
         try:
-            while running and any([m for m in pending_batch if m.state not in constants.DONE_STATES]):
+            done = _CompletionCursor(pending_batch)
+            while running and not done.complete():
                 running = self.do_work()
             failed = [m for m in pending_batch if m.state == constants.MessageState.SendFailed]
             if any(failed):
@@ -747,13 +980,27 @@ class SendClient(AMQPClient):
             if close_on_done or not running:
                 self.close()
 
+    def do_work(self):
+        """Run a single connection iteration.
+        This will return `True` if the connection is still open
+        and ready to be used for further work, or `False` if it needs
+        to be shut down. Messages that have not been sent within the message
+        timeout are failed, whether or not the client is ready.
+
+        :rtype: bool
+        :raises: TimeoutError or ~uamqp.errors.ClientTimeout if CBS authentication timeout reached.
+        """
+        if not self._pump:
+            self._expire_messages()
+        return super(SendClient, self).do_work()
+
     def messages_pending(self):
         """Check whether the client is holding any unsent
         messages in the queue.
 
         :rtype: bool
         """
-        return bool(self._pending_messages)
+        return bool(self._scheduler)
 
     def wait(self):
         """Run the client until all pending message in the queue
@@ -781,7 +1028,7 @@ class SendClient(AMQPClient):
         self.open()
         running = True
         try:
-            messages = self._pending_messages[:]
+            messages = self._scheduler.pending()
             running = self.wait()
             results = [m.state for m in messages]
             return results
@@ -827,11 +1074,17 @@ class ReceiveClient(AMQPClient):
     :param error_policy: A policy for parsing errors on link, connection and message
      disposition to determine whether the error should be retryable.
     :type error_policy: ~uamqp.errors.ErrorPolicy
-    :param keep_alive_interval: If set, a thread will be started to keep the connection
-     alive during periods of user inactivity. The value will determine how long the
-     thread will sleep (in seconds) between pinging the connection. If 0 or None, no
-     thread will be started.
+    :param keep_alive_interval: If set, the connection will be kept alive during periods
+     of user inactivity by a keep-alive scheduler shared by all clients. The value will
+     determine how long to wait (in seconds) between pinging the connection. If 0 or None,
+     the connection will not be kept alive.
     :type keep_alive_interval: int
+    :param heartbeat: If set, the connection is kept alive by sending an empty frame only
+     when one is needed to satisfy the remote idle timeout and the
+     `remote_idle_timeout_empty_frame_send_ratio`, timed from when the last frame was
+     sent and received, instead of being pinged every `keep_alive_interval`.
+     Default is `False`.
+    :type heartbeat: bool
     :param send_settle_mode: The mode by which to settle message send
      operations. If set to `Unsettled`, the client will wait for a confirmation
      from the service that the message was successfully sent. If set to 'Settled',
@@ -892,7 +1145,7 @@ class ReceiveClient(AMQPClient):
         self._was_message_received = False
         self._message_received_callback = None
         self._streaming_receive = False
-        self._received_messages = compat.queue.Queue()
+        self._received_messages = _MessageBuffer()
 
         self._shutdown_after_timeout = kwargs.pop('shutdown_after_timeout', True)
         self._timeout_reached = False
@@ -956,6 +1209,20 @@ class ReceiveClient(AMQPClient):
         self.message_handler._link.set_prefetch_count(self._prefetch)  # pylint: disable=protected-access
         return True
 
+    def _get_idle_wait(self, now):
+        """The length of time in seconds to wait for incoming data before
+        the receive timeout needs to be checked again.
+
+        :param now: The current tick count in milliseconds.
+        :type now: int
+        :rtype: float
+        """
+        wait = constants.MAX_IDLE_WAIT_SECS
+        if self._timeout > 0:
+            remaining = self._timeout - (now - self._last_activity_timestamp)
+            wait = min(wait, max(remaining, 0) / 1000.0)
+        return wait
+
     def _client_run(self):
         """MessageReceiver Link is now open - start receiving messages.
         Will return True if operation successful and client can remain open for
@@ -967,8 +1234,30 @@ class ReceiveClient(AMQPClient):
         self._connection.work()
         now = self._counter.get_current_ms()
         if self._last_activity_timestamp and not self._was_message_received:
-            # If no messages are coming through, back off a little to keep CPU use low.
-            time.sleep(0.05)
+            # If no messages are coming through, wait for the connection socket to become
+            # readable rather than polling, bounded by the receive timeout.
+            self._connection.wait(self._get_idle_wait(now))
+        self._update_activity(now)
+        return True
+
+    def _pump_run(self):
+        self.message_handler.work()
+        self._update_activity(self._counter.get_current_ms())
+        return True
+
+    def _pump_wait(self):
+        if self._last_activity_timestamp:
+            return self._get_idle_wait(self._counter.get_current_ms())
+        return constants.MAX_IDLE_WAIT_SECS
+
+    def _update_activity(self, now):
+        """Check the receive timeout if no messages have been received since the
+        last iteration, otherwise reset the time of the last activity.
+
+        :param now: The current tick count in milliseconds.
+        :type now: int
+        """
+        if self._last_activity_timestamp and not self._was_message_received:
             if self._timeout > 0:
                 timespan = now - self._last_activity_timestamp
                 if timespan >= self._timeout:
@@ -982,7 +1271,6 @@ class ReceiveClient(AMQPClient):
         else:
             self._last_activity_timestamp = now
         self._was_message_received = False
-        return True
 
     def _complete_message(self, message, auto):  # pylint: disable=no-self-use
         if not message or not auto:
@@ -1003,11 +1291,10 @@ class ReceiveClient(AMQPClient):
         message = None
         try:
             while receiving and not self._timeout_reached:
-                while receiving and self._received_messages.empty() and not self._timeout_reached:
+                while receiving and not self._received_messages and not self._timeout_reached:
                     receiving = self.do_work()
-                while not self._received_messages.empty():
+                while self._received_messages:
                     message = self._received_messages.get()
-                    self._received_messages.task_done()
                     yield message
                     self._complete_message(message, auto_complete)
         finally:
@@ -1068,34 +1355,22 @@ class ReceiveClient(AMQPClient):
                 'Maximum batch size cannot be greater than the '
                 'connection link credit: {}'.format(self._prefetch))
         timeout = self._counter.get_current_ms() + timeout if timeout else 0
-        expired = False
         self.open()
         receiving = True
-        batch = []
-        while not self._received_messages.empty() and len(batch) < max_batch_size:
-            batch.append(self._received_messages.get())
-            self._received_messages.task_done()
-        if len(batch) >= max_batch_size:
-            return batch
+        if len(self._received_messages) >= max_batch_size:
+            return self._received_messages.take(max_batch_size)
 
         self._timeout_reached = False
         self._last_activity_timestamp = None
-        while receiving and not expired and len(batch) < max_batch_size and not self._timeout_reached:
-            while receiving and self._received_messages.qsize() < max_batch_size and not self._timeout_reached:
-                if timeout and self._counter.get_current_ms() > timeout:
-                    expired = True
-                    break
-                before = self._received_messages.qsize()
-                receiving = self.do_work()
-                received = self._received_messages.qsize() - before
-                if self._received_messages.qsize() > 0 and received == 0:
-                    # No new messages arrived, but we have some - so return what we have.
-                    expired = True
-                    break
-            while not self._received_messages.empty() and len(batch) < max_batch_size:
-                batch.append(self._received_messages.get())
-                self._received_messages.task_done()
-        return batch
+        while receiving and len(self._received_messages) < max_batch_size and not self._timeout_reached:
+            if timeout and self._counter.get_current_ms() > timeout:
+                break
+            received = self._received_messages.received
+            receiving = self.do_work()
+            if self._received_messages and self._received_messages.received == received:
+                # No new messages arrived, but we have some - so return what we have.
+                break
+        return self._received_messages.take(max_batch_size)
 
     def receive_messages(self, on_message_received):
         """Receive messages. This function will run indefinitely, until the client
@@ -1141,6 +1416,38 @@ class ReceiveClient(AMQPClient):
         self._message_received_callback = on_message_received
         return self._message_generator()
 
+    def settle_batch(self, messages, outcome):
+        """Settle a number of received messages with the same outcome. Rather than
+        sending a disposition for each message, the delivery numbers of the messages
+        are grouped into contiguous ranges, and a single disposition is sent for each range.
+        Messages that have already been settled will be skipped.
+
+        :param messages: The received messages to settle.
+        :type messages: list[~uamqp.message.Message]
+        :param outcome: The disposition with which to settle the messages, for example
+         `~uamqp.errors.MessageAccepted()`.
+        :type outcome: ~uamqp.errors.MessageResponse
+        :raises: TypeError if any of the messages is being sent rather than received.
+        """
+        # pylint: disable=protected-access
+        to_settle = {}
+        for message in messages:
+            if not message._can_settle_message():
+                continue
+            # The receiver of the message may not be the current message
+            # handler if the client has reconnected.
+            if message._receiver is None:
+                message._response = outcome
+                message._settler(outcome)
+                message.state = constants.MessageState.ReceivedSettled
+            else:
+                to_settle.setdefault(message._receiver, []).append(message)
+        for receiver, received in to_settle.items():
+            receiver.settle_messages([m.delivery_no for m in received], outcome)
+            for message in received:
+                message._response = outcome
+                message.state = constants.MessageState.ReceivedSettled
+
     def redirect(self, redirect, auth):
         """Redirect the client endpoint using a Link DETACH redirect
         response.
@@ -1160,7 +1467,191 @@ class ReceiveClient(AMQPClient):
         self._shutdown = False
         self._last_activity_timestamp = None
         self._was_message_received = False
-        self._received_messages = compat.queue.Queue()
+        self._received_messages = _MessageBuffer()
 
         self._remote_address = address.Source(redirect.address)
         self._redirect(redirect, auth)
+
+
+class _MessageBuffer(object):
+    """Buffer of received messages for a receive client.
+
+    Messages can be added by any thread working the connection, such as the
+    keep-alive thread, so only the atomic operations of a deque are used.
+    """
+
+    def __init__(self):
+        self._messages = collections.deque()
+        self.received = 0
+
+    def __len__(self):
+        return len(self._messages)
+
+    def empty(self):
+        return not self._messages
+
+    def qsize(self):
+        return len(self._messages)
+
+    def put(self, message):
+        self._messages.append(message)
+        self.received += 1
+
+    def get(self):
+        return self._messages.popleft()
+
+    def take(self, max_count):
+        """Remove and return up to `max_count` messages in the order they were received.
+
+        :rtype: list[~uamqp.message.Message]
+        """
+        popleft = self._messages.popleft
+        return [popleft() for _ in range(min(max_count, len(self._messages)))]
+
+
+class _SendScheduler(object):
+    """Tracks the messages of a send client. Messages waiting to be sent are
+    held in order, and messages that have been transferred are held separately
+    until their outcome is known, so every change of state is O(1).
+
+    Messages queued by a windowed client are also held in the send window, along
+    with their encoded size and future, until their final outcome is known. The
+    window is guarded by a lock, as a client attached to a ConnectionPump queues
+    messages on the caller's thread while their outcomes arrive on the pump thread.
+
+    Send deadlines are held in a min-heap, so that expired messages can be found
+    without checking every pending message. Entries for messages that complete
+    before their deadline are discarded lazily.
+
+    If the service tells the client to back off, no messages are sent before
+    `not_before`, in milliseconds.
+    """
+
+    def __init__(self):
+        self._to_send = collections.deque()
+        self._awaiting_ack = {}
+        self._window = {}
+        self._window_lock = threading.Lock()
+        self.window_bytes = 0
+        self._deadlines = []
+        self._sequence = itertools.count()
+        self.not_before = 0
+
+    def __len__(self):
+        return len(self._to_send) + len(self._awaiting_ack)
+
+    @property
+    def to_send(self):
+        return len(self._to_send)
+
+    @property
+    def awaiting_ack(self):
+        return len(self._awaiting_ack)
+
+    @property
+    def window_count(self):
+        return len(self._window)
+
+    def window_usage(self):
+        """The number and total size of the messages in the send window.
+
+        :rtype: tuple[int, int]
+        """
+        with self._window_lock:
+            return len(self._window), self.window_bytes
+
+    def queue(self, message):
+        self._to_send.append(message)
+
+    def admit(self, message, size, future):
+        """Add a message to the send window and queue it to be sent."""
+        with self._window_lock:
+            self._window[id(message)] = (size, future)
+            self.window_bytes += size
+        self.queue(message)
+
+    def release(self, message):
+        """Remove a message from the send window once its outcome is known.
+
+        :returns: The future of the message, or None if it is not in the window.
+        :rtype: ~concurrent.futures.Future or ~asyncio.Future
+        """
+        with self._window_lock:
+            try:
+                size, future = self._window.pop(id(message))
+            except KeyError:
+                return None
+            self.window_bytes -= size
+        return future
+
+    def add_deadline(self, message, deadline):
+        """Track the time in milliseconds by which a message must be sent."""
+        heapq.heappush(self._deadlines, (deadline, next(self._sequence), message))
+        if len(self._deadlines) > 2 * len(self) + 64:
+            # Drop the entries of messages that have already completed.
+            self._deadlines = [d for d in self._deadlines if d[2].state in constants.PENDING_STATES]
+            heapq.heapify(self._deadlines)
+
+    def pop_expired(self, now):
+        """Remove and return the messages waiting to be sent whose deadline
+        has passed. Messages that have been transferred are left to expire in
+        the C message sender.
+
+        :rtype: list[~uamqp.message.Message]
+        """
+        expired = []
+        while self._deadlines and self._deadlines[0][0] <= now:
+            message = heapq.heappop(self._deadlines)[2]
+            if message.state == constants.MessageState.WaitingToBeSent:
+                expired.append(message)
+        return expired
+
+    def back_off(self, until):
+        self.not_before = max(self.not_before, until)
+
+    def cancel(self):
+        """Remove all messages from the send window, cancelling their futures."""
+        with self._window_lock:
+            window = list(self._window.values())
+            self._window.clear()
+            self.window_bytes = 0
+        for _, future in window:
+            future.cancel()
+
+    def take_to_send(self):
+        """Remove and return the messages currently waiting to be sent. Messages
+        queued while these are being processed are left for the next call.
+
+        :rtype: list[~uamqp.message.Message]
+        """
+        popleft = self._to_send.popleft
+        return [popleft() for _ in range(len(self._to_send))]
+
+    def transferred(self, message):
+        self._awaiting_ack[id(message)] = message
+
+    def completed(self, message):
+        self._awaiting_ack.pop(id(message), None)
+
+    def pending(self):
+        """All messages that are waiting to be sent or acknowledged.
+
+        :rtype: list[~uamqp.message.Message]
+        """
+        return list(self._to_send) + list(self._awaiting_ack.values())
+
+
+class _CompletionCursor(object):
+    """Checks whether every message in a batch has completed, without rescanning
+    the messages already known to be complete.
+    """
+
+    def __init__(self, messages):
+        self._messages = messages
+        self._index = 0
+
+    def complete(self):
+        while self._index < len(self._messages) and \
+                self._messages[self._index].state in constants.DONE_STATES:
+            self._index += 1
+        return self._index == len(self._messages)
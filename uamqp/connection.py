@@ -4,16 +4,40 @@
 # license information.
 #--------------------------------------------------------------------------
 
+import heapq
+import itertools
 import logging
+import select
 import threading
 import time
 import uuid
 
 import six
 import uamqp
-from uamqp import c_uamqp, compat, errors, utils
+from uamqp import c_uamqp, compat, constants, errors, utils
 
 _logger = logging.getLogger(__name__)
+_KEEP_ALIVE_RETRY_SECS = 0.1
+_IDLE_POLL_SECS = 0.05
+
+
+def _wait_readable(socket_fd, timeout, wakeup_fd=None, writable=False):
+    """Block until the socket (or the optional wakeup socket) is readable,
+    or until the socket is writable if `writable` is set, or the timeout
+    (in seconds) elapses."""
+    read_fds = [fd for fd in (socket_fd, wakeup_fd) if fd is not None]
+    write_fds = [socket_fd] if writable and socket_fd is not None else []
+    try:
+        if hasattr(select, 'poll'):
+            poller = select.poll()
+            for fd in read_fds:
+                poller.register(fd, select.POLLIN | select.POLLOUT if fd in write_fds else select.POLLIN)
+            return bool(poller.poll(int(timeout * 1000)))
+        readable, writable, _ = select.select(read_fds, write_fds, [], timeout)
+        return bool(readable or writable)
+    except (OSError, ValueError, select.error) as e:
+        _logger.debug("Failed to wait on connection socket: %r", e)
+        return False
 
 
 class Connection(object):
@@ -87,6 +111,7 @@ class Connection(object):
         self._settings = {}
         self._error = None
         self._closing = False
+        self._socket_fd = None
 
         if max_frame_size:
             self._settings['max_frame_size'] = max_frame_size
@@ -238,6 +263,7 @@ class Connection(object):
             self.hostname = redirect_error.hostname
             self.auth = auth
             self._conn = self._create_connection(auth)
+            self._socket_fd = None
             for setting, value in self._settings.items():
                 setattr(self, setting, value)
             self._error = None
@@ -263,6 +289,205 @@ class Connection(object):
         finally:
             self.release()
 
+    def _get_socket_fd(self):
+        if self._socket_fd is None:
+            socket_fd = self._conn.get_socket_fd()
+            if socket_fd is not None:
+                self._socket_fd = socket_fd
+            elif self._state == c_uamqp.ConnectionState.OPENED:
+                # The transport is open but does not expose a socket.
+                self._socket_fd = -1
+        if self._socket_fd is None or self._socket_fd < 0:
+            return None
+        return self._socket_fd
+
+    def _get_wait_params(self, timeout):
+        deadline = self._conn.handle_deadlines()
+        if deadline is not None:
+            timeout = min(timeout, deadline / 1000.0)
+        if self._state != c_uamqp.ConnectionState.OPENED:
+            return None, timeout, False
+        return self._get_socket_fd(), timeout, self.wants_write()
+
+    def wait(self, timeout, wakeup=None):
+        """Block until the Connection socket has incoming data, or until the
+        next Connection deadline (local idle timeout or remote heartbeat) is due,
+        for at most `timeout` seconds. If the Connection has outgoing data queued,
+        this will also return once the socket is writable. The Connection is not
+        locked while waiting. If the underlying transport does not expose a socket,
+        this will instead sleep for a short polling interval.
+
+        :param timeout: Maximum length of time to wait in seconds.
+        :type timeout: float
+        :param wakeup: An optional socket or file descriptor that ends the wait
+         early when it becomes readable.
+        :type wakeup: int or ~socket.socket
+        :returns: Whether the socket (or the wakeup socket) became ready.
+        :rtype: bool
+        """
+        try:
+            self.lock()
+            socket_fd, timeout, writable = self._get_wait_params(timeout)
+        except compat.TimeoutException:
+            _logger.debug("Connection %r timed out while waiting for lock acquisition.", self.container_id)
+            return False
+        finally:
+            self.release()
+        wakeup_fd = wakeup.fileno() if hasattr(wakeup, 'fileno') else wakeup
+        if socket_fd is None:
+            timeout = min(timeout, _IDLE_POLL_SECS)
+            if wakeup_fd is None:
+                time.sleep(timeout)
+            else:
+                _wait_readable(None, timeout, wakeup_fd)
+            return False
+        return _wait_readable(socket_fd, timeout, wakeup_fd, writable=writable)
+
+    def work_until_idle(self, max_iterations=10):
+        """Perform Connection iterations until there is no more incoming data
+        ready to be processed. This will not block waiting for data to arrive, so it
+        can be called whenever the socket returned by `fileno()` is reported as ready.
+
+        :param max_iterations: The maximum number of iterations to perform, so that
+         a busy Connection does not starve any others. Default is 10.
+        :type max_iterations: int
+        """
+        try:
+            raise self._error
+        except TypeError:
+            pass
+        except Exception as e:
+            _logger.warning("%r", e)
+            raise
+        try:
+            self.lock()
+            for _ in range(max_iterations):
+                self._conn.do_work()
+                socket_fd = self._get_socket_fd()
+                if socket_fd is None or not _wait_readable(socket_fd, 0):
+                    break
+        except compat.TimeoutException:
+            _logger.debug("Connection %r timed out while waiting for lock acquisition.", self.container_id)
+        finally:
+            self.release()
+
+    def fileno(self):
+        """The file descriptor of the socket underlying the Connection, allowing
+        it to be registered with `select`, `selectors` or an event loop reader.
+        The socket is created once the Connection starts to open, so until then
+        the Connection must be driven with `work()`. The descriptor changes if the
+        Connection is redirected.
+
+        :raises: ValueError if the underlying transport does not expose a socket.
+        :rtype: int
+        """
+        socket_fd = self._get_socket_fd()
+        if socket_fd is None:
+            raise ValueError("Connection {} has no socket available.".format(self.container_id))
+        return socket_fd
+
+    def wants_read(self):
+        """Whether the Connection is still expecting incoming data, and so
+        should be registered for read readiness.
+
+        :rtype: bool
+        """
+        return not self._closing and self._state not in (
+            c_uamqp.ConnectionState.END,
+            c_uamqp.ConnectionState.ERROR)
+
+    def wants_write(self):
+        """Whether the Connection has outgoing data queued because the socket
+        could not accept it. If so, the Connection should be worked again once
+        the socket is writable.
+
+        :rtype: bool
+        """
+        return bool(self._conn.has_pending_io())
+
+    def get_next_timeout(self):
+        """The length of time until the next Connection deadline (local idle
+        timeout or remote heartbeat) is due, after which the Connection should be
+        worked even if the socket has not become ready. Any heartbeat that is already
+        due will be sent.
+
+        :returns: The time in seconds, or `None` if there is no deadline.
+        :rtype: float
+        """
+        self.lock()
+        try:
+            deadline = self._conn.handle_deadlines()
+        finally:
+            self.release()
+        return None if deadline is None else deadline / 1000.0
+
+    def _heartbeat(self):
+        socket_fd = self._get_socket_fd() if self._state == c_uamqp.ConnectionState.OPENED else None
+        if socket_fd is None or _wait_readable(socket_fd, 0):
+            self._conn.do_work()
+        deadline = self._conn.handle_deadlines()
+        if self._conn.has_pending_io():
+            self._conn.do_work()
+        return None if deadline is None else deadline / 1000.0
+
+    def heartbeat(self):
+        """Keep the Connection alive based on when the last frame was sent and
+        received, rather than on a fixed interval. An empty frame is only sent if no
+        other frame has been sent within the remote idle timeout, scaled by the
+        `remote_idle_timeout_empty_frame_send_ratio`. Incoming data is only
+        processed if the socket is readable.
+
+        :returns: The time in seconds until the next heartbeat or idle timeout
+         is due, or `None` if neither end of the Connection has an idle timeout.
+        :rtype: float
+        """
+        try:
+            raise self._error
+        except TypeError:
+            pass
+        except Exception as e:
+            _logger.warning("%r", e)
+            raise
+        try:
+            self.lock()
+            return self._heartbeat()
+        except compat.TimeoutException:
+            _logger.debug("Connection %r timed out while waiting for lock acquisition.", self.container_id)
+            return constants.MAX_IDLE_WAIT_SECS
+        finally:
+            self.release()
+
+    def _try_keep_alive(self, heartbeat):
+        """Keep the Connection alive on behalf of the keep-alive scheduler. This does
+        not wait for the Connection lock, so that a Connection that is being worked by
+        a client does not hold up the keep-alive of every other Connection.
+
+        :param heartbeat: Whether to keep the Connection alive as for `heartbeat`,
+         rather than with a single Connection iteration.
+        :type heartbeat: bool
+        :returns: Whether the Connection was kept alive, and the time in seconds until
+         the next heartbeat is due.
+        :rtype: tuple[bool, float]
+        """
+        try:
+            raise self._error
+        except TypeError:
+            pass
+        except Exception as e:
+            _logger.warning("%r", e)
+            raise
+        try:
+            self.lock(timeout=0)
+        except compat.TimeoutException:
+            return False, None
+        try:
+            if heartbeat:
+                return True, self._heartbeat()
+            self._conn.do_work()
+            return True, None
+        finally:
+            self.release()
+
     def sleep(self, seconds):
         """Lock the connection for a given number of seconds.
 
@@ -314,3 +539,168 @@ class Connection(object):
     @property
     def remote_max_frame_size(self):
         return self._conn.remote_max_frame_size
+
+
+class _KeepAliveEntry(object):
+    """The keep-alive state of a single Connection, shared by all of
+    the clients that registered it. An interval of `None` requests a
+    heartbeat instead of a fixed interval.
+    """
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.intervals = []
+        self.deadline = None
+        self.pending = None
+
+    @property
+    def interval(self):
+        intervals = [i for i in self.intervals if i is not None]
+        return min(intervals) if intervals else None
+
+    @property
+    def heartbeat(self):
+        return None in self.intervals
+
+    def get_delay(self, due=None):
+        """The length of time in seconds until the Connection next needs to be
+        kept alive, or `None` if it does not.
+
+        :param due: The time until the next heartbeat is due, as returned
+         by `Connection.heartbeat`.
+        :type due: float
+        :rtype: float
+        """
+        if not self.heartbeat:
+            return self.interval
+        # pylint: disable=protected-access
+        if due is None and self.connection._state != c_uamqp.ConnectionState.OPENED:
+            # The remote idle timeout is only known once the Connection is open.
+            due = constants.MAX_IDLE_WAIT_SECS
+        delays = [d for d in (due, self.interval) if d is not None]
+        return min(delays) if delays else None
+
+    def keep_alive(self):
+        """Keep the Connection alive. If the Connection is locked by a client, it is
+        not waited for, and is instead tried again after a short delay.
+
+        :returns: The delay in seconds until the Connection next needs to be kept alive.
+        :rtype: float
+        """
+        kept_alive, due = self.connection._try_keep_alive(self.heartbeat)  # pylint: disable=protected-access
+        if not kept_alive:
+            return _KEEP_ALIVE_RETRY_SECS
+        if not self.heartbeat:
+            return self.interval
+        return self.get_delay(due)
+
+
+class KeepAliveScheduler(object):
+    """Keeps Connections alive during periods of user inactivity from a single
+    timer thread. The next keep-alive deadline of every registered Connection is
+    held in a heap, and the thread sleeps until the earliest one is due.
+
+    Each distinct Connection is worked once per interval, however many clients
+    have registered it. If clients sharing a Connection request different
+    intervals, the shortest is used. A client can instead register for heartbeats,
+    in which case the Connection is kept alive when its next heartbeat or idle
+    timeout is due, based on when the last frame was sent and received.
+
+    The thread does not wait for the lock of a Connection that is in use by a client
+    when its keep-alive is due. The Connection is tried again shortly instead, so
+    that it does not hold up the keep-alive of the other Connections.
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._deadlines = []
+        self._sequence = itertools.count()
+        self._counter = c_uamqp.TickCounter()
+        self._condition = threading.Condition()
+        self._thread = None
+
+    def _schedule(self, entry, delay):
+        if delay is None:
+            entry.deadline = None
+            return
+        entry.deadline = self._counter.get_current_ms() + delay * 1000
+        heapq.heappush(self._deadlines, (entry.deadline, next(self._sequence), entry))
+
+    def register(self, connection, interval):
+        """Start keeping a Connection alive.
+
+        :param connection: The Connection to keep alive.
+        :type connection: ~uamqp.connection.Connection
+        :param interval: The length of time in seconds between pinging the Connection,
+         or `None` to send heartbeats as required by the idle timeout of the Connection.
+        :type interval: int
+        """
+        with self._condition:
+            entry = self._entries.get(id(connection))
+            if entry is None:
+                entry = _KeepAliveEntry(connection)
+                self._entries[id(connection)] = entry
+            first_heartbeat = interval is None and not entry.heartbeat
+            entry.intervals.append(interval)
+            if first_heartbeat or (not entry.heartbeat and entry.interval == interval):
+                self._schedule(entry, 0 if first_heartbeat else entry.interval)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run)
+                self._thread.daemon = True
+                self._thread.start()
+            self._condition.notify()
+
+    def unregister(self, connection, interval):
+        """Stop keeping a Connection alive on behalf of one client. Once the last
+        client has unregistered, this will wait for any keep-alive iteration of
+        the Connection that is in progress to complete.
+
+        :param connection: The Connection to stop keeping alive.
+        :type connection: ~uamqp.connection.Connection
+        :param interval: The interval with which the Connection was registered.
+        :type interval: int
+        """
+        with self._condition:
+            entry = self._entries.get(id(connection))
+            if entry is None or entry.connection is not connection:
+                return
+            entry.intervals.remove(interval)
+            if entry.intervals:
+                return
+            del self._entries[id(connection)]
+            self._condition.notify_all()
+            while entry.pending:
+                self._condition.wait()
+
+    def _run(self):
+        with self._condition:
+            while self._entries:
+                now = self._counter.get_current_ms()
+                if not self._deadlines or self._deadlines[0][0] > now:
+                    timeout = (self._deadlines[0][0] - now) / 1000.0 if self._deadlines else None
+                    self._condition.wait(timeout)
+                    continue
+                deadline, _, entry = heapq.heappop(self._deadlines)
+                if entry.deadline != deadline or self._entries.get(id(entry.connection)) is not entry:
+                    continue  # Rescheduled or unregistered.
+                entry.pending = True
+                self._condition.release()
+                try:
+                    _logger.debug("Keeping connection %r alive.", entry.connection.container_id)
+                    delay = entry.keep_alive()
+                    failed = False
+                except Exception as e:  # pylint: disable=broad-except
+                    _logger.info("Connection keep-alive for %r failed: %r.", entry.connection.container_id, e)
+                    failed = True
+                finally:
+                    self._condition.acquire()
+                    entry.pending = None
+                    self._condition.notify_all()
+                if failed:
+                    self._entries.pop(id(entry.connection), None)
+                elif self._entries.get(id(entry.connection)) is entry:
+                    self._schedule(entry, delay)
+            self._thread = None
+
+
+KEEP_ALIVE_SCHEDULER = KeepAliveScheduler()
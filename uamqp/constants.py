@@ -15,6 +15,7 @@ AUTH_REFRESH_SECS = c_uamqp.AUTH_REFRESH_SECS
 BATCH_MESSAGE_FORMAT = c_uamqp.AMQP_BATCH_MESSAGE_FORMAT
 MAX_FRAME_SIZE_BYTES = c_uamqp.MAX_FRAME_SIZE_BYTES
 MAX_MESSAGE_LENGTH_BYTES = c_uamqp.MAX_MESSAGE_LENGTH_BYTES
+MAX_DELIVERY_NUMBER = 0xFFFFFFFF
 STRING_FILTER = b"apache.org:selector-filter:string"
 OPERATION = b"operation"
 READ_OPERATION = b"READ"
@@ -22,6 +23,7 @@ MGMT_TARGET = b"$management"
 
 # Deprecated - will be removed in future versions
 MESSAGE_SEND_RETRIES = 3
+MAX_IDLE_WAIT_SECS = 1.0
 ERROR_CONNECTION_REDIRECT = b"amqp:connection:redirect"
 ERROR_LINK_REDIRECT = b"amqp:link:redirect"
 
@@ -6,26 +6,201 @@
 
 # pylint: disable=too-many-lines
 
+import datetime
 import logging
+import uuid
 
 import six
-from uamqp import c_uamqp, constants, errors, utils
+from uamqp import c_uamqp, constants, errors, types, utils
 
 _logger = logging.getLogger(__name__)
 
 
+def _is_data_type(value):
+    """Whether a value can be sent as a body data section. This is either a str,
+    or bytes or any other object supporting the buffer protocol, for example a
+    bytearray, memoryview or mmap.
+
+    :rtype: bool
+    """
+    if isinstance(value, (six.text_type, six.binary_type)):
+        return True
+    try:
+        memoryview(value)
+    except TypeError:
+        return False
+    return True
+
+
+# Values that cannot be changed in place, and so can be kept in a cached section.
+_IMMUTABLE_SECTION_TYPES = (
+    type(None), bool, float, six.text_type, six.binary_type,
+    uuid.UUID, datetime.datetime, types.AMQPType) + six.integer_types
+
+
+class _SectionTracker(object):
+    """Tracks changes to a dictionary section of a message, and to any
+    dictionaries and lists nested in it, so that the cached C representation of
+    the section is only converted again once it has changed. A section that
+    contains a mutable value that cannot be tracked, for example a bytearray,
+    is converted again on every send.
+    """
+
+    def __init__(self):
+        self.changed = True
+        self.trackable = True
+
+    def track(self, value):
+        """Wrap a value of the section so that changes to it are tracked.
+
+        :rtype: object
+        """
+        if isinstance(value, _IMMUTABLE_SECTION_TYPES):
+            return value
+        if isinstance(value, dict):
+            return _SectionDict(self, value)
+        if isinstance(value, list):
+            return _SectionList(self, value)
+        if isinstance(value, tuple):
+            return tuple(self.track(v) for v in value)
+        self.trackable = False
+        return value
+
+
+class _SectionDict(dict):
+    """A dictionary that marks its section as changed whenever it is modified."""
+
+    def __init__(self, tracker, value=()):
+        self._tracker = tracker
+        super(_SectionDict, self).__init__(
+            (tracker.track(k), tracker.track(v)) for k, v in dict(value).items())
+
+    def __reduce__(self):
+        return dict, (dict(self),)
+
+    def __setitem__(self, key, value):
+        self._tracker.changed = True
+        super(_SectionDict, self).__setitem__(self._tracker.track(key), self._tracker.track(value))
+
+    def __delitem__(self, key):
+        self._tracker.changed = True
+        super(_SectionDict, self).__delitem__(key)
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+    def clear(self):
+        self._tracker.changed = True
+        super(_SectionDict, self).clear()
+
+    def pop(self, *args):
+        self._tracker.changed = True
+        return super(_SectionDict, self).pop(*args)
+
+    def popitem(self):
+        self._tracker.changed = True
+        return super(_SectionDict, self).popitem()
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def update(self, *args, **kwargs):  # pylint: disable=arguments-differ
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+
+class _SectionList(list):
+    """A list that marks its section as changed whenever it is modified."""
+
+    def __init__(self, tracker, value=()):
+        self._tracker = tracker
+        super(_SectionList, self).__init__(tracker.track(v) for v in value)
+
+    def __reduce__(self):
+        return list, (list(self),)
+
+    def __setitem__(self, index, value):
+        self._tracker.changed = True
+        if isinstance(index, slice):
+            value = [self._tracker.track(v) for v in value]
+        else:
+            value = self._tracker.track(value)
+        super(_SectionList, self).__setitem__(index, value)
+
+    def __delitem__(self, index):
+        self._tracker.changed = True
+        super(_SectionList, self).__delitem__(index)
+
+    def __iadd__(self, other):
+        self.extend(other)
+        return self
+
+    def __imul__(self, other):
+        self._tracker.changed = True
+        return super(_SectionList, self).__imul__(other)
+
+    def append(self, value):
+        self._tracker.changed = True
+        super(_SectionList, self).append(self._tracker.track(value))
+
+    def extend(self, values):
+        self._tracker.changed = True
+        super(_SectionList, self).extend(self._tracker.track(v) for v in values)
+
+    def insert(self, index, value):
+        self._tracker.changed = True
+        super(_SectionList, self).insert(index, self._tracker.track(value))
+
+    def pop(self, *args):
+        self._tracker.changed = True
+        return super(_SectionList, self).pop(*args)
+
+    def remove(self, value):
+        self._tracker.changed = True
+        super(_SectionList, self).remove(value)
+
+    def clear(self):
+        self._tracker.changed = True
+        del self[:]
+
+    def reverse(self):
+        self._tracker.changed = True
+        super(_SectionList, self).reverse()
+
+    def sort(self, *args, **kwargs):
+        self._tracker.changed = True
+        super(_SectionList, self).sort(*args, **kwargs)
+
+
+def _track_section(value):
+    """Copy a dictionary section of a message into a tracked dictionary.
+
+    :rtype: dict
+    """
+    if isinstance(value, dict):
+        return _SectionDict(_SectionTracker(), value)
+    return value
+
+
 class Message(object):
     """An AMQP message.
 
     When sending, if body type information is not provided,
     then depending on the nature of the data,
-    different body encoding will be used. If the data is str or bytes,
-    a single part DataBody will be sent. If the data is a list of str/bytes,
+    different body encoding will be used. If the data is str, bytes or any
+    other object supporting the buffer protocol (for example bytearray or memoryview),
+    a single part DataBody will be sent. If the data is a list of these types,
     a multipart DataBody will be sent. Any other type of list or any other
     type of data will be sent as a ValueBody.
     An empty payload will also be sent as a ValueBody.
     If body type information is provided, then the Message will use the given
     body type to encode the data or raise error if the data doesn't match the body type.
+    The application properties, annotations, delivery annotations and footer are
+    copied when they are set, so any later changes to them must be made through
+    the attributes of the message.
 
 
     :ivar on_send_complete: A custom callback to be run on completion of
@@ -98,6 +273,7 @@ class Message(object):
         self.retries = 0
         self._response = None
         self._settler = None
+        self._receiver = None
         self._encoding = encoding
         self.delivery_no = delivery_no
         self.delivery_tag = None
@@ -109,6 +285,7 @@ class Message(object):
         self._footer = None
         self._delivery_annotations = None
         self._need_further_parse = False
+        self._sections = {}
 
         if message:
             if settler:
@@ -130,16 +307,17 @@ class Message(object):
             if msg_format:
                 self._message.message_format = msg_format
             self._properties = properties
-            self._application_properties = application_properties
-            self._annotations = annotations
-            self._delivery_annotations = delivery_annotations
+            self._application_properties = _track_section(application_properties)
+            self._annotations = _track_section(annotations)
+            self._delivery_annotations = _track_section(delivery_annotations)
             self._header = header
-            self._footer = footer
+            self._footer = _track_section(footer)
 
     def __getstate__(self):
         state = self.__dict__.copy()
         state["state"] = self.state.value
         state["_message"] = None
+        state["_sections"] = {}
         state["_body_type"] = self._body.type.value if self._body else None
         if isinstance(self._body, (DataBody, SequenceBody)):
             state["_body"] = list(self._body.data)
@@ -151,6 +329,8 @@ class Message(object):
     def __setstate__(self, state):
         state["state"] = constants.MessageState(state.get("state"))
         self.__dict__.update(state)
+        for name in ("_application_properties", "_annotations", "_delivery_annotations", "_footer"):
+            setattr(self, name, _track_section(getattr(self, name)))
 
         body = state.get("_body")
         body_type = constants.BODY_TYPE_C_PYTHON_MAP.get(state.get("_body_type"))
@@ -199,7 +379,8 @@ class Message(object):
             utils.data_factory(value, encoding=self._encoding)
         )
         self._message.footer = footer_props
-        self._footer = value
+        self._footer = _track_section(value)
+        self._sections.pop("footer", None)
 
     @property
     def application_properties(self):
@@ -211,7 +392,8 @@ class Message(object):
     def application_properties(self, value):
         if value and not isinstance(value, dict):
             raise TypeError("Application properties must be a dictionary.")
-        self._application_properties = value
+        self._application_properties = _track_section(value)
+        self._sections.pop("application_properties", None)
 
     @property
     def annotations(self):
@@ -223,7 +405,8 @@ class Message(object):
     def annotations(self, value):
         if value and not isinstance(value, dict):
             raise TypeError("Message annotations must be a dictionary.")
-        self._annotations = value
+        self._annotations = _track_section(value)
+        self._sections.pop("message_annotations", None)
 
     @property
     def delivery_annotations(self):
@@ -233,7 +416,8 @@ class Message(object):
 
     @delivery_annotations.setter
     def delivery_annotations(self, value):
-        self._delivery_annotations = value
+        self._delivery_annotations = _track_section(value)
+        self._sections.pop("delivery_annotations", None)
 
     @classmethod
     def decode_from_bytes(cls, data):
@@ -328,10 +512,10 @@ class Message(object):
         We categorize object of type list/list of lists into ValueType (not into SequenceType) due to
         compatibility with old uamqp version.
         """
-        if isinstance(body, (six.text_type, six.binary_type)):
+        if _is_data_type(body):
             self._body = DataBody(self._message)
             self._body.append(body)
-        elif isinstance(body, list) and all([isinstance(b, (six.text_type, six.binary_type)) for b in body]):
+        elif isinstance(body, list) and all([_is_data_type(b) for b in body]):
             self._body = DataBody(self._message)
             for value in body:
                 self._body.append(value)
@@ -342,15 +526,15 @@ class Message(object):
     def _set_body_by_body_type(self, body, body_type):
         if body_type == constants.MessageBodyType.Data:
             self._body = DataBody(self._message)
-            if isinstance(body, (six.text_type, six.binary_type)):
+            if _is_data_type(body):
                 self._body.append(body)
-            elif isinstance(body, list) and all([isinstance(b, (six.text_type, six.binary_type)) for b in body]):
+            elif isinstance(body, list) and all([_is_data_type(b) for b in body]):
                 for value in body:
                     self._body.append(value)
             else:
                 raise TypeError(
                     "For MessageBodyType.Data, the body"
-                    " must be str or bytes or list of str or bytes.")
+                    " must be str or a bytes-like object or list of these.")
         elif body_type == constants.MessageBodyType.Sequence:
             self._body = SequenceBody(self._message)
             if isinstance(body, list) and all([isinstance(b, list) for b in body]):
@@ -368,39 +552,81 @@ class Message(object):
         else:
             raise ValueError("Unsupported MessageBodyType: {}".format(body_type))
 
-    def _populate_message_attributes(self, c_message):
+    def _get_converted_section(self, name, value, create=None):
+        """Get the C representation of a dictionary section of the message. This is
+        cached, and the section is only converted again once it has been set or
+        its contents have changed, including the contents of nested values.
+
+        :rtype: ~uamqp.c_uamqp.AMQPValue
+        """
+        tracker = getattr(value, "_tracker", None)
+        cached = self._sections.get(name)
+        if tracker is not None and not tracker.changed and cached and cached[0] is value:
+            return cached[1]
+        converted = utils.data_factory(value, encoding=self._encoding)
+        if create:
+            converted = create(converted)
+        if tracker is not None and tracker.trackable:
+            tracker.changed = False
+            self._sections[name] = (value, converted)
+        else:
+            self._sections.pop(name, None)
+        return converted
+
+    def _get_message_sections(self):
+        """Convert the message attributes into their C representations.
+
+        :rtype: dict
+        """
+        sections = {}
         if self.properties:
-            c_message.properties = self.properties.get_properties_obj()
+            sections["properties"] = self.properties.get_properties_obj()
         if self.application_properties:
             if not isinstance(self.application_properties, dict):
                 raise TypeError("Application properties must be a dictionary.")
-            amqp_props = utils.data_factory(
-                self.application_properties, encoding=self._encoding
+            sections["application_properties"] = self._get_converted_section(
+                "application_properties", self.application_properties
             )
-            c_message.application_properties = amqp_props
         if self.annotations:
             if not isinstance(self.annotations, dict):
                 raise TypeError("Message annotations must be a dictionary.")
-            ann_props = c_uamqp.create_message_annotations(
-                utils.data_factory(self.annotations, encoding=self._encoding)
+            sections["message_annotations"] = self._get_converted_section(
+                "message_annotations", self.annotations, c_uamqp.create_message_annotations
             )
-            c_message.message_annotations = ann_props
         if self.delivery_annotations:
             if not isinstance(self.delivery_annotations, dict):
                 raise TypeError("Delivery annotations must be a dictionary.")
-            delivery_ann_props = c_uamqp.create_delivery_annotations(
-                utils.data_factory(self.delivery_annotations, encoding=self._encoding)
+            sections["delivery_annotations"] = self._get_converted_section(
+                "delivery_annotations", self.delivery_annotations, c_uamqp.create_delivery_annotations
             )
-            c_message.delivery_annotations = delivery_ann_props
         if self.header:
-            c_message.header = self.header.get_header_obj()
+            sections["header"] = self.header.get_header_obj()
         if self.footer:
             if not isinstance(self.footer, dict):
                 raise TypeError("Footer must be a dictionary.")
-            footer = c_uamqp.create_footer(
-                utils.data_factory(self.footer, encoding=self._encoding)
+            sections["footer"] = self._get_converted_section(
+                "footer", self.footer, c_uamqp.create_footer
             )
-            c_message.footer = footer
+        return sections
+
+    def _populate_message_attributes(self, c_message):
+        for name, value in self._get_message_sections().items():
+            setattr(c_message, name, value)
+
+    def _encode_message_into(self, output):
+        """Encode the message to the end of the supplied buffer, without
+        cloning the underlying C message.
+
+        :param output: The buffer to which the encoded message is appended.
+        :type output: bytearray
+        :returns: The number of bytes written.
+        :rtype: int
+        """
+        if not self._message:
+            raise ValueError("No message data to encode.")
+        return c_uamqp.encode_message_into(
+            self._message, output, **self._get_message_sections()
+        )
 
     @property
     def settled(self):
@@ -437,13 +663,25 @@ class Message(object):
 
         :rtype: bytearray
         """
+        encoded_data = bytearray()
+        self._encode_message_into(encoded_data)
+        return bytes(encoded_data)
+
+    def freeze(self):
+        """Encode the message once to its final wire format. The returned
+        ~uamqp.message.EncodedMessage is immutable, and can be sent any number of
+        times, by any number of clients, without being encoded again. Later changes
+        to this message are not reflected in the encoded message.
+
+        :rtype: ~uamqp.message.EncodedMessage
+        """
         if not self._message:
             raise ValueError("No message data to encode.")
-        cloned_data = self._message.clone()
-        self._populate_message_attributes(cloned_data)
-        encoded_data = []
-        c_uamqp.get_encoded_message_size(cloned_data, encoded_data)
-        return b"".join(encoded_data)
+        encoded_data = bytearray()
+        self._encode_message_into(encoded_data)
+        return EncodedMessage(
+            encoded_data, msg_format=self._message.message_format, encoding=self._encoding
+        )
 
     def get_data(self):
         """Get the body data of the message. The format may vary depending
@@ -455,6 +693,19 @@ class Message(object):
             return None
         return self._body.data
 
+    def get_data_views(self):
+        """Get read-only views of the sections of a Data body, without copying
+        the data. Each view remains valid for as long as it is referenced.
+        Call `bytes()` or `tobytes()` on a view to take a copy.
+
+        :rtype: generator[memoryview]
+        """
+        if not self._message or not self._body:
+            return None
+        if not isinstance(self._body, DataBody):
+            raise TypeError("Only messages with a Data body have data views.")
+        return self._body.buffers()
+
     def gather(self):
         """Return all the messages represented by this object.
         This will always be a list of a single message.
@@ -594,6 +845,9 @@ class BatchMessage(Message):
      if the supplied data exceeds this maximum. If sending multiple batch messages, this
      value will be used to divide the supplied data between messages.
     :vartype max_message_length: int
+    :ivar size_offset: An additional number of bytes to reserve in each message, on top
+     of the encoded size of the message itself. The default is 0.
+    :vartype size_offset: int
 
     :param data: An iterable source of data, where each value will be considered the
      body of a single message in the batch.
@@ -602,7 +856,9 @@ class BatchMessage(Message):
      these properties will be applied to each message.
     :type properties: ~uamqp.message.MessageProperties
     :param application_properties: Service specific application properties. If multiple messages
-     are created these properties will be applied to each message.
+     are created these properties will be applied to each message. These are also applied to
+     each message in the data that has no application properties of its own, unless it is an
+     ~uamqp.message.EncodedMessage, which is added unchanged.
     :type application_properties: dict
     :param annotations: Service specific message annotations. If multiple messages are created
      these properties will be applied to each message. Keys in the dictionary
@@ -641,10 +897,13 @@ class BatchMessage(Message):
         self._encoding = encoding
         self.on_send_complete = None
         self._properties = properties
-        self._application_properties = application_properties
-        self._annotations = annotations
+        self._application_properties = _track_section(application_properties)
+        self._annotations = _track_section(annotations)
         self._header = header
         self._need_further_parse = False
+        self._sections = {}
+        self._envelope_size = None
+        self._builder = None
 
     def __getstate__(self):
         state = self.__dict__.copy()
@@ -668,6 +927,21 @@ class BatchMessage(Message):
             encoding=self._encoding,
         )
 
+    def _get_envelope_size(self):
+        """The encoded size of a batch message without any body data, including
+        the `size_offset`. This is calculated once and then cached.
+
+        :rtype: int
+        """
+        if self._envelope_size is None:
+            self._envelope_size = self._create_batch_message().get_message_encoded_size()
+        return self._envelope_size + self.size_offset
+
+    def _take_builder(self):
+        builder = self._builder or _BatchBuilder(self)
+        self._builder = None
+        return builder
+
     def _multi_message_generator(self):
         """Generate multiple ~uamqp.message.Message objects from a single data
         stream that in total may exceed the maximum individual message size.
@@ -677,58 +951,52 @@ class BatchMessage(Message):
 
         :rtype: generator[~uamqp.message.Message]
         """
-        unappended_message_bytes = None
-        while True:
-            new_message = self._create_batch_message()
-            message_size = new_message.get_message_encoded_size() + self.size_offset
-            body_size = 0
-            if unappended_message_bytes:
-                new_message._body.append(  # pylint: disable=protected-access
-                    unappended_message_bytes
-                )
-                body_size += len(unappended_message_bytes)
-            try:
-                for data in self._body_gen:
-                    message_bytes = None
-                    try:
-                        # try to get the internal uamqp Message
-                        internal_uamqp_message = data.message
-                    except AttributeError:
-                        # no inernal message, data could be uamqp Message or raw data
-                        internal_uamqp_message = data
-                    try:
-                        # uamqp Message
-                        if (
-                                not internal_uamqp_message.application_properties
-                                and self.application_properties
-                        ):
-                            internal_uamqp_message.application_properties = (
-                                self.application_properties
-                            )
-                        message_bytes = internal_uamqp_message.encode_message()
-                    except AttributeError:  # raw data
-                        wrap_message = Message(
-                            body=internal_uamqp_message,
-                            application_properties=self.application_properties,
-                        )
-                        message_bytes = wrap_message.encode_message()
-                    body_size += len(message_bytes)
-                    if (body_size + message_size) > self.max_message_length:
-                        new_message.on_send_complete = self.on_send_complete
-                        unappended_message_bytes = message_bytes
-                        yield new_message
-                        raise StopIteration()
-                    new_message._body.append(  # pylint: disable=protected-access
-                        message_bytes
-                    )
-            except StopIteration:
+        builder = self._take_builder()
+        for data in self._body_gen or []:
+            if not builder.append(data):
+                yield builder.finish()
                 _logger.debug("Sent partial message.")
-                continue
-            else:
-                new_message.on_send_complete = self.on_send_complete
-                yield new_message
-                _logger.debug("Sent all batched data.")
-                break
+                builder = _BatchBuilder(self, builder.overflow)
+        yield builder.finish()
+        _logger.debug("Sent all batched data.")
+
+    def append(self, data):
+        """Encode a value and add it to the batch. Values added this way are sent
+        ahead of those supplied by the data generator, and are consumed once the
+        batch has been gathered.
+
+        :param data: The value to add. This can be a ~uamqp.message.Message or
+         the body of a message.
+        :raises: ~uamqp.errors.MessageContentTooLarge if the value does not fit
+         in the remaining capacity of the batch. In this case the value is not added.
+        """
+        if self._builder is None:
+            self._builder = _BatchBuilder(self)
+        if not self._builder.append(data):
+            self._builder.overflow = None
+            raise errors.MessageContentTooLarge()
+
+    def remaining_capacity(self):
+        """The number of bytes that can still be added to the batch before it
+        reaches `max_message_length`. This includes the framing of each
+        body section, and accounts for values added with `append` but not for
+        those still to be read from the data generator.
+
+        :rtype: int
+        """
+        if self._builder is None:
+            return self.max_message_length - self._get_envelope_size()
+        return self._builder.remaining_capacity()
+
+    def freeze(self):
+        """Encode the batch once to its final wire format. This is only supported
+        for a batch that is sent in a single message.
+
+        :rtype: ~uamqp.message.EncodedMessage
+        """
+        if self._multi_messages:
+            raise TypeError("A batch sent across multiple messages cannot be frozen.")
+        return self.gather()[0].freeze()
 
     def gather(self):
         """Return all the messages represented by this object. This will convert
@@ -737,43 +1005,279 @@ class BatchMessage(Message):
 
         :rtype: list[~uamqp.message.Message]
         """
+        if self._builder is None:
+            self._envelope_size = None
         if self._multi_messages:
             return self._multi_message_generator()
 
-        new_message = self._create_batch_message()
-        message_size = new_message.get_message_encoded_size() + self.size_offset
-        body_size = 0
+        builder = self._take_builder()
+        for data in self._body_gen or []:
+            if not builder.append(data):
+                raise errors.MessageContentTooLarge()
+        return [builder.finish()]
 
-        for data in self._body_gen:
-            message_bytes = None
-            try:
-                # try to get the internal uamqp Message
-                internal_uamqp_message = data.message
-            except AttributeError:
-                # no inernal message, data could be uamqp Message or raw data
-                internal_uamqp_message = data
-            try:
-                # uamqp Message
-                if (
-                        not internal_uamqp_message.application_properties
-                        and self.application_properties
-                ):
-                    internal_uamqp_message.application_properties = (
-                        self.application_properties
-                    )
-                message_bytes = internal_uamqp_message.encode_message()
-            except AttributeError:  # raw data
-                wrap_message = Message(
-                    body=internal_uamqp_message,
-                    application_properties=self.application_properties,
+
+def _frozen_section(name):
+    """A message attribute of an ~uamqp.message.EncodedMessage, decoded from
+    the encoded data when first read. The attribute cannot be set.
+    """
+    def _get(self):
+        return getattr(self._decode(), name)  # pylint: disable=protected-access
+
+    def _set(self, value):
+        raise TypeError("An encoded message cannot be modified.")
+
+    return property(_get, _set)
+
+
+class EncodedMessage(Message):
+    """An AMQP message that has already been encoded to its final wire format.
+
+    The encoded data is attached to the underlying C message, which transmits it
+    as-is instead of encoding the message sections each time it is sent. This makes
+    it possible to send the same payload to many targets for the cost of a single
+    encode. The message is immutable: its attributes are decoded from the encoded
+    data when read, and cannot be set.
+
+    Each call to `gather` returns a new message that shares the encoded data, so the
+    same encoded message can be queued on any number of clients at once, with the
+    send state of each send tracked separately. When sending with a
+    ~uamqp.sender.MessageSender directly, send the messages returned by `gather`.
+
+    An encoded message is usually created with `Message.freeze()`.
+
+    :ivar on_send_complete: A custom callback to be run on completion of
+     the send operation of this message. The callback must take two parameters,
+     a result (of type `MessageSendResult`) and an error (of type
+     Exception). The error parameter may be None if no error ocurred or the error
+     information was undetermined.
+    :vartype on_send_complete: callable[~uamqp.constants.MessageSendResult, Exception]
+
+    :param data: The AMQP wire-encoded bytes of the message.
+    :type data: bytes or bytearray
+    :param msg_format: A custom message format. Default is 0.
+    :type msg_format: int
+    :param encoding: The encoding to use for parameters supplied as strings.
+     Default is 'UTF-8'
+    :type encoding: str
+    """
+
+    properties = _frozen_section("properties")
+    header = _frozen_section("header")
+    footer = _frozen_section("footer")
+    application_properties = _frozen_section("application_properties")
+    annotations = _frozen_section("annotations")
+    delivery_annotations = _frozen_section("delivery_annotations")
+
+    def __init__(self, data, msg_format=None, encoding="UTF-8"):
+        # pylint: disable=super-init-not-called
+        self.state = constants.MessageState.WaitingToBeSent
+        self.idle_time = 0
+        self.retries = 0
+        self._response = None
+        self._settler = None
+        self._receiver = None
+        self._encoding = encoding
+        self.delivery_no = None
+        self.delivery_tag = None
+        self.on_send_complete = None
+        self._need_further_parse = False
+        self._body = None
+        self._encoded = bytes(data)
+        self._decoded = None
+        self._message = c_uamqp.create_message()
+        if msg_format:
+            self._message.message_format = msg_format
+        self._message.set_encoded_payload(self._encoded)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["state"] = self.state.value
+        state["_message"] = None
+        state["_decoded"] = None
+        state["_msg_format"] = self._message.message_format
+        return state
+
+    def __setstate__(self, state):
+        msg_format = state.pop("_msg_format")
+        state["state"] = constants.MessageState(state.get("state"))
+        self.__dict__.update(state)
+        self._message = c_uamqp.create_message()
+        self._message.message_format = msg_format
+        self._message.set_encoded_payload(self._encoded)
+
+    def __str__(self):
+        return str(self._decode())
+
+    def _decode(self):
+        if self._decoded is None:
+            self._decoded = Message.decode_from_bytes(self._encoded)
+        return self._decoded
+
+    def _encode_message_into(self, output):
+        output += self._encoded
+        return len(self._encoded)
+
+    def get_message_encoded_size(self):
+        """Get the size of the encoded message.
+
+        :rtype: int
+        """
+        return len(self._encoded)
+
+    def encode_message(self):
+        """Get the AMQP wire-encoded bytes of the message.
+
+        :rtype: bytes
+        """
+        return self._encoded
+
+    def freeze(self):
+        """An encoded message is already frozen, so this returns the message itself.
+
+        :rtype: ~uamqp.message.EncodedMessage
+        """
+        return self
+
+    def get_data(self):
+        """Get the body data of the message, decoded from the encoded data.
+        The format may vary depending on the body type.
+
+        :rtype: generator
+        """
+        return self._decode().get_data()
+
+    def get_data_views(self):
+        """Get read-only views of the sections of a Data body, decoded from
+        the encoded data.
+
+        :rtype: generator[memoryview]
+        """
+        return self._decode().get_data_views()
+
+    def gather(self):
+        """Return a new message for sending the encoded data, sharing the
+        encoded data and the underlying C message with this one.
+
+        :rtype: list[~uamqp.message.EncodedMessage]
+        """
+        message = EncodedMessage.__new__(EncodedMessage)
+        message.__dict__.update(self.__dict__)
+        message.state = constants.MessageState.WaitingToBeSent
+        message.idle_time = 0
+        message.retries = 0
+        message._response = None  # pylint: disable=protected-access
+        return [message]
+
+    def get_message(self):
+        """Get the underlying C message from this object. The message carries
+        the encoded data, and is shared by all the messages gathered from this one.
+
+        :rtype: uamqp.c_uamqp.cMessage
+        """
+        return self._message
+
+
+def _get_data_section_overhead(length):
+    """The number of bytes used to frame a body data section of the given length:
+    the section descriptor followed by a vbin8 or vbin32 binary constructor.
+
+    :rtype: int
+    """
+    if length <= 255:
+        return 5
+    return 8
+
+
+class _BatchBuilder(object):
+    """Builds a single batch message by encoding each value supplied for the
+    batch straight into one growing buffer, while keeping track of the encoded
+    size of the message. The buffer is split into the body data sections of
+    the batch message once the batch is complete.
+
+    :param batch: The batch message being built.
+    :type batch: ~uamqp.message.BatchMessage
+    :param overflow: Encoded data that did not fit in the previous message of
+     the batch, and which will be added first to this message.
+    :type overflow: bytearray
+    """
+
+    def __init__(self, batch, overflow=None):
+        self._batch = batch
+        self._buffer = bytearray()
+        self._section_sizes = []
+        self._size = batch._get_envelope_size()  # pylint: disable=protected-access
+        self.overflow = None
+        if overflow is not None:
+            self._buffer += overflow
+            self._section_sizes.append(len(overflow))
+            self._size += _get_data_section_overhead(len(overflow)) + len(overflow)
+
+    def _encode(self, data):
+        try:
+            # try to get the internal uamqp Message
+            internal_uamqp_message = data.message
+        except AttributeError:
+            # no inernal message, data could be uamqp Message or raw data
+            internal_uamqp_message = data
+        try:
+            # uamqp Message. An encoded message cannot be modified, so it is
+            # sent with its own application properties.
+            if (
+                    not isinstance(internal_uamqp_message, EncodedMessage)
+                    and not internal_uamqp_message.application_properties
+                    and self._batch.application_properties
+            ):
+                internal_uamqp_message.application_properties = (
+                    self._batch.application_properties
                 )
-                message_bytes = wrap_message.encode_message()
-            body_size += len(message_bytes)
-            if (body_size + message_size) > self.max_message_length:
-                raise errors.MessageContentTooLarge()
-            new_message._body.append(message_bytes)  # pylint: disable=protected-access
-        new_message.on_send_complete = self.on_send_complete
-        return [new_message]
+            encode = internal_uamqp_message._encode_message_into  # pylint: disable=protected-access
+        except AttributeError:  # raw data
+            wrap_message = Message(
+                body=internal_uamqp_message,
+                application_properties=self._batch.application_properties,
+            )
+            encode = wrap_message._encode_message_into  # pylint: disable=protected-access
+        return encode(self._buffer)
+
+    def remaining_capacity(self):
+        """The number of bytes that can still be added to the message.
+
+        :rtype: int
+        """
+        return self._batch.max_message_length - self._size
+
+    def append(self, data):
+        """Encode a value from the batch data to the end of the message.
+
+        :param data: A uamqp Message, an object wrapping one as `message`, or raw
+         data to be sent as the body of a message.
+        :returns: Whether the encoded data fits within the max message length. If not,
+         it is not added to the message and is instead available as `overflow`.
+        :rtype: bool
+        """
+        start = len(self._buffer)
+        section_size = self._encode(data)
+        encoded_size = _get_data_section_overhead(section_size) + section_size
+        if encoded_size > self.remaining_capacity():
+            self.overflow = self._buffer[start:]
+            del self._buffer[start:]
+            return False
+        self._section_sizes.append(section_size)
+        self._size += encoded_size
+        return True
+
+    def finish(self):
+        """Create the batch message with the encoded data as its body.
+
+        :rtype: ~uamqp.message.Message
+        """
+        message = self._batch._create_batch_message()  # pylint: disable=protected-access
+        message._message.add_body_data_sections(  # pylint: disable=protected-access
+            self._buffer, self._section_sizes
+        )
+        message.on_send_complete = self._batch.on_send_complete
+        return message
 
 
 class MessageProperties(object):
@@ -892,6 +1396,12 @@ class MessageProperties(object):
         for key, val in state.items():
             self.__setattr__(key, val)
 
+    def __setattr__(self, name, value):
+        # Any change to the properties invalidates the cached C properties.
+        super(MessageProperties, self).__setattr__(name, value)
+        if name != "_properties_obj":
+            super(MessageProperties, self).__setattr__("_properties_obj", None)
+
     @property
     def message_id(self):
         if self._message_id:
@@ -1081,10 +1591,13 @@ class MessageProperties(object):
         }
 
     def get_properties_obj(self):
-        """Get the underlying C reference from this object.
+        """Get the underlying C reference from this object. This is cached
+        until the properties are next changed.
 
         :rtype: uamqp.c_uamqp.cProperties
         """
+        if self._properties_obj is not None:
+            return self._properties_obj
         properties = c_uamqp.cProperties()
         self._set_attr("message_id", properties)
         self._set_attr("user_id", properties)
@@ -1099,6 +1612,7 @@ class MessageProperties(object):
         self._set_attr("group_id", properties)
         self._set_attr("group_sequence", properties)
         self._set_attr("reply_to_group_id", properties)
+        self._properties_obj = properties
         return properties
 
 
@@ -1153,21 +1667,42 @@ class DataBody(MessageBody):
         return data.value
 
     def append(self, data):
-        """Append a section to the body.
+        """Append a section to the body. Data supporting the buffer protocol,
+        such as a bytearray, memoryview or mmap, is copied directly into the
+        message without first being converted to bytes. A non-contiguous buffer,
+        such as a strided slice of a memoryview, is copied into bytes first.
 
         :param data: The data to append.
-        :type data: str or bytes
+        :type data: str or bytes or bytearray or memoryview
         """
         if isinstance(data, six.text_type):
-            self._message.add_body_data(data.encode(self._encoding))
-        elif isinstance(data, six.binary_type):
-            self._message.add_body_data(data)
+            data = data.encode(self._encoding)
+        elif not isinstance(data, six.binary_type):
+            try:
+                data = memoryview(data)
+            except TypeError:
+                return
+            if not data.contiguous:
+                data = data.tobytes()
+            elif data.ndim != 1 or data.format != 'B':
+                data = data.cast('B')
+        self._message.add_body_data(data)
 
     @property
     def data(self):
         for i in range(len(self)):
             yield self._message.get_body_data(i)
 
+    def buffers(self):
+        """Iterate over read-only views of each section in the body. Unlike `data`,
+        the sections are not copied; each view refers directly to the memory
+        of the underlying C message, which is kept alive while the view exists.
+
+        :rtype: generator[memoryview]
+        """
+        for i in range(len(self)):
+            yield self._message.get_body_data_view(i)
+
 
 class ValueBody(MessageBody):
     """An AMQP message body of type Value. This represents
@@ -1351,11 +1886,25 @@ class MessageHeader(object):
             }
         )
 
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_header_obj"] = None
+        return state
+
+    def __setattr__(self, name, value):
+        # Any change to the header invalidates the cached C header.
+        super(MessageHeader, self).__setattr__(name, value)
+        if name != "_header_obj":
+            super(MessageHeader, self).__setattr__("_header_obj", None)
+
     def get_header_obj(self):
-        """Get the underlying C reference from this object.
+        """Get the underlying C reference from this object. This is cached
+        until the header is next changed.
 
         :rtype: uamqp.c_uamqp.cHeader
         """
+        if self._header_obj is not None:
+            return self._header_obj
         header = c_uamqp.create_header()
         header.delivery_count = self.delivery_count or 0
         if self.time_to_live is not None:
@@ -1366,4 +1915,5 @@ class MessageHeader(object):
             header.durable = self.durable
         if self.priority is not None:
             header.priority = self.priority
+        self._header_obj = header
         return header
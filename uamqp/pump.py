@@ -0,0 +1,237 @@
+#-------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for
+# license information.
+#--------------------------------------------------------------------------
+
+import logging
+import socket
+import threading
+
+from uamqp import c_uamqp, constants, errors
+
+_logger = logging.getLogger(__name__)
+# While a client is opening, the pump waits for at most this long between
+# iterations, so that its authentication and link state keep being checked.
+_OPENING_WAIT_SECS = 0.05
+
+
+class ConnectionPump(object):
+    """Runs a single work loop for a Connection and all the clients opened on it.
+    Each iteration of the pump works the Connection once, and then runs the send,
+    receive and settlement work of every attached link, instead of every client
+    locking and working the shared Connection from its own `do_work`.
+
+    The pump can be run in a background thread with `start`, or driven directly
+    with `run_once`. While a client is attached, its own `do_work` will run or wait
+    for an iteration of the pump, so the existing send and receive methods of the
+    client can still be used. An error raised by a client link detaches that client
+    from the pump and is raised from its next call to `do_work`. If the background
+    thread stops on an error, every attached client is detached with that error.
+
+    :param connection: The Connection to be shared by all the attached clients.
+     This is destroyed when the pump is closed.
+    :type connection: ~uamqp.connection.Connection
+    :param max_wait: The maximum length of time in seconds to wait for incoming
+     data between iterations while none of the attached clients has work to do.
+     Default is 1 second.
+    :type max_wait: float
+    """
+
+    def __init__(self, connection, max_wait=constants.MAX_IDLE_WAIT_SECS):
+        self.connection = connection
+        self._max_wait = max_wait
+        self._clients = []
+        self._lock = threading.RLock()
+        self._iteration = threading.Condition()
+        self._waker, self._wakeup = socket.socketpair()
+        self._waker.setblocking(False)
+        self._wakeup.setblocking(False)
+        self._thread = None
+        self._running = False
+        self._error = None
+
+    def __enter__(self):
+        """Run the pump in a context manager."""
+        return self
+
+    def __exit__(self, *args):
+        """Close the pump and its Connection on exiting a context manager."""
+        self.close()
+
+    @property
+    def clients(self):
+        """The clients currently attached to the pump.
+
+        :rtype: list[~uamqp.client.AMQPClient]
+        """
+        return list(self._clients)
+
+    def _fail(self, client, error):
+        _logger.info("Client %r failed in connection pump: %r", client._name, error)  # pylint: disable=protected-access
+        self.detach(client)
+        client._pump_error = error  # pylint: disable=protected-access
+
+    def _drain_wakeup(self):
+        try:
+            while self._wakeup.recv(1024):
+                pass
+        except (BlockingIOError, OSError):
+            pass
+
+    def attach(self, client):
+        """Open a client on the pump Connection and add its link to the work loop.
+        Keep-alive of the client is disabled, as the Connection is
+        continuously worked by the pump.
+
+        :param client: The client to attach. This must not already be open
+         on a different Connection, and cannot be an async client.
+        :type client: ~uamqp.client.AMQPClient
+        """
+        # pylint: disable=protected-access
+        if hasattr(client, "do_work_async"):
+            raise TypeError("An async client cannot be attached to a connection pump.")
+        if client._connection and client._connection is not self.connection:
+            raise ValueError("Client is already open on a different connection.")
+        with self._lock:
+            client._keep_alive_interval = 0
+            client._heartbeat = False
+            client.open(connection=self.connection)
+            client._pump = self
+            client._pump_error = None
+            if client not in self._clients:
+                self._clients.append(client)
+        self.wake()
+
+    def detach(self, client):
+        """Remove a client from the work loop. The client remains open on the
+        Connection, and will work it from its own `do_work` from now on. Any
+        error previously raised by the pump for the client is cleared.
+
+        :param client: The client to detach.
+        :type client: ~uamqp.client.AMQPClient
+        """
+        with self._lock:
+            client._pump = None  # pylint: disable=protected-access
+            client._pump_error = None  # pylint: disable=protected-access
+            try:
+                self._clients.remove(client)
+            except ValueError:
+                pass
+        with self._iteration:
+            self._iteration.notify_all()
+
+    def wake(self):
+        """Interrupt the wait for incoming data, so that work queued on an
+        attached client from another thread is picked up by the next iteration.
+        """
+        try:
+            self._waker.send(b"\x00")
+        except (BlockingIOError, OSError):
+            pass  # A wakeup is already pending.
+
+    def run_once(self):
+        """Run a single iteration of the pump. The Connection is worked once, and each
+        attached client that is ready then runs its link. If none of the clients has
+        pending work, this will then wait for incoming data, a Connection deadline or
+        a call to `wake`, whichever is first. While a client is still opening, the
+        wait is limited to a short interval.
+
+        :returns: Whether there are still clients attached to the pump.
+        :rtype: bool
+        :raises: ~uamqp.errors.ConnectionClose if the Connection has been closed. In this
+         case the error is also raised from every attached client.
+        """
+        # pylint: disable=protected-access
+        with self._lock:
+            try:
+                self.connection.work()
+                if self.connection._state == c_uamqp.ConnectionState.DISCARDING:
+                    raise errors.ConnectionClose(constants.ErrorCodes.InternalServerError)
+            except Exception as e:
+                for client in list(self._clients):
+                    self._fail(client, e)
+                raise
+            wait = self._max_wait
+            for client in list(self._clients):
+                try:
+                    if client._shutdown:
+                        self.detach(client)
+                    elif not client.client_ready():
+                        wait = min(wait, _OPENING_WAIT_SECS)
+                    elif not client._pump_run() or client._shutdown:
+                        self.detach(client)
+                    else:
+                        wait = min(wait, client._pump_wait())
+                except Exception as e:  # pylint: disable=broad-except
+                    self._fail(client, e)
+            attached = bool(self._clients)
+        with self._iteration:
+            self._iteration.notify_all()
+        if wait > 0 and attached:
+            self.connection.wait(wait, wakeup=self._wakeup)
+        self._drain_wakeup()
+        return attached
+
+    def work(self):
+        """Run the pump on behalf of an attached client. If the pump is running in
+        a background thread, this will wait for its next iteration, otherwise a
+        single iteration is run in the calling thread.
+
+        :raises: The error on which the background thread stopped, if any.
+        """
+        try:
+            raise self._error
+        except TypeError:
+            pass
+        if self._thread is None:
+            self.run_once()
+        else:
+            with self._iteration:
+                self._iteration.wait(self._max_wait)
+
+    def start(self):
+        """Run the pump in a background thread until it is stopped."""
+        if self._thread:
+            return
+        self._error = None
+        self._running = True
+        self._thread = threading.Thread(target=self._run)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def _run(self):
+        try:
+            while self._running:
+                if not self.run_once():
+                    with self._iteration:
+                        self._iteration.wait(self._max_wait)
+        except Exception as e:  # pylint: disable=broad-except
+            _logger.info("Connection pump stopped: %r", e)
+            self._error = e
+            for client in self.clients:
+                self._fail(client, e)
+        finally:
+            self._running = False
+            self._thread = None
+            with self._iteration:
+                self._iteration.notify_all()
+
+    def stop(self):
+        """Stop running the pump in the background thread."""
+        self._running = False
+        thread, self._thread = self._thread, None
+        if thread:
+            self.wake()
+            thread.join()
+
+    def close(self):
+        """Stop the pump, close all of the attached clients and destroy
+        the Connection.
+        """
+        self.stop()
+        for client in self.clients:
+            client.close()
+        self.connection.destroy()
+        self._waker.close()
+        self._wakeup.close()
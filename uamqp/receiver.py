@@ -197,27 +197,71 @@ class MessageReceiver(object):
          the message was accepted, rejected or abandoned.
         :type response: ~uamqp.errors.MessageResponse
         """
+        self.settle_range(message_number, message_number, response)
+
+    def settle_range(self, first, last, response):
+        """Send a single settle disposition for a contiguous range of
+        received messages.
+
+        :param first: The delivery number of the first message to settle.
+        :type first: int
+        :param last: The delivery number of the last message to settle.
+        :type last: int
+        :response: The type of disposition to respond with, e.g. whether
+         the messages were accepted, rejected or abandoned.
+        :type response: ~uamqp.errors.MessageResponse
+        """
         if not response or isinstance(response, errors.MessageAlreadySettled):
             return
         if isinstance(response, errors.MessageAccepted):
-            self._receiver.settle_accepted_message(message_number)
+            self._receiver.settle_accepted_range(first, last)
         elif isinstance(response, errors.MessageReleased):
-            self._receiver.settle_released_message(message_number)
+            self._receiver.settle_released_range(first, last)
         elif isinstance(response, errors.MessageRejected):
-            self._receiver.settle_rejected_message(
-                message_number,
+            self._receiver.settle_rejected_range(
+                first,
+                last,
                 response.error_condition,
                 response.error_description,
                 response.error_info)
         elif isinstance(response, errors.MessageModified):
-            self._receiver.settle_modified_message(
-                message_number,
+            self._receiver.settle_modified_range(
+                first,
+                last,
                 response.failed,
                 response.undeliverable,
                 response.annotations)
         else:
             raise ValueError("Invalid message response type: {}".format(response))
 
+    def settle_messages(self, message_numbers, response):
+        """Settle a number of received messages with the same disposition.
+        Contiguous delivery numbers are settled together in a single disposition.
+
+        :param message_numbers: The delivery numbers of the messages to settle.
+        :type message_numbers: list[int]
+        :response: The type of disposition to respond with, e.g. whether
+         the messages were accepted, rejected or abandoned.
+        :type response: ~uamqp.errors.MessageResponse
+        """
+        message_numbers = sorted(set(message_numbers))
+        if not message_numbers:
+            return
+        ranges = []
+        first = last = message_numbers[0]
+        for message_number in message_numbers[1:]:
+            if message_number != last + 1:
+                ranges.append((first, last))
+                first = message_number
+            last = message_number
+        ranges.append((first, last))
+        if len(ranges) > 1 and ranges[0][0] == 0 and ranges[-1][1] == constants.MAX_DELIVERY_NUMBER:
+            # Delivery numbers are sequence numbers that wrap around, so a run of
+            # numbers ending at the maximum continues at zero as a single range.
+            ranges[0] = (ranges.pop()[0], ranges[0][1])
+        for first, last in ranges:
+            self.settle_range(first, last, response)
+
     def _message_received(self, message):
         """Callback run on receipt of every message. If there is
         a user-defined callback, this will be called.
@@ -238,6 +282,8 @@ class MessageReceiver(object):
                 encoding=self.encoding,
                 settler=settler,
                 delivery_no=message_number)
+            if settler:
+                wrapped_message._receiver = self
             self.on_message_received(wrapped_message)
         except RuntimeError:
             condition = b"amqp:unknown-error"
@@ -255,6 +255,94 @@ class MessageSender(object):
         finally:
             self._session._connection.release()
 
+    def send_many(self, messages, callback, timeout=0):
+        """Add a list of messages to the internal pending queue to be processed
+        by the Connection without waiting for them to be sent. The Connection
+        is locked only once for the whole list.
+
+        :param messages: The messages to send.
+        :type messages: list[~uamqp.message.Message]
+        :param callback: The callback to be run once a disposition is received
+         in receipt of each message. The callback must take three arguments, the message,
+         the send result and the optional delivery condition (exception).
+        :type callback:
+         callable[~uamqp.message.Message, ~uamqp.constants.MessageSendResult, ~uamqp.errors.MessageException]
+        :param timeout: An expiry time for the messages added to the queue. If a
+         message is not sent within this timeout it will be discarded with an error
+         state. This can be a single value for all messages, or a list with a timeout
+         for each message. If set to 0, the messages will not expire. The default is 0.
+        :type timeout: int or list[int]
+        :returns: Whether each message was added to the queue. If adding a message
+         raises an error, it and the messages after it are not added and have no result,
+         so the list can be shorter than the messages.
+        :rtype: list[bool]
+        """
+        # pylint: disable=protected-access
+        try:
+            raise self._error
+        except TypeError:
+            pass
+        except Exception as e:
+            _logger.warning("%r", e)
+            raise
+        messages, c_messages, timeouts = self._prepare_many(messages, callback, timeout)
+        try:
+            self._session._connection.lock(timeout=-1)
+            return self._sender.send_many(c_messages, timeouts, messages)
+        finally:
+            self._session._connection.release()
+
+    def send_presettled(self, messages):
+        """Send a list of messages on a link with a send settle mode of `Settled`,
+        without tracking the outcome of each message. No callback is run once a message
+        has been sent. The Connection is locked only once for the whole list.
+
+        :param messages: The messages to send. Each can be a ~uamqp.message.Message,
+         or bytes to be sent as the single Data section of a message body, in which case
+         a single underlying C message is reused for every value.
+        :type messages: list[~uamqp.message.Message or bytes]
+        :returns: The number of messages sent. Sending stops at the first message that
+         could not be added to the queue.
+        :rtype: int
+        """
+        # pylint: disable=protected-access
+        try:
+            raise self._error
+        except TypeError:
+            pass
+        except Exception as e:
+            _logger.warning("%r", e)
+            raise
+        values = self._prepare_presettled(messages)
+        try:
+            self._session._connection.lock(timeout=-1)
+            return self._sender.send_presettled(values)
+        finally:
+            self._session._connection.release()
+
+    def _prepare_presettled(self, messages):
+        if self.send_settle_mode != constants.SenderSettleMode.Settled.value:
+            raise ValueError("Presettled messages can only be sent with a send settle mode of Settled.")
+        values = []
+        for message in messages:
+            try:
+                values.append(message.get_message())
+            except AttributeError:
+                values.append(message)
+        return values
+
+    @staticmethod
+    def _prepare_many(messages, callback, timeout):
+        # pylint: disable=protected-access
+        messages = list(messages)
+        c_messages = [message.get_message() for message in messages]
+        for message in messages:
+            message._on_message_sent = callback
+        timeouts = list(timeout) if isinstance(timeout, (list, tuple)) else [timeout] * len(messages)
+        if len(timeouts) != len(messages):
+            raise ValueError("A timeout must be provided for each message.")
+        return messages, c_messages, timeouts
+
     def on_state_changed(self, previous_state, new_state):
         """Callback called whenever the underlying Sender undergoes a change
         of state. This function can be overridden.